@@ -1,7 +1,18 @@
-from fastapi import APIRouter,Request,Query
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter,Request,Query,HTTPException
+from fastapi.responses import HTMLResponse,StreamingResponse,Response
 from typing import List,Optional
+import asyncio
 from datetime import datetime,timedelta
+from app.data.providers.rate_limiter import Priority,priority_scope
+from app.schemas.quote import QuoteBatch
+from app.utils.dataframe_stream import (
+    ARROW_MEDIA_TYPE,
+    gzip_chunks,
+    iter_arrow_ipc,
+    iter_columnar_json,
+    iter_csv,
+    iter_records_json,
+)
 
 router = APIRouter()
 
@@ -28,54 +39,174 @@ async def dashboard(request: Request):
 @router.get("/quotes")
 async def get_quotes(
         request: Request,
-        symbols: Optional[str] = Query(None,description="Comma-separated list of symbols")
+        symbols: Optional[str] = Query(None,description="Comma-separated list of symbols"),
+        deadline: Optional[float] = Query(None,gt=0,le=60,description="Seconds before slow symbols are returned stale"),
+        layout: str = Query("records",pattern="^(records|columns)$",description="records: one object per quote, columns: one array per field")
 ):
     """
     Get real-time quotes for symbols
     If no symbols provided, returns quotes for default watchlist
+    Watchlist symbols are answered from the background snapshot, each quote
+    carrying an 'as_of' fetch timestamp
     """
     data_aggregator = request.app.state.data_aggregator
     config_manager = request.app.state.config_manager
+    snapshot_service = request.app.state.snapshot_service
+
+    if snapshot_service.ready:
+        if symbols:
+            quotes = snapshot_service.get_quotes([s.strip().upper() for s in symbols.split(",")])
+        else:
+            quotes = snapshot_service.get_watchlist_quotes()
+
+        if quotes is not None:
+            body = QuoteBatch.from_quotes(quotes).to_json(
+                layout,
+                timestamp=datetime.now().isoformat(),
+                snapshot_at=snapshot_service.refreshed_at.isoformat()
+            )
+            return Response(content=body,media_type="application/json")
 
     if symbols:
         symbol_list = [s.strip().upper() for s in symbols.split(",")]
+        priority = Priority.ADHOC
     else:
         symbol_list = config_manager.get_watchlist()
+        priority = Priority.WATCHLIST
 
-    quotes = await data_aggregator.get_quotes(symbol_list)
+    with priority_scope(priority):
+        quotes = await data_aggregator.get_quotes(symbol_list,deadline=deadline)
 
-    return {
-        "timestamp": datetime.now().isoformat(),
-        "count": len(quotes),
-        "quotes": quotes
-    }
+    body = QuoteBatch.from_quotes(quotes).to_json(layout,timestamp=datetime.now().isoformat())
+    return Response(content=body,media_type="application/json")
 
 
 @router.get("/quote/{symbol}")
 async def get_quote(request: Request,symbol: str):
     """Get quote for a single symbol"""
     data_aggregator = request.app.state.data_aggregator
+    snapshot_service = request.app.state.snapshot_service
 
-    quote = await data_aggregator.get_quote(symbol.upper())
+    quote = snapshot_service.quotes.get(symbol.upper())
+    if quote is None:
+        quote = await data_aggregator.get_quote(symbol.upper())
 
     return {
         "timestamp": datetime.now().isoformat(),
-        "quote": quote
+        "quote": quote.to_dict()
     }
 
 
+@router.get("/stream/quotes")
+async def stream_quotes(
+        request: Request,
+        symbols: Optional[str] = Query(None,description="Comma-separated symbols to subscribe to (default: all)")
+):
+    """
+    Stream quote updates as Server-Sent Events
+    Sends a 'snapshot' event with full quotes on connect, then 'delta'
+    events holding only the fields that changed in each refresh
+    """
+    snapshot_service = request.app.state.snapshot_service
+    broadcaster = request.app.state.quote_broadcaster
+
+    symbol_list = [s.strip().upper() for s in symbols.split(",")] if symbols else None
+    subscription = broadcaster.subscribe(symbol_list)
+
+    async def events():
+        try:
+            yield broadcaster.snapshot_event(subscription,snapshot_service.quotes)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(),timeout=15)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+
+                if event is None:
+                    event = broadcaster.snapshot_event(subscription,snapshot_service.quotes)
+                yield event
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache","X-Accel-Buffering": "no"}
+    )
+
+
+HISTORICAL_MEDIA_TYPES = {
+    "records": "application/json",
+    "columns": "application/json",
+    "csv": "text/csv",
+    "arrow": ARROW_MEDIA_TYPE,
+}
+
+
+# Columns of an empty range, as the providers name them
+EMPTY_COLUMNS = ('open','high','low','close','volume')
+
+
+def _empty_bars(df):
+    """An empty frame with bar columns, so empty bodies still carry a schema"""
+    if len(df.columns):
+        return df
+    import pandas as pd
+
+    return pd.DataFrame(
+        {column: pd.Series(dtype=float) for column in EMPTY_COLUMNS},
+        index=pd.DatetimeIndex([],name='Date')
+    )
+
+
+def _negotiate_format(request: Request,format: Optional[str]) -> str:
+    """Explicit ?format= wins, otherwise pick from the Accept header"""
+    if format:
+        return format
+    accept = request.headers.get("accept","")
+    if ARROW_MEDIA_TYPE in accept:
+        return "arrow"
+    if "text/csv" in accept:
+        return "csv"
+    return "records"
+
+
 @router.get("/historical/{symbol}")
 async def get_historical(
         request: Request,
         symbol: str,
-        days: int = Query(30,ge=1,le=365,description="Number of days of historical data"),
-        interval: str = Query("1d",description="Data interval (1d, 1wk, 1mo)")
+        days: int = Query(30,ge=1,le=36500,description="Number of days of historical data, ending now"),
+        start: Optional[datetime] = Query(None,description="Inclusive start time, overrides days"),
+        end: Optional[datetime] = Query(None,description="Exclusive end time (default now)"),
+        interval: str = Query("1d",description="Data interval (1d, 1wk, 1mo)"),
+        format: Optional[str] = Query(None,pattern="^(records|columns|csv|arrow)$",description="records (default), columns, csv or arrow; also negotiated from Accept"),
+        compression: Optional[str] = Query(None,pattern="^gzip$",description="Compress the response body")
 ):
-    """Get historical data for a symbol"""
+    """
+    Get historical data for a symbol
+    The body is streamed in chunks so large ranges are never converted to
+    Python objects all at once. A range without bars answers in the same
+    format: no records or column values, a header-only CSV or a
+    schema-only Arrow stream.
+    """
     data_aggregator = request.app.state.data_aggregator
 
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
+    end_date = end or datetime.now()
+    start_date = start or end_date - timedelta(days=days)
+    if (start_date.tzinfo is None) != (end_date.tzinfo is None):
+        # Naive times are local, as everywhere else in the data layer
+        start_date,end_date = start_date.astimezone(),end_date.astimezone()
+    if start_date >= end_date:
+        raise HTTPException(status_code=400,detail="start must be before end")
+    output_format = _negotiate_format(request,format)
+    if output_format == "arrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=406,detail="Arrow output requires pyarrow")
 
     df = await data_aggregator.get_historical(
         symbol.upper(),
@@ -84,24 +215,37 @@ async def get_historical(
         interval
     )
 
-    if df.empty:
-        return {
-            "symbol": symbol,
-            "data": [],
-            "message": "No data available"
-        }
-
-    # Convert DataFrame to dict
-    data = df.reset_index().to_dict(orient='records')
-
-    return {
+    envelope = {
         "symbol": symbol,
         "start_date": start_date.isoformat(),
         "end_date": end_date.isoformat(),
         "interval": interval,
-        "count": len(data),
-        "data": data
+        "count": len(df),
     }
+    if df.empty:
+        df = _empty_bars(df)
+        envelope["message"] = "No data available"
+
+    if output_format == "records":
+        body = iter_records_json(df,envelope)
+    elif output_format == "columns":
+        body = iter_columnar_json(df,envelope)
+    elif output_format == "csv":
+        body = iter_csv(df)
+    else:
+        body = iter_arrow_ipc(df)
+
+    # The format may come from Accept, so caches must key on it
+    headers = {"Vary": "Accept"}
+    if compression == "gzip":
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        body,
+        media_type=HISTORICAL_MEDIA_TYPES[output_format],
+        headers=headers
+    )
 
 
 @router.get("/instruments")
@@ -116,13 +260,65 @@ async def get_instruments(request: Request):
 
 
 @router.get("/providers")
-async def check_providers(request: Request):
-    """Check status of all data providers"""
+async def check_providers(request: Request,probe: bool = False):
+    """
+    Status of all data providers from their tracked health
+    probe=true additionally sends each provider a live request
+    """
     data_aggregator = request.app.state.data_aggregator
 
-    provider_status = await data_aggregator.check_providers()
+    if probe:
+        await data_aggregator.probe_providers()
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "providers": data_aggregator.get_provider_health(),
+        "rate_limits": data_aggregator.get_rate_limit_stats()
+    }
+
+
+@router.get("/features")
+async def get_features(
+        request: Request,
+        symbols: Optional[str] = Query(None,description="Comma-separated list of symbols")
+):
+    """
+    Get the latest technical features (returns, volatility, RSI, MACD,
+    Bollinger bands, ATR, z-score) for watchlist symbols
+    """
+    feature_service = request.app.state.feature_service
+
+    if not feature_service.ready:
+        raise HTTPException(status_code=503,detail="Features are still loading")
+
+    symbol_list = [s.strip().upper() for s in symbols.split(",")] if symbols else None
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "status": feature_service.status(),
+        "features": feature_service.get_features(symbol_list)
+    }
+
+
+@router.get("/snapshot")
+async def get_snapshot_status(request: Request):
+    """Get background watchlist refresher status"""
+    snapshot_service = request.app.state.snapshot_service
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "snapshot": snapshot_service.status(),
+        "worker": request.app.state.worker_coordinator.status(),
+        "streaming": request.app.state.quote_broadcaster.stats()
+    }
+
+
+@router.get("/cache")
+async def get_cache_stats(request: Request):
+    """Get quote cache hit/miss counters"""
+    data_aggregator = request.app.state.data_aggregator
 
     return {
         "timestamp": datetime.now().isoformat(),
-        "providers": provider_status
+        "cache": data_aggregator.get_cache_stats()
     }
\ No newline at end of file
@@ -0,0 +1,67 @@
+from fastapi import APIRouter,Request,Query,HTTPException
+from typing import Optional
+from datetime import datetime
+
+router = APIRouter()
+
+
+def _ready_service(request: Request):
+    inference_service = request.app.state.inference_service
+    if not inference_service.available:
+        raise HTTPException(status_code=503,detail="No model checkpoint available")
+    if not inference_service.ready:
+        raise HTTPException(status_code=503,detail="Model is still loading")
+    return inference_service
+
+
+@router.get("/predictions")
+async def get_predictions(
+        request: Request,
+        symbols: Optional[str] = Query(None,description="Comma-separated list of symbols")
+):
+    """
+    Get model scores for watchlist symbols, as computed after the latest
+    snapshot refresh
+    """
+    inference_service = _ready_service(request)
+    scores = inference_service.scores
+    if not scores and request.app.state.feature_service.ready:
+        scores = await inference_service.score_watchlist()
+
+    if symbols:
+        symbol_list = [s.strip().upper() for s in symbols.split(",")]
+        scores = {symbol: scores[symbol] for symbol in symbol_list if symbol in scores}
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "model": inference_service.status(),
+        "predictions": scores
+    }
+
+
+@router.get("/predictions/{symbol}")
+async def get_prediction(request: Request,symbol: str):
+    """Score one symbol on its current feature window"""
+    inference_service = _ready_service(request)
+    if not request.app.state.feature_service.ready:
+        raise HTTPException(status_code=503,detail="Features are still loading")
+
+    symbol = symbol.upper()
+    score = await inference_service.predict_symbol(symbol)
+    if score is None:
+        raise HTTPException(status_code=404,detail=f"No complete feature window for {symbol}")
+
+    return {
+        "symbol": symbol,
+        "timestamp": datetime.now().isoformat(),
+        "prediction": score
+    }
+
+
+@router.get("/models")
+async def get_model_status(request: Request):
+    """Get the loaded model, backend and batching stats"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "model": request.app.state.inference_service.status()
+    }
@@ -0,0 +1,125 @@
+from fastapi import APIRouter,Request,Query,HTTPException
+from typing import Optional
+from datetime import datetime
+from app.data.storage.database import TABLES
+from app.schemas.order import OrderBatchRequest,OrderRequest
+
+router = APIRouter()
+
+
+def _paper_book(request: Request):
+    """The simulator, unless the paper book lives in another worker process"""
+    execution_simulator = request.app.state.execution_simulator
+    if execution_simulator.locked_out:
+        raise HTTPException(
+            status_code=503,
+            detail="Paper trading runs in another worker process; run the server with a single worker to trade"
+        )
+    return execution_simulator
+
+
+def _running_simulator(request: Request):
+    execution_simulator = _paper_book(request)
+    if not execution_simulator.running:
+        raise HTTPException(status_code=503,detail="Paper trading is disabled")
+    return execution_simulator
+
+
+@router.get("/risk")
+async def get_risk(request: Request):
+    """Get positions, exposure, P&L, limit breaches and recent risk events"""
+    # Positions come from this worker's fills
+    _paper_book(request)
+    risk_engine = request.app.state.risk_engine
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "risk": risk_engine.status(),
+        "positions": risk_engine.positions(),
+        "events": list(risk_engine.events)
+    }
+
+
+@router.post("/orders")
+async def submit_order(request: Request,order: OrderRequest):
+    """Submit a paper order; returns once it is filled, resting or rejected"""
+    execution_simulator = _running_simulator(request)
+    submitted = execution_simulator.submit(
+        order.symbol,order.quantity,order.order_type,order.limit_price
+    )
+    await submitted.done
+    return submitted.to_dict()
+
+
+@router.post("/orders/batch")
+async def submit_orders(request: Request,batch: OrderBatchRequest):
+    """Submit many paper orders at once, e.g. a rebalance"""
+    execution_simulator = _running_simulator(request)
+    submitted = await execution_simulator.submit_many([order.model_dump() for order in batch.orders])
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "orders": [order.to_dict() for order in submitted]
+    }
+
+
+@router.get("/orders")
+async def get_orders(
+        request: Request,
+        status: Optional[str] = Query(None,description="new, open, filled, cancelled or rejected"),
+        limit: int = Query(100,ge=1,le=10000)
+):
+    """Get recent paper orders, newest first"""
+    execution_simulator = _paper_book(request)
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "orders": execution_simulator.list_orders(status,limit)
+    }
+
+
+@router.delete("/orders/{order_id}")
+async def cancel_order(request: Request,order_id: int):
+    """Cancel a working paper order"""
+    order = _paper_book(request).cancel(order_id)
+    if order is None:
+        raise HTTPException(status_code=404,detail=f"Unknown order {order_id}")
+    return order.to_dict()
+
+
+@router.get("/execution")
+async def get_execution_metrics(request: Request):
+    """Get order counts, fill latency and throughput of the paper trading simulator"""
+    execution_simulator = request.app.state.execution_simulator
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "running": execution_simulator.running,
+        "locked_out": execution_simulator.locked_out,
+        "metrics": execution_simulator.metrics()
+    }
+
+
+@router.get("/history/{table}")
+async def get_history(
+        request: Request,
+        table: str,
+        symbol: Optional[str] = Query(None),
+        start: Optional[datetime] = Query(None,description="Inclusive start time"),
+        end: Optional[datetime] = Query(None,description="Exclusive end time"),
+        limit: int = Query(1000,ge=1,le=100000)
+):
+    """Get persisted quotes, orders, fills or positions in a time range, newest first"""
+    database = request.app.state.database
+    if table not in TABLES:
+        raise HTTPException(status_code=404,detail=f"Unknown table {table}")
+    if not database.ready:
+        raise HTTPException(status_code=503,detail="Audit database is not available")
+
+    rows = await database.query(table,symbol.upper() if symbol else None,start,end,limit)
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "table": table,
+        "rows": rows,
+        "storage": database.status()
+    }
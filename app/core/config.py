@@ -100,6 +100,58 @@ class ConfigManager:
         providers = self.yaml_config.get('data',{}).get('providers',[])
         return [p for p in providers if p.get('enabled',False)]
 
+    def get_provider_config(self,name: str) -> dict:
+        """Get configuration entry for a data provider by name"""
+        providers = self.yaml_config.get('data',{}).get('providers',[])
+        for provider in providers:
+            if provider.get('name') == name:
+                return provider
+        return {}
+
+    def get_rate_limit_config(self) -> dict:
+        """Get shared provider rate limiter settings"""
+        return self.yaml_config.get('data',{}).get('rate_limits',{}) or {}
+
+    def get_cache_config(self) -> dict:
+        """Get quote cache settings"""
+        return self.yaml_config.get('data',{}).get('cache',{}) or {}
+
+    def get_shared_config(self) -> dict:
+        """Get cross-worker cache backend and poller election settings"""
+        return self.yaml_config.get('data',{}).get('shared',{}) or {}
+
+    def get_storage_config(self) -> dict:
+        """Get local historical data store settings"""
+        return self.yaml_config.get('data',{}).get('storage',{}) or {}
+
+    def get_fanout_config(self) -> dict:
+        """Get multi-symbol quote fan-out settings"""
+        return self.yaml_config.get('data',{}).get('fanout',{}) or {}
+
+    def get_health_config(self) -> dict:
+        """Get provider health tracking and circuit breaker settings"""
+        return self.yaml_config.get('data',{}).get('health',{}) or {}
+
+    def get_features_config(self) -> dict:
+        """Get technical feature engine settings"""
+        return self.yaml_config.get('data',{}).get('features',{}) or {}
+
+    def get_trading_config(self) -> dict:
+        """Get trading, risk management and execution settings"""
+        return self.yaml_config.get('trading',{}) or {}
+
+    def get_portfolio_config(self) -> dict:
+        """Get portfolio optimization and rebalancing settings"""
+        return self.yaml_config.get('portfolio',{}) or {}
+
+    def get_database_config(self) -> dict:
+        """Get audit database write-behind and pool settings"""
+        return self.yaml_config.get('database',{}) or {}
+
+    def get_models_config(self) -> dict:
+        """Get model training and PyTorch runtime settings"""
+        return self.yaml_config.get('models',{}) or {}
+
 
 # Singleton instance
 config_manager = ConfigManager()
@@ -0,0 +1,250 @@
+import asyncio
+import re
+import numpy as np
+from typing import List,Dict,Optional,Tuple
+from datetime import datetime,timedelta
+from app.data.processors.features import FEATURES,FeatureEngine,PricePanel
+from app.data.providers.rate_limiter import Priority,priority_scope
+
+INTERVAL_SECONDS = {'m': 60,'h': 3600,'d': 86400,'wk': 604800}
+
+
+class FeatureService:
+    """
+    Keeps watchlist features current from stored history and live quotes
+
+    load() computes the features over the historical bars once. After that
+    every snapshot refresh updates the forming bar incrementally
+    (commit=False), and the bar is committed when the first refresh of the
+    next bar arrives, so history is never recomputed. Bars follow the
+    quotes' own bar times rather than the clock, so refreshes over
+    weekends, holidays and closed hours do not add flat bars.
+
+    With history > 0 the features of the last `history` closed bars are
+    kept in a ring buffer, so model inputs can be read as windows without
+    recomputation.
+    """
+
+    def __init__(
+            self,
+            data_aggregator,
+            snapshot_service,
+            symbols: List[str],
+            interval: str = "1d",
+            lookback_days: int = 365,
+            history: int = 0,
+            **engine_params
+    ):
+        self.data_aggregator = data_aggregator
+        self.snapshot_service = snapshot_service
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.lookback_days = lookback_days
+        self.history = history
+        self.engine_params = engine_params
+        self.engine: Optional[FeatureEngine] = None
+        self.loaded_at: Optional[datetime] = None
+        self.updated_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._bar_key: Optional[int] = None
+        # Bar of the last historical bar loaded, already in the features
+        self._closed_key: Optional[int] = None
+        self._bar_close: Optional[np.ndarray] = None
+        self._bar_high: Optional[np.ndarray] = None
+        self._bar_low: Optional[np.ndarray] = None
+        # history x N x F features of closed bars, oldest overwritten first
+        self._history: Optional[np.ndarray] = None
+        self._history_bars = 0
+
+        match = re.fullmatch(r'(\d+)(m|h|d|wk|mo)',interval)
+        if match is None:
+            raise ValueError(f"Unsupported interval: {interval}")
+        self._interval_count = int(match.group(1))
+        self._interval_unit = match.group(2)
+
+    @property
+    def ready(self) -> bool:
+        return self.engine is not None
+
+    async def start(self):
+        """Load the history in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._load_logged())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _load_logged(self):
+        try:
+            await self.load()
+        except Exception as e:
+            print(f"Feature history load failed: {e}")
+
+    async def load(self):
+        """Compute features over the lookback history, excluding the forming bar"""
+        end = datetime.now()
+        start = end - timedelta(days=self.lookback_days)
+        with priority_scope(Priority.BACKFILL):
+            results = await asyncio.gather(
+                *(self.data_aggregator.get_historical(symbol,start,end,self.interval)
+                  for symbol in self.symbols),
+                return_exceptions=True
+            )
+
+        frames = {}
+        for symbol,result in zip(self.symbols,results):
+            if isinstance(result,Exception):
+                print(f"No feature history for {symbol}: {result}")
+            else:
+                frames[symbol] = result
+
+        panel = PricePanel.from_frames(frames)
+        # The bar still forming is rebuilt from live quotes
+        current = self._key(end)
+        closed = np.array([self._key(ts) < current for ts in panel.index],dtype=bool)
+        if len(panel) and not closed.all():
+            panel = PricePanel(
+                panel.index[closed],panel.symbols,
+                panel.close[closed],panel.high[closed],panel.low[closed]
+            )
+
+        engine = FeatureEngine(panel.symbols,**self.engine_params)
+        features = await asyncio.to_thread(engine.compute,panel)
+        if self.history:
+            self._history = np.full((self.history,len(panel.symbols),len(FEATURES)),np.nan)
+            self._history_bars = 0
+            for bar in range(max(0,len(panel) - self.history),len(panel)):
+                self._push_history({name: values[bar] for name,values in features.items()})
+        self.engine = engine
+        self._bar_key = None
+        self._closed_key = self._key(panel.index[-1]) if len(panel) else None
+        self.loaded_at = datetime.now()
+        print(f"Computed features for {len(panel.symbols)} symbols over {len(panel)} bars")
+
+    def _key(self,moment: datetime) -> int:
+        """Bar number a moment falls into"""
+        if self._interval_unit == 'mo':
+            return (moment.year * 12 + moment.month - 1) // self._interval_count
+        seconds = INTERVAL_SECONDS[self._interval_unit] * self._interval_count
+        if seconds >= 86400:
+            # Calendar days, so daily bars follow the date rather than UTC
+            return (moment.date().toordinal() - 1) // (seconds // 86400)
+        return int(moment.timestamp() // seconds)
+
+    def on_refresh(self,deltas: Dict[str,Dict]):
+        """Snapshot listener updating the forming bar from the latest quotes"""
+        engine = self.engine
+        if engine is None:
+            return
+
+        quotes = [self.snapshot_service.quotes.get(symbol) for symbol in engine.symbols]
+        prices = np.array(
+            [quote.price if quote is not None and quote.price > 0 else np.nan for quote in quotes]
+        )
+        moments = [
+            quote.timestamp for quote in quotes
+            if quote is not None and quote.price > 0 and quote.timestamp is not None
+        ]
+        if not moments:
+            return
+        # The newest bar any quote is in; quotes of an older bar never reopen it
+        key = max(self._key(moment) for moment in moments)
+        if self._closed_key is not None and key <= self._closed_key:
+            return
+        if self._bar_key is not None and key < self._bar_key:
+            key = self._bar_key
+
+        if self._bar_key is not None and key != self._bar_key:
+            # The previous bar has closed at its last prices
+            committed = engine.update(self._bar_close,self._bar_high,self._bar_low)
+            self._push_history(committed)
+            self._bar_key = None
+
+        if self._bar_key is None:
+            self._bar_key = key
+            self._bar_close = prices
+            self._bar_high = prices.copy()
+            self._bar_low = prices.copy()
+        else:
+            self._bar_close = np.where(np.isnan(prices),self._bar_close,prices)
+            self._bar_high = np.fmax(self._bar_high,prices)
+            self._bar_low = np.fmin(self._bar_low,prices)
+
+        if self._interval_unit == 'd' and self._interval_count == 1:
+            # Daily quotes carry the session high and low
+            highs = np.array([quote.high if quote is not None and quote.high > 0 else np.nan for quote in quotes])
+            lows = np.array([quote.low if quote is not None and quote.low > 0 else np.nan for quote in quotes])
+            self._bar_high = np.fmax(self._bar_high,highs)
+            self._bar_low = np.fmin(self._bar_low,lows)
+
+        engine.update(self._bar_close,self._bar_high,self._bar_low,commit=False)
+        self.updated_at = datetime.now()
+
+    def _push_history(self,features: Dict[str,np.ndarray]):
+        if self._history is None:
+            return
+        row = self._history[self._history_bars % self.history]
+        for position,name in enumerate(FEATURES):
+            row[:,position] = features[name]
+        self._history_bars += 1
+
+    def get_windows(
+            self,
+            length: int,
+            features: Optional[List[str]] = None,
+            symbols: Optional[List[str]] = None
+    ) -> Tuple[List[str],np.ndarray]:
+        """
+        Feature windows of the last `length` bars, the forming bar included
+        once live quotes have arrived, as (symbols, B x length x F)
+        Symbols without a complete window are left out
+        """
+        features = features or FEATURES
+        engine = self.engine
+        if engine is None or self._history is None:
+            return [],np.empty((0,length,len(features)))
+        if length > self.history:
+            raise ValueError(f"Window of {length} bars exceeds the {self.history} kept")
+
+        forming = self._bar_key is not None
+        closed = length - 1 if forming else length
+        bars = np.arange(self._history_bars - closed,self._history_bars) % self.history
+        columns = [FEATURES.index(name) for name in features]
+        windows = self._history[bars][:,:,columns]
+        if forming:
+            latest = np.stack([engine.latest[name] for name in features],axis=-1)
+            windows = np.concatenate([windows,latest[None]])
+
+        # time x N x F -> N x time x F
+        windows = windows.transpose(1,0,2)
+        positions = {symbol: i for i,symbol in enumerate(engine.symbols)}
+        selected = [positions[s] for s in (symbols or engine.symbols) if s in positions]
+        windows = windows[selected]
+        complete = ~np.isnan(windows).any(axis=(1,2))
+        names = [engine.symbols[i] for i,keep in zip(selected,complete) if keep]
+        return names,np.ascontiguousarray(windows[complete])
+
+    def get_features(self,symbols: Optional[List[str]] = None) -> Dict[str,Dict]:
+        """Latest features as {symbol: {feature: value}}"""
+        if self.engine is None:
+            return {}
+        features = self.engine.latest_by_symbol()
+        if symbols is None:
+            return features
+        return {symbol: features[symbol] for symbol in symbols if symbol in features}
+
+    def status(self) -> Dict:
+        return {
+            'ready': self.ready,
+            'symbols': len(self.engine.symbols) if self.engine else 0,
+            'bars': self.engine.bars if self.engine else 0,
+            'interval': self.interval,
+            'loaded_at': self.loaded_at.isoformat() if self.loaded_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
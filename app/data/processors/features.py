@@ -0,0 +1,330 @@
+import numpy as np
+from typing import TYPE_CHECKING,Dict,List,Optional,Sequence
+from app.data.processors.indicators import (
+    ewm,
+    ewm_step,
+    ffill,
+    first_valid,
+    mean_std,
+    rolling_sums,
+    rsi_from_averages,
+    true_range,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+FEATURES = (
+    'returns','volatility','rsi','macd','macd_signal','macd_hist',
+    'bb_upper','bb_middle','bb_lower','atr','zscore',
+)
+
+
+class PricePanel:
+    """
+    Aligned T x N close/high/low arrays for a set of symbols
+    Rows are bar timestamps (the union across symbols), columns are symbols
+    """
+
+    def __init__(
+            self,
+            index,
+            symbols: List[str],
+            close: np.ndarray,
+            high: Optional[np.ndarray] = None,
+            low: Optional[np.ndarray] = None
+    ):
+        self.index = index
+        self.symbols = list(symbols)
+        self.close = close
+        self.high = high if high is not None else close
+        self.low = low if low is not None else close
+
+    @classmethod
+    def from_frames(cls,frames: Dict[str,"pd.DataFrame"]) -> "PricePanel":
+        """Build a panel from get_historical frames keyed by symbol"""
+        import pandas as pd
+
+        symbols = [symbol for symbol,df in frames.items() if not df.empty]
+        if not symbols:
+            return cls(pd.DatetimeIndex([]),[],np.empty((0,0)))
+
+        index = frames[symbols[0]].index
+        for symbol in symbols[1:]:
+            index = index.union(frames[symbol].index)
+
+        def column(name: str) -> np.ndarray:
+            return np.column_stack([
+                frames[symbol][name].reindex(index).to_numpy(dtype=np.float64)
+                for symbol in symbols
+            ])
+
+        return cls(index,symbols,column('close'),column('high'),column('low'))
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+
+class FeatureEngine:
+    """
+    Technical features over a panel of symbols, in batch or bar by bar
+
+    compute() evaluates every feature over the whole T x N panel at once:
+    rolling windows come from cumulative sums and the exponential averages
+    (RSI, MACD, ATR) step through time vectorized across symbols. It also
+    leaves the engine holding the rolling state at the last bar, so update()
+    can then add one bar in O(1) per symbol: ring buffers keep the window
+    sums and the exponential averages carry over. update(commit=False)
+    evaluates a forming bar without advancing the state, for live ticks.
+
+    Missing prices are forward-filled; a symbol's features stay NaN until
+    it has enough history for each window.
+    """
+
+    def __init__(
+            self,
+            symbols: Sequence[str],
+            vol_window: int = 20,
+            rsi_period: int = 14,
+            macd_fast: int = 12,
+            macd_slow: int = 26,
+            macd_signal: int = 9,
+            bb_window: int = 20,
+            bb_std: float = 2.0,
+            atr_period: int = 14
+    ):
+        self.symbols = list(symbols)
+        self.vol_window = vol_window
+        self.rsi_period = rsi_period
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.bb_window = bb_window
+        self.bb_std = bb_std
+        self.atr_period = atr_period
+        self.reset()
+
+    def reset(self):
+        """Drop all rolling state"""
+        n = len(self.symbols)
+        nan = lambda: np.full(n,np.nan)
+        self.bars = 0
+        self.last_close = nan()
+        self.close_count = np.zeros(n,dtype=np.int64)
+        # Ring buffers for the rolling windows
+        self.return_ring = np.full((self.vol_window,n),np.nan)
+        self.close_ring = np.full((self.bb_window,n),np.nan)
+        self.close_shift = nan()
+        self.return_sums = np.zeros((3,n))
+        self.close_sums = np.zeros((3,n))
+        # Exponential averages
+        self.avg_gain = nan()
+        self.avg_loss = nan()
+        self.ema_fast = nan()
+        self.ema_slow = nan()
+        self.ema_signal = nan()
+        self.atr_state = nan()
+        self.latest: Dict[str,np.ndarray] = {name: nan() for name in FEATURES}
+
+    # Batch
+
+    def compute(self,panel: PricePanel) -> Dict[str,np.ndarray]:
+        """Compute all features over a panel and keep the state at its last bar"""
+        if panel.symbols != self.symbols:
+            raise ValueError("Panel symbols do not match the engine's symbols")
+
+        self.reset()
+        close = ffill(panel.close)
+        high = np.where(np.isnan(panel.high),close,panel.high)
+        low = np.where(np.isnan(panel.low),close,panel.low)
+        count = len(close)
+        if count == 0:
+            return {name: np.empty((0,len(self.symbols))) for name in FEATURES}
+
+        prev_close = np.vstack([np.full((1,len(self.symbols)),np.nan),close[:-1]])
+        close_count = np.cumsum(~np.isnan(close),axis=0)
+
+        returns = close / prev_close - 1.0
+        zero = np.zeros(len(self.symbols))
+        sums,squares,counts = rolling_sums(returns,self.vol_window,zero)
+        _,volatility = mean_std(sums,squares,counts,self.vol_window,zero)
+
+        diff = close - prev_close
+        avg_gain,self.avg_gain = ewm(np.maximum(diff,0.0),1.0 / self.rsi_period)
+        avg_loss,self.avg_loss = ewm(np.maximum(-diff,0.0),1.0 / self.rsi_period)
+        rsi = np.where(close_count > self.rsi_period,rsi_from_averages(avg_gain,avg_loss),np.nan)
+
+        ema_fast,self.ema_fast = ewm(close,2.0 / (self.macd_fast + 1))
+        ema_slow,self.ema_slow = ewm(close,2.0 / (self.macd_slow + 1))
+        macd_raw = ema_fast - ema_slow
+        signal_raw,self.ema_signal = ewm(macd_raw,2.0 / (self.macd_signal + 1))
+        macd,macd_signal,macd_hist = self._mask_macd(close_count,macd_raw,signal_raw)
+
+        self.close_shift = first_valid(close)
+        sums,squares,counts = rolling_sums(close,self.bb_window,self.close_shift)
+        middle,std = mean_std(sums,squares,counts,self.bb_window,self.close_shift)
+
+        ranges = true_range(high,low,prev_close)
+        atr_raw,self.atr_state = ewm(ranges,1.0 / self.atr_period)
+        atr = np.where(close_count >= self.atr_period,atr_raw,np.nan)
+
+        features = {
+            'returns': returns,
+            'volatility': volatility,
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd_hist,
+            'atr': atr,
+            **self._bands(close,middle,std),
+        }
+
+        # Carry the last window of each rolling input into the ring buffers
+        self.bars = count
+        self.last_close = close[-1].copy()
+        self.close_count = close_count[-1].copy()
+        self._load_ring(self.return_ring,returns)
+        self._load_ring(self.close_ring,close)
+        self.return_sums = self._ring_sums(self.return_ring,zero)
+        self.close_sums = self._ring_sums(self.close_ring,self.close_shift)
+        self.latest = {name: values[-1].copy() for name,values in features.items()}
+        return features
+
+    @staticmethod
+    def _load_ring(ring: np.ndarray,values: np.ndarray):
+        window = len(ring)
+        rows = np.arange(max(0,len(values) - window),len(values))
+        ring[rows % window] = values[rows]
+
+    @staticmethod
+    def _ring_sums(ring: np.ndarray,shift: np.ndarray) -> np.ndarray:
+        """[sum, sum of squares, valid count] of the shifted ring contents"""
+        valid = ~np.isnan(ring)
+        centered = np.where(valid,ring - shift,0.0)
+        return np.array([
+            centered.sum(axis=0),
+            (centered * centered).sum(axis=0),
+            valid.sum(axis=0),
+        ])
+
+    def _mask_macd(self,close_count,macd_raw,signal_raw):
+        """MACD is valid after macd_slow bars, its signal after macd_signal more"""
+        ready = close_count >= self.macd_slow
+        signal_ready = close_count >= self.macd_slow + self.macd_signal - 1
+        macd = np.where(ready,macd_raw,np.nan)
+        signal = np.where(signal_ready,signal_raw,np.nan)
+        return macd,signal,macd - signal
+
+    def _bands(self,close,middle,std) -> Dict[str,np.ndarray]:
+        with np.errstate(invalid='ignore',divide='ignore'):
+            zscore = np.where(std > 0,(close - middle) / std,0.0)
+        return {
+            'bb_upper': middle + self.bb_std * std,
+            'bb_middle': middle,
+            'bb_lower': middle - self.bb_std * std,
+            'zscore': np.where(np.isnan(std),np.nan,zscore),
+        }
+
+    # Incremental
+
+    def update(
+            self,
+            close: np.ndarray,
+            high: Optional[np.ndarray] = None,
+            low: Optional[np.ndarray] = None,
+            commit: bool = True
+    ) -> Dict[str,np.ndarray]:
+        """
+        Add one bar (N-vectors aligned with symbols) and return its features
+        commit=False evaluates the bar without advancing the rolling state
+        """
+        close = np.where(np.isnan(close),self.last_close,close)
+        high = close if high is None else np.where(np.isnan(high),close,high)
+        low = close if low is None else np.where(np.isnan(low),close,low)
+        prev_close = self.last_close
+        close_count = self.close_count + ~np.isnan(close)
+
+        returns = close / prev_close - 1.0
+        zero = np.zeros(len(self.symbols))
+        return_sums = self._push(self.return_ring,self.return_sums,returns,zero)
+        _,volatility = mean_std(*return_sums,self.vol_window,zero)
+
+        diff = close - prev_close
+        avg_gain = ewm_step(self.avg_gain,np.maximum(diff,0.0),1.0 / self.rsi_period)
+        avg_loss = ewm_step(self.avg_loss,np.maximum(-diff,0.0),1.0 / self.rsi_period)
+        rsi = np.where(close_count > self.rsi_period,rsi_from_averages(avg_gain,avg_loss),np.nan)
+
+        ema_fast = ewm_step(self.ema_fast,close,2.0 / (self.macd_fast + 1))
+        ema_slow = ewm_step(self.ema_slow,close,2.0 / (self.macd_slow + 1))
+        ema_signal = ewm_step(self.ema_signal,ema_fast - ema_slow,2.0 / (self.macd_signal + 1))
+        macd,macd_signal,macd_hist = self._mask_macd(close_count,ema_fast - ema_slow,ema_signal)
+
+        close_shift = np.where(np.isnan(self.close_shift),close,self.close_shift)
+        close_sums = self._push(self.close_ring,self.close_sums,close,close_shift)
+        middle,std = mean_std(*close_sums,self.bb_window,close_shift)
+
+        atr_state = ewm_step(self.atr_state,true_range(high,low,prev_close),1.0 / self.atr_period)
+        atr = np.where(close_count >= self.atr_period,atr_state,np.nan)
+
+        features = {
+            'returns': returns,
+            'volatility': volatility,
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd_hist,
+            'atr': atr,
+            **self._bands(close,middle,std),
+        }
+
+        if commit:
+            self.return_ring[self.bars % self.vol_window] = returns
+            self.close_ring[self.bars % self.bb_window] = close
+            self.bars += 1
+            self.last_close = close
+            self.close_count = close_count
+            self.return_sums = return_sums
+            self.close_sums = close_sums
+            self.close_shift = close_shift
+            self.avg_gain = avg_gain
+            self.avg_loss = avg_loss
+            self.ema_fast = ema_fast
+            self.ema_slow = ema_slow
+            self.ema_signal = ema_signal
+            self.atr_state = atr_state
+            # Re-sum once per lap of each ring so rounding does not accumulate
+            if self.bars % self.vol_window == 0:
+                self.return_sums = self._ring_sums(self.return_ring,zero)
+            if self.bars % self.bb_window == 0:
+                self.close_sums = self._ring_sums(self.close_ring,self.close_shift)
+        self.latest = features
+        return features
+
+    def _push(
+            self,
+            ring: np.ndarray,
+            sums: np.ndarray,
+            values: np.ndarray,
+            shift: np.ndarray
+    ) -> np.ndarray:
+        """Window sums after replacing the oldest ring entry with values"""
+        oldest = ring[self.bars % len(ring)]
+        old_valid = ~np.isnan(oldest)
+        new_valid = ~np.isnan(values)
+        old = np.where(old_valid,oldest - shift,0.0)
+        new = np.where(new_valid,values - shift,0.0)
+        return np.array([
+            sums[0] - old + new,
+            sums[1] - old * old + new * new,
+            sums[2] - old_valid + new_valid,
+        ])
+
+    def latest_by_symbol(self) -> Dict[str,Dict[str,Optional[float]]]:
+        """Most recent features as {symbol: {feature: value}}, NaN as None"""
+        result = {}
+        for position,symbol in enumerate(self.symbols):
+            result[symbol] = {
+                name: (None if np.isnan(values[position]) else float(values[position]))
+                for name,values in self.latest.items()
+            }
+        return result
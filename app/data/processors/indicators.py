@@ -0,0 +1,98 @@
+import numpy as np
+from typing import Tuple
+
+
+def ffill(values: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs down each column of a T x N array; leading NaNs stay"""
+    mask = np.isnan(values)
+    rows = np.where(mask,0,np.arange(len(values))[:,None])
+    np.maximum.accumulate(rows,axis=0,out=rows)
+    return values[rows,np.arange(values.shape[1])]
+
+
+def first_valid(values: np.ndarray) -> np.ndarray:
+    """First non-NaN value of each column (NaN for empty columns)"""
+    valid = ~np.isnan(values)
+    rows = valid.argmax(axis=0)
+    first = values[rows,np.arange(values.shape[1])]
+    first[~valid.any(axis=0)] = np.nan
+    return first
+
+
+def rolling_sums(
+        values: np.ndarray,
+        window: int,
+        shift: np.ndarray
+) -> Tuple[np.ndarray,np.ndarray,np.ndarray]:
+    """
+    Rolling sum and sum of squares of (values - shift) over window rows,
+    with the count of valid values in each window
+
+    Uses cumulative sums, so the cost is O(T x N) whatever the window.
+    Subtracting a per-column shift keeps the sums small enough that the
+    variance does not lose precision to cancellation.
+    """
+    valid = ~np.isnan(values)
+    centered = np.where(valid,values - shift,0.0)
+    sums = np.cumsum(centered,axis=0)
+    squares = np.cumsum(centered * centered,axis=0)
+    counts = np.cumsum(valid,axis=0)
+    if window < len(values):
+        sums[window:] -= sums[:-window].copy()
+        squares[window:] -= squares[:-window].copy()
+        counts[window:] -= counts[:-window].copy()
+    return sums,squares,counts
+
+
+def mean_std(
+        sums: np.ndarray,
+        squares: np.ndarray,
+        counts: np.ndarray,
+        window: int,
+        shift: np.ndarray
+) -> Tuple[np.ndarray,np.ndarray]:
+    """Window mean and sample std from shifted sums; NaN until the window is full"""
+    full = counts >= window
+    mean = np.where(full,shift + sums / window,np.nan)
+    variance = (squares - sums * sums / window) / (window - 1)
+    std = np.where(full,np.sqrt(np.maximum(variance,0.0)),np.nan)
+    return mean,std
+
+
+def ewm_step(state: np.ndarray,values: np.ndarray,alpha: float) -> np.ndarray:
+    """
+    One step of an exponentially weighted mean (pandas adjust=False)
+    The mean is seeded with the first valid value; NaN values leave it as is
+    """
+    updated = np.where(np.isnan(state),values,state + alpha * (values - state))
+    return np.where(np.isnan(values),state,updated)
+
+
+def ewm(values: np.ndarray,alpha: float) -> Tuple[np.ndarray,np.ndarray]:
+    """
+    Exponentially weighted mean of each column, returning the T x N series
+    and the final state
+
+    The recursion runs over time but each step is vectorized across all
+    columns, so the cost is T NumPy operations on N-vectors.
+    """
+    out = np.empty_like(values)
+    state = np.full(values.shape[1],np.nan)
+    for t in range(len(values)):
+        state = ewm_step(state,values[t],alpha)
+        out[t] = state
+    return out,state
+
+
+def rsi_from_averages(avg_gain: np.ndarray,avg_loss: np.ndarray) -> np.ndarray:
+    """RSI from Wilder average gain/loss; 50 when there was no movement"""
+    total = avg_gain + avg_loss
+    with np.errstate(invalid='ignore',divide='ignore'):
+        return np.where(total > 0,100.0 * avg_gain / total,50.0)
+
+
+def true_range(high: np.ndarray,low: np.ndarray,prev_close: np.ndarray) -> np.ndarray:
+    """True range; the high-low range where there is no previous close"""
+    ranges = high - low
+    gaps = np.fmax(np.abs(high - prev_close),np.abs(low - prev_close))
+    return np.fmax(ranges,gaps)
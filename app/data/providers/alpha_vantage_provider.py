@@ -6,24 +6,30 @@ from datetime import datetime
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from .base import BaseDataProvider
+from .rate_limiter import RateLimitExceeded
+from app.schemas.quote import Quote
 
 
 class AlphaVantageProvider(BaseDataProvider):
-    """Alpha Vantage data provider (requires API key, 25 calls/day free tier)"""
+    """
+    Alpha Vantage data provider (requires API key, 25 calls/day free tier)
+    The call budget is enforced by the shared rate limiter (data.providers
+    rate_limit in config.yaml)
+    """
 
     def __init__(self,api_key: str):
         super().__init__(api_key)
         self.ts = TimeSeries(key=api_key,output_format='pandas')
         self.crypto = CryptoCurrencies(key=api_key,output_format='pandas')
         self.executor = ThreadPoolExecutor(max_workers=5)
-        self.call_count = 0
-        self.max_calls = 25  # Free tier limit
 
-    async def get_quote(self,symbol: str) -> Dict:
+    async def get_quote(self,symbol: str) -> Quote:
         """Get real-time quote from Alpha Vantage"""
-        if self.call_count >= self.max_calls:
-            print(f"Alpha Vantage API call limit reached ({self.max_calls})")
-            return self._empty_quote(symbol)
+        try:
+            await self.acquire_rate_limit()
+        except RateLimitExceeded as e:
+            print(f"Alpha Vantage API call limit reached: {e}")
+            return Quote.empty(symbol)
 
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(
@@ -32,11 +38,9 @@ class AlphaVantageProvider(BaseDataProvider):
             symbol
         )
 
-    def _get_quote_sync(self,symbol: str) -> Dict:
+    def _get_quote_sync(self,symbol: str) -> Quote:
         """Synchronous quote fetch"""
         try:
-            self.call_count += 1
-
             # Check if it's a crypto symbol
             if '-' in symbol and 'USD' in symbol:
                 return self._get_crypto_quote(symbol)
@@ -64,9 +68,9 @@ class AlphaVantageProvider(BaseDataProvider):
             })
         except Exception as e:
             print(f"Error fetching Alpha Vantage quote for {symbol}: {e}")
-            return self._empty_quote(symbol)
+            return Quote.empty(symbol)
 
-    def _get_crypto_quote(self,symbol: str) -> Dict:
+    def _get_crypto_quote(self,symbol: str) -> Quote:
         """Get cryptocurrency quote"""
         try:
             # Parse crypto symbol (e.g., BTC-USD -> BTC, USD)
@@ -101,28 +105,14 @@ class AlphaVantageProvider(BaseDataProvider):
             })
         except Exception as e:
             print(f"Error fetching crypto quote for {symbol}: {e}")
-            return self._empty_quote(symbol)
-
-    def _empty_quote(self,symbol: str) -> Dict:
-        """Return empty quote structure"""
-        return self.format_quote({
-            'symbol': symbol,
-            'price': 0.0,
-            'change': 0.0,
-            'change_percent': 0.0,
-            'volume': 0,
-            'timestamp': datetime.now(),
-        })
-
-    async def get_quotes(self,symbols: List[str]) -> List[Dict]:
+            return Quote.empty(symbol)
+
+    async def get_quotes(self,symbols: List[str]) -> List[Quote]:
         """Get quotes for multiple symbols"""
         quotes = []
         for symbol in symbols:
-            if self.call_count >= self.max_calls:
-                quotes.append(self._empty_quote(symbol))
-            else:
-                quote = await self.get_quote(symbol)
-                quotes.append(quote)
+            quote = await self.get_quote(symbol)
+            quotes.append(quote)
         return quotes
 
     async def get_historical(
@@ -133,8 +123,10 @@ class AlphaVantageProvider(BaseDataProvider):
             interval: str = "1d"
     ) -> pd.DataFrame:
         """Get historical data"""
-        if self.call_count >= self.max_calls:
-            print(f"Alpha Vantage API call limit reached")
+        try:
+            await self.acquire_rate_limit()
+        except RateLimitExceeded as e:
+            print(f"Alpha Vantage API call limit reached: {e}")
             return pd.DataFrame()
 
         loop = asyncio.get_event_loop()
@@ -148,8 +140,6 @@ class AlphaVantageProvider(BaseDataProvider):
     def _get_historical_sync(self,symbol: str,interval: str) -> pd.DataFrame:
         """Synchronous historical data fetch"""
         try:
-            self.call_count += 1
-
             if interval == "1d":
                 data,meta = self.ts.get_daily(symbol=symbol,outputsize='full')
             elif interval == "1wk":
@@ -174,13 +164,9 @@ class AlphaVantageProvider(BaseDataProvider):
     async def is_available(self) -> bool:
         """Check if Alpha Vantage is available"""
         try:
-            if self.call_count >= self.max_calls:
+            if self.rate_limiter is not None and self.rate_limiter.is_exhausted():
                 return False
             quote = await self.get_quote("AAPL")
             return quote['price'] > 0
         except:
-            return False
-
-    def reset_call_count(self):
-        """Reset daily call counter"""
-        self.call_count = 0
\ No newline at end of file
+            return False
\ No newline at end of file
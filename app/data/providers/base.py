@@ -2,28 +2,44 @@ from abc import ABC,abstractmethod
 from typing import Optional,List,Dict
 import pandas as pd
 from datetime import datetime
+from .rate_limiter import RateLimiter
+from app.schemas.quote import Quote
 
 
 class BaseDataProvider(ABC):
     """Abstract base class for market data providers"""
 
+    # Providers whose get_quotes fetches many symbols in one upstream call
+    supports_bulk_quotes = False
+    bulk_chunk_size = 1
+
     def __init__(self,api_key: Optional[str] = None):
         self.api_key = api_key
         self.name = self.__class__.__name__
+        # Shared budget for upstream calls, set by DataAggregator from config
+        self.rate_limiter: Optional[RateLimiter] = None
+
+    async def acquire_rate_limit(self):
+        """
+        Wait for upstream call budget at the current request priority
+        Raises RateLimitExceeded when the budget cannot serve the call
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
 
     @abstractmethod
-    async def get_quote(self,symbol: str) -> Dict:
+    async def get_quote(self,symbol: str) -> Quote:
         """
         Get real-time quote for a symbol
 
         Returns:
-            Dict with keys: symbol, price, change, change_percent, volume,
-                           timestamp, bid, ask, open, high, low, close
+            Quote with fields: symbol, price, change, change_percent, volume,
+                               timestamp, bid, ask, open, high, low, close
         """
         pass
 
     @abstractmethod
-    async def get_quotes(self,symbols: List[str]) -> List[Dict]:
+    async def get_quotes(self,symbols: List[str]) -> List[Quote]:
         """Get real-time quotes for multiple symbols"""
         pass
 
@@ -54,20 +70,6 @@ class BaseDataProvider(ABC):
         """Check if the provider is available and working"""
         pass
 
-    def format_quote(self,data: Dict) -> Dict:
+    def format_quote(self,data: Dict) -> Quote:
         """Standardize quote format across providers"""
-        return {
-            'symbol': data.get('symbol'),
-            'price': data.get('price',0.0),
-            'change': data.get('change',0.0),
-            'change_percent': data.get('change_percent',0.0),
-            'volume': data.get('volume',0),
-            'timestamp': data.get('timestamp',datetime.now()),
-            'bid': data.get('bid',0.0),
-            'ask': data.get('ask',0.0),
-            'open': data.get('open',0.0),
-            'high': data.get('high',0.0),
-            'low': data.get('low',0.0),
-            'close': data.get('close',0.0),
-            'prev_close': data.get('prev_close',0.0),
-        }
\ No newline at end of file
+        return Quote.from_dict(data)
\ No newline at end of file
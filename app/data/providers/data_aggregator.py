@@ -1,59 +1,523 @@
-from typing import List,Dict,Optional
-import pandas as pd
+from typing import TYPE_CHECKING,List,Dict,Optional,Tuple
+from collections import OrderedDict
+import asyncio
+import time
 from datetime import datetime
-from .yfinance_provider import YFinanceProvider
-from .alpha_vantage_provider import AlphaVantageProvider
+from .rate_limiter import RateLimiterRegistry,Priority,priority_scope
+from .health import ProviderHealth
 from app.core.config import config_manager
+from app.data.shared import decode_quote,encode
+from app.schemas.quote import Quote
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from app.data.storage.ohlcv_store import OHLCVStore
+
+
+class QuoteCache:
+    """
+    In-memory quote cache with TTL expiry and LRU eviction
+    Keeps hit/miss counters so upstream savings can be measured
+    """
+
+    def __init__(self,ttl: float = 300,max_size: int = 1000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str,Tuple[float,Quote]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self,symbol: str) -> Optional[Quote]:
+        """Return a fresh cached quote or None"""
+        entry = self._entries.get(symbol)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(symbol)
+        self.hits += 1
+        return entry[1]
+
+    def get_stale(self,symbol: str) -> Optional[Tuple[Quote,float]]:
+        """Return (quote, age in seconds) even if expired, without counting"""
+        entry = self._entries.get(symbol)
+        if entry is None:
+            return None
+        return entry[1],time.monotonic() - entry[0]
+
+    def set(self,symbol: str,quote: Quote,age: float = 0.0):
+        """Store a quote already age seconds old, evicting the least recently used entry when full"""
+        self._entries[symbol] = (time.monotonic() - age,quote)
+        self._entries.move_to_end(symbol)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all cached quotes"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
 
 
 class DataAggregator:
     """
     Aggregates data from multiple providers with fallback mechanism
-    Priority: YFinance (primary, free) -> Alpha Vantage (backup)
+    Providers come from data.providers in config.yaml, tried in priority
+    order (by default YFinance, then Alpha Vantage as backup)
+
+    Quotes are served from a TTL/LRU cache (data.cache in config.yaml),
+    concurrent requests for the same symbol share one upstream fetch and
+    multi-symbol requests fan out under data.fanout limits.
+    Historical bars are served from the local OHLCV store (data.storage),
+    fetching only the date ranges not stored yet.
+    Provider health is tracked from real traffic (data.health) and a
+    provider that keeps failing is skipped until its cooldown expires.
+    With a WorkerCoordinator, fetched quotes are also written to the shared
+    backend, and local cache misses are looked up there before going
+    upstream, so workers share one quote cache.
+
+    Providers and the store are created on first use, keeping yfinance,
+    alpha_vantage and pandas out of application import and startup.
     """
 
     def __init__(self):
         self.providers = []
-        self._initialize_providers()
+        self.health: Dict[str,ProviderHealth] = {}
+        self._providers_ready = False
+        self._providers_lock: Optional[asyncio.Lock] = None
+        rate_limit_config = config_manager.get_rate_limit_config()
+        self.rate_limits = RateLimiterRegistry(
+            state_file=rate_limit_config.get('state_file','data/rate_limits.json'),
+            reserve=rate_limit_config.get('low_priority_reserve',0.2),
+            max_wait=rate_limit_config.get('max_wait',30)
+        )
+
+        cache_config = config_manager.get_cache_config()
+        self.cache_enabled = cache_config.get('enabled',False)
+        self.cache = QuoteCache(
+            ttl=cache_config.get('ttl',300),
+            max_size=cache_config.get('max_size',1000)
+        )
+        self._inflight: Dict[str,asyncio.Future] = {}
+        self._batch_tasks = set()
+        self.coordinator = None
+        self._to_share: Dict[str,Quote] = {}
+        self.shared_hits = 0
+        self.upstream_fetches = 0
+        self.coalesced_requests = 0
+        self.stale_responses = 0
+
+        fanout_config = config_manager.get_fanout_config()
+        self.max_concurrency = fanout_config.get('max_concurrency',8)
+        self.quote_deadline = fanout_config.get('deadline',10)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        storage_config = config_manager.get_storage_config()
+        self.storage_enabled = storage_config.get('enabled',False)
+        self.storage_path = storage_config.get('path','data/store')
+        self._store: Optional["OHLCVStore"] = None
+        self._historical_locks: Dict[Tuple[str,str],asyncio.Lock] = {}
+
+    @property
+    def store(self) -> Optional["OHLCVStore"]:
+        """Local OHLCV store, opened on first use (None when disabled)"""
+        if self._store is None and self.storage_enabled:
+            from app.data.storage.ohlcv_store import OHLCVStore
+            self._store = OHLCVStore(self.storage_path)
+        return self._store
+
+    @store.setter
+    def store(self,store: Optional["OHLCVStore"]):
+        self._store = store
+        self.storage_enabled = store is not None
+
+    @property
+    def providers_ready(self) -> bool:
+        """Whether the providers have been initialized"""
+        return self._providers_ready
+
+    async def _ensure_providers(self):
+        """Initialize the providers once, importing their modules off the event loop"""
+        if self._providers_ready:
+            return
+        # Created lazily so it binds to the running event loop
+        if self._providers_lock is None:
+            self._providers_lock = asyncio.Lock()
+        async with self._providers_lock:
+            if not self._providers_ready:
+                await asyncio.to_thread(self._initialize_providers)
 
     def _initialize_providers(self):
-        """Initialize available data providers based on configuration"""
-        # Always add YFinance (no API key needed)
-        self.providers.append(YFinanceProvider())
-
-        # Add Alpha Vantage if API key is available
-        if config_manager.settings.alpha_vantage_api_key:
-            self.providers.append(
-                AlphaVantageProvider(config_manager.settings.alpha_vantage_api_key)
+        """Initialize the providers enabled in data.providers, in priority order"""
+        from .registry import create_provider
+
+        providers = []
+        entries = sorted(config_manager.get_data_providers(),key=lambda entry: entry.get('priority',100))
+        for entry in entries:
+            try:
+                provider = create_provider(entry,config_manager.settings)
+            except Exception as e:
+                print(f"Data provider {entry.get('name')} not initialized: {e}")
+                continue
+            if provider is None:
+                continue
+            provider.rate_limiter = self.rate_limits.for_provider(entry['name'],entry.get('rate_limit'))
+            providers.append(provider)
+
+        health_config = config_manager.get_health_config()
+        self.health = {
+            provider.name: ProviderHealth(
+                provider.name,
+                failure_threshold=health_config.get('failure_threshold',5),
+                cooldown=health_config.get('cooldown',30),
+                latency_alpha=health_config.get('latency_alpha',0.2)
             )
+            for provider in providers
+        }
+        self.providers = providers
+        self._providers_ready = True
 
         print(f"Initialized {len(self.providers)} data providers")
 
-    async def get_quote(self,symbol: str) -> Dict:
+    async def get_quote(self,symbol: str) -> Quote:
         """
-        Get quote with fallback mechanism
-        Tries providers in order until successful
+        Get quote from cache, or from the providers on a miss
+        Concurrent misses for the same symbol are coalesced into one fetch
         """
-        for provider in self.providers:
+        if self.cache_enabled:
+            cached = self.cache.get(symbol)
+            if cached is not None:
+                return cached.copy()
+
+        future = self._inflight.get(symbol)
+        if future is None:
+            future = self._start_fetch([symbol])[symbol]
+        else:
+            self.coalesced_requests += 1
+
+        # Shield so a cancelled caller does not cancel the shared fetch
+        quote = await asyncio.shield(future)
+        return quote.copy()
+
+    async def get_quotes(
+            self,
+            symbols: List[str],
+            deadline: Optional[float] = None,
+            use_cache: bool = True
+    ) -> List[Quote]:
+        """
+        Get quotes for multiple symbols concurrently
+
+        Cache misses are fetched as one batch: the primary provider is
+        queried with bounded concurrency and the symbols it fails on are
+        retried against each fallback provider as a single batch. Symbols
+        still unresolved when the deadline expires are returned as stale
+        (last cached) or empty quotes flagged with stale=True, while
+        their fetch keeps running in the background to warm the cache.
+        use_cache=False skips cache lookups (fetched quotes are still cached).
+        """
+        if deadline is None:
+            deadline = self.quote_deadline
+
+        results: Dict[str,Quote] = {}
+        pending: Dict[str,asyncio.Future] = {}
+        to_fetch = []
+
+        for symbol in dict.fromkeys(symbols):
+            if self.cache_enabled and use_cache:
+                cached = self.cache.get(symbol)
+                if cached is not None:
+                    results[symbol] = cached.copy()
+                    continue
+
+            future = self._inflight.get(symbol)
+            if future is not None:
+                self.coalesced_requests += 1
+                pending[symbol] = future
+            else:
+                to_fetch.append(symbol)
+
+        if to_fetch:
+            pending.update(self._start_fetch(to_fetch,deadline,use_shared=use_cache))
+
+        if pending:
+            done,_ = await asyncio.wait(set(pending.values()),timeout=deadline)
+            for symbol,future in pending.items():
+                if future in done:
+                    results[symbol] = future.result().copy()
+                else:
+                    results[symbol] = self._stale_quote(symbol)
+
+        return [results[symbol] for symbol in symbols]
+
+    def _start_fetch(
+            self,
+            symbols: List[str],
+            deadline: Optional[float] = None,
+            use_shared: bool = True
+    ) -> Dict[str,asyncio.Future]:
+        """Register in-flight futures for symbols and launch one batch fetch"""
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for symbol in symbols:
+            future = loop.create_future()
+            future.add_done_callback(lambda f,s=symbol: self._clear_inflight(s,f))
+            self._inflight[symbol] = future
+            futures[symbol] = future
+
+        self.upstream_fetches += len(symbols)
+        if deadline is None:
+            deadline = self.quote_deadline
+        task = asyncio.ensure_future(self._fetch_batch(symbols,futures,deadline,use_shared))
+        # Keep a reference so the event loop does not drop the running task
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+        return futures
+
+    def _clear_inflight(self,symbol: str,future: asyncio.Future):
+        """Forget a finished in-flight fetch"""
+        if self._inflight.get(symbol) is future:
+            del self._inflight[symbol]
+
+    def _resolve(self,symbol: str,future: asyncio.Future,quote: Quote):
+        """Complete an in-flight fetch and cache the quote if valid"""
+        quote.as_of = datetime.now()
+        if self.cache_enabled and quote.price > 0:
+            self.cache.set(symbol,quote)
+            if self._shared_backend() is not None:
+                self._share(symbol,quote)
+        if not future.done():
+            future.set_result(quote)
+
+    # Cache shared across workers
+
+    def _shared_backend(self):
+        return self.coordinator.backend if self.coordinator is not None else None
+
+    async def _resolve_shared(self,symbols: List[str],futures: Dict[str,asyncio.Future]) -> List[str]:
+        """Resolve symbols another worker has fetched recently; return the rest"""
+        backend = self._shared_backend()
+        if backend is None:
+            return symbols
+        try:
+            values = await backend.mget([self.coordinator.key(f"quote:{symbol}") for symbol in symbols])
+        except Exception as e:
+            print(f"Shared quote lookup failed: {e}")
+            return symbols
+
+        missing = []
+        now = datetime.now()
+        for symbol,value in zip(symbols,values):
+            if value is None:
+                missing.append(symbol)
+                continue
+            quote = decode_quote(value)
+            # Expire locally when the fetching worker's copy would
+            age = (now - quote.as_of).total_seconds() if quote.as_of else 0.0
+            self.cache.set(symbol,quote,age=max(age,0.0))
+            if not futures[symbol].done():
+                futures[symbol].set_result(quote)
+            self.shared_hits += 1
+        # Counted as upstream fetches when the batch started
+        self.upstream_fetches -= len(symbols) - len(missing)
+        return missing
+
+    def _share(self,symbol: str,quote: Quote):
+        """Queue a fetched quote for the shared cache, written once per loop iteration"""
+        if not self._to_share:
+            asyncio.get_running_loop().call_soon(self._flush_shared)
+        self._to_share[symbol] = quote
+
+    def _flush_shared(self):
+        backend = self._shared_backend()
+        values = {
+            self.coordinator.key(f"quote:{symbol}"): encode(quote.to_dict())
+            for symbol,quote in self._to_share.items()
+        }
+        self._to_share = {}
+        if backend is None or not values:
+            return
+        task = asyncio.ensure_future(self._write_shared(backend,values))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _write_shared(self,backend,values: Dict[str,bytes]):
+        try:
+            await backend.mset(values,ttl=self.cache.ttl)
+        except Exception as e:
+            print(f"Shared quote write failed: {e}")
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Semaphore bounding concurrent upstream quote requests"""
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _fetch_batch(
+            self,
+            symbols: List[str],
+            futures: Dict[str,asyncio.Future],
+            deadline: float,
+            use_shared: bool = True
+    ):
+        """
+        Walk the provider chain for a batch of symbols
+
+        The primary provider is queried per symbol, or per chunk when it
+        supports bulk quotes. Symbols it fails on within the first half of
+        the deadline go to the fallbacks as one batch, leaving the fallbacks
+        the other half; primary failures that arrive later form a second batch
+        """
+        try:
+            remaining = symbols
+            if use_shared and self.cache_enabled:
+                remaining = await self._resolve_shared(symbols,futures)
+                if not remaining:
+                    return
+
+            await self._ensure_providers()
+            if not self.providers:
+                return
+
+            primary,fallbacks = self.providers[0],self.providers[1:]
+            if primary.supports_bulk_quotes:
+                size = primary.bulk_chunk_size
+                chunks = [remaining[i:i + size] for i in range(0,len(remaining),size)]
+            else:
+                chunks = [[symbol] for symbol in remaining]
+
+            tasks = [
+                asyncio.ensure_future(self._fetch_from_primary(primary,chunk,futures))
+                for chunk in chunks
+            ]
+            done,pending = await asyncio.wait(tasks,timeout=deadline / 2)
+            failed = [symbol for task in done for symbol in task.result()]
+            await self._fetch_from_fallbacks(fallbacks,failed,futures)
+
+            if pending:
+                await asyncio.wait(pending)
+                failed = [symbol for task in pending for symbol in task.result()]
+                await self._fetch_from_fallbacks(fallbacks,failed,futures)
+        finally:
+            # If all providers fail, resolve with empty quotes
+            for symbol in symbols:
+                if not futures[symbol].done():
+                    futures[symbol].set_result(Quote.empty(symbol))
+
+    async def _fetch_from_primary(
+            self,
+            provider,
+            symbols: List[str],
+            futures: Dict[str,asyncio.Future]
+    ) -> List[str]:
+        """
+        Fetch one symbol, or one chunk from a bulk provider, from the
+        primary provider under the concurrency bound; return failures
+        """
+        health = self.health[provider.name]
+        async with self._get_semaphore():
+            # Checked after queueing so waiting chunks see a freshly opened breaker
+            if not health.allow_request():
+                return symbols
+
+            started = time.monotonic()
             try:
-                quote = await provider.get_quote(symbol)
-                if quote and quote.get('price',0) > 0:
-                    quote['provider'] = provider.name
-                    return quote
+                if len(symbols) == 1 and not provider.supports_bulk_quotes:
+                    quotes = [await provider.get_quote(symbols[0])]
+                else:
+                    quotes = await provider.get_quotes(symbols)
             except Exception as e:
-                print(f"Provider {provider.name} failed for {symbol}: {e}")
+                health.record_failure(time.monotonic() - started,str(e))
+                print(f"Provider {provider.name} failed for {', '.join(symbols)}: {e}")
+                return symbols
+
+        failed = self._resolve_quotes(provider,symbols,quotes,futures)
+        self._record_quotes_outcome(health,started,symbols,failed)
+        return failed
+
+    def _resolve_quotes(
+            self,
+            provider,
+            symbols: List[str],
+            quotes: List[Quote],
+            futures: Dict[str,asyncio.Future]
+    ) -> List[str]:
+        """Resolve valid quotes from a provider and return the failed symbols"""
+        failed = []
+        for symbol,quote in zip(symbols,quotes):
+            if quote and quote.price > 0:
+                quote.provider = provider.name
+                self._resolve(symbol,futures[symbol],quote)
+            else:
+                failed.append(symbol)
+        return failed
+
+    async def _fetch_from_fallbacks(
+            self,
+            providers: list,
+            symbols: List[str],
+            futures: Dict[str,asyncio.Future]
+    ):
+        """Retry symbols against each fallback provider as one batch"""
+        for provider in providers:
+            if not symbols:
+                return
+
+            health = self.health[provider.name]
+            if not health.allow_request():
                 continue
 
-        # If all providers fail, return empty quote
-        return self._empty_quote(symbol)
+            started = time.monotonic()
+            try:
+                async with self._get_semaphore():
+                    quotes = await provider.get_quotes(symbols)
+            except Exception as e:
+                health.record_failure(time.monotonic() - started,str(e))
+                print(f"Provider {provider.name} failed for {len(symbols)} symbols: {e}")
+                continue
 
-    async def get_quotes(self,symbols: List[str]) -> List[Dict]:
-        """Get quotes for multiple symbols"""
-        quotes = []
-        for symbol in symbols:
-            quote = await self.get_quote(symbol)
-            quotes.append(quote)
-        return quotes
+            failed = self._resolve_quotes(provider,symbols,quotes,futures)
+            self._record_quotes_outcome(health,started,symbols,failed)
+            symbols = failed
+
+    def _record_quotes_outcome(
+            self,
+            health: ProviderHealth,
+            started: float,
+            symbols: List[str],
+            failed: List[str]
+    ):
+        """A call succeeds if it priced at least one of its symbols"""
+        latency = time.monotonic() - started
+        if len(failed) < len(symbols):
+            health.record_success(latency)
+        else:
+            health.record_failure(latency,f"no valid quote for {', '.join(symbols[:5])}")
+
+    def _stale_quote(self,symbol: str) -> Quote:
+        """Last known quote for a symbol that missed the deadline"""
+        self.stale_responses += 1
+        entry = self.cache.get_stale(symbol)
+        quote = entry[0].copy() if entry is not None else Quote.empty(symbol)
+        quote.stale = True
+        return quote
 
     async def get_historical(
             self,
@@ -61,44 +525,112 @@ class DataAggregator:
             start_date: datetime,
             end_date: datetime,
             interval: str = "1d"
-    ) -> pd.DataFrame:
-        """Get historical data with fallback"""
+    ) -> "pd.DataFrame":
+        """
+        Get historical data, from the local store when enabled
+        Only ranges missing from the store are fetched and then appended
+        """
+        # Also loads pandas, before the store needs it on the event loop
+        await self._ensure_providers()
+        if self.store is None:
+            return await self._fetch_historical(symbol,start_date,end_date,interval)
+
+        # Stored ranges are refreshed at most every historical_update_interval
+        min_gap = config_manager.settings.historical_update_interval
+        key = (symbol,interval)
+        lock = self._historical_locks.setdefault(key,asyncio.Lock())
+
+        async with lock:
+            gaps = await asyncio.to_thread(
+                self.store.missing_ranges,symbol,interval,start_date,end_date,min_gap
+            )
+            for gap_start,gap_end in gaps:
+                df = await self._fetch_historical(symbol,gap_start,gap_end,interval)
+                if df.empty:
+                    # Leave the range uncovered so it is retried next time
+                    continue
+                covered_end = min(gap_end,datetime.now().astimezone())
+                await asyncio.to_thread(
+                    self.store.append,symbol,interval,df,gap_start,covered_end
+                )
+
+        return await asyncio.to_thread(self.store.read,symbol,interval,start_date,end_date)
+
+    async def _fetch_historical(
+            self,
+            symbol: str,
+            start_date: datetime,
+            end_date: datetime,
+            interval: str = "1d"
+    ) -> "pd.DataFrame":
+        """
+        Get historical data from the providers with fallback
+        An empty frame is not counted against a provider's health, since a
+        range without trading sessions is legitimately empty
+        """
+        import pandas as pd
+
+        await self._ensure_providers()
         for provider in self.providers:
+            health = self.health[provider.name]
+            if not health.allow_request():
+                continue
+
+            started = time.monotonic()
             try:
                 df = await provider.get_historical(
                     symbol,start_date,end_date,interval
                 )
-                if not df.empty:
-                    return df
             except Exception as e:
+                health.record_failure(time.monotonic() - started,str(e))
                 print(f"Provider {provider.name} failed for historical {symbol}: {e}")
                 continue
 
+            if not df.empty:
+                health.record_success(time.monotonic() - started)
+                return df
+            health.release()
+
         return pd.DataFrame()
 
-    def _empty_quote(self,symbol: str) -> Dict:
-        """Return empty quote structure"""
-        return {
-            'symbol': symbol,
-            'price': 0.0,
-            'change': 0.0,
-            'change_percent': 0.0,
-            'volume': 0,
-            'timestamp': datetime.now(),
-            'bid': 0.0,
-            'ask': 0.0,
-            'open': 0.0,
-            'high': 0.0,
-            'low': 0.0,
-            'close': 0.0,
-            'prev_close': 0.0,
-            'provider': 'none',
-        }
+    def get_cache_stats(self) -> Dict:
+        """Quote cache and request coalescing counters"""
+        stats = self.cache.stats()
+        stats.update({
+            'enabled': self.cache_enabled,
+            'upstream_fetches': self.upstream_fetches,
+            'shared_hits': self.shared_hits,
+            'coalesced_requests': self.coalesced_requests,
+            'stale_responses': self.stale_responses,
+            'inflight': len(self._inflight),
+        })
+        return stats
+
+    def get_rate_limit_stats(self) -> Dict[str,Dict]:
+        """Remaining budget and queue depth per rate limited provider"""
+        return self.rate_limits.stats()
 
-    async def check_providers(self) -> Dict[str,bool]:
-        """Check availability of all providers"""
+    def check_providers(self) -> Dict[str,bool]:
+        """Availability of all providers from their tracked health, without upstream calls"""
+        return {name: health.available for name,health in self.health.items()}
+
+    def get_provider_health(self) -> Dict[str,Dict]:
+        """Success rate, latency, last error and breaker state per provider"""
+        return {name: health.to_dict() for name,health in self.health.items()}
+
+    async def probe_providers(self) -> Dict[str,bool]:
+        """Actively probe every provider with a live request and record the outcome"""
+        await self._ensure_providers()
         status = {}
-        for provider in self.providers:
-            is_available = await provider.is_available()
-            status[provider.name] = is_available
+        # Probes run last in line for the rate limit budget
+        with priority_scope(Priority.HEALTH):
+            for provider in self.providers:
+                health = self.health[provider.name]
+                started = time.monotonic()
+                is_available = await provider.is_available()
+                if is_available:
+                    health.record_success(time.monotonic() - started)
+                else:
+                    health.record_failure(time.monotonic() - started,"probe failed")
+                status[provider.name] = is_available
         return status
\ No newline at end of file
@@ -0,0 +1,112 @@
+import time
+from typing import Dict,Optional
+
+
+class ProviderHealth:
+    """
+    Passive health statistics and circuit breaker for one provider
+
+    Built from real traffic: success/failure counts, an EWMA of call latency
+    and the last error. After failure_threshold consecutive failures the
+    breaker opens and the provider is skipped; once cooldown seconds have
+    passed a single trial call is let through (half-open), which closes the
+    breaker on success or re-opens it on failure.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+            self,
+            name: str,
+            failure_threshold: int = 5,
+            cooldown: float = 30,
+            latency_alpha: float = 0.2
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latency_alpha = latency_alpha
+
+        self.state = self.CLOSED
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ewma_latency: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Whether a call may be sent to the provider now"""
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+
+        # Half-open: one trial call at a time
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self,latency: float):
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.last_success_at = time.time()
+        self._update_latency(latency)
+        self.state = self.CLOSED
+        self._trial_in_flight = False
+
+    def record_failure(self,latency: float,error: Optional[str] = None):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error or "empty response"
+        self.last_error_at = time.time()
+        self._update_latency(latency)
+        self._trial_in_flight = False
+
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """End a call without an outcome, freeing the half-open trial slot"""
+        self._trial_in_flight = False
+
+    def _update_latency(self,latency: float):
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency += self.latency_alpha * (latency - self.ewma_latency)
+
+    @property
+    def available(self) -> bool:
+        """Healthy enough to receive traffic (breaker not open)"""
+        return self.state != self.OPEN
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        total = self.successes + self.failures
+        return self.successes / total if total else None
+
+    def to_dict(self) -> Dict:
+        return {
+            'available': self.available,
+            'state': self.state,
+            'success_rate': self.success_rate,
+            'successes': self.successes,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'ewma_latency_ms': self.ewma_latency * 1000 if self.ewma_latency is not None else None,
+            'last_error': self.last_error,
+            'last_error_at': self.last_error_at,
+            'last_success_at': self.last_success_at,
+        }
@@ -0,0 +1,364 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime,time as day_start,timedelta
+from enum import IntEnum
+from pathlib import Path
+from typing import Dict,List,Optional,Tuple,Union
+from zoneinfo import ZoneInfo
+from app.utils.file_lock import file_lock
+
+
+class Priority(IntEnum):
+    """Request priority, lower values are served first"""
+    TRADING = 0
+    WATCHLIST = 1
+    BACKFILL = 2
+    ADHOC = 3
+    HEALTH = 4
+
+
+# Priority of the current request, inherited by tasks spawned from it
+request_priority: ContextVar[Priority] = ContextVar('request_priority',default=Priority.ADHOC)
+
+
+@contextmanager
+def priority_scope(priority: Priority):
+    """Run provider calls made inside the block at the given priority"""
+    token = request_priority.set(priority)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a provider's budget cannot serve a request in time"""
+    pass
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity tokens per period"""
+
+    def __init__(self,capacity: float,period: float):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.time()
+
+    def _refill(self,now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity,self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def available(self,now: float) -> float:
+        """Tokens available at time now"""
+        self._refill(now)
+        return self.tokens
+
+    def wait_time(self,now: float,tokens: float = 1) -> float:
+        """Seconds until the bucket holds the given number of tokens"""
+        missing = tokens - self.available(now)
+        return max(0.0,missing / self.rate)
+
+    def consume(self,now: float,tokens: float = 1):
+        self._refill(now)
+        self.tokens -= tokens
+
+    def to_state(self) -> Dict:
+        return {'tokens': self.tokens,'updated': self.updated}
+
+    def load_state(self,state: Dict):
+        self.tokens = min(self.capacity,state.get('tokens',self.capacity))
+        self.updated = state.get('updated',time.time())
+
+
+class DailyWindow:
+    """
+    Fixed daily budget of capacity requests, reset at midnight in timezone
+    Unlike a bucket refilling over 24h it never allows more than capacity
+    requests in one provider day.
+    """
+
+    def __init__(self,capacity: float,timezone: str = "UTC"):
+        self.capacity = capacity
+        self.timezone = ZoneInfo(timezone)
+        self.used = 0
+        self.day = self._day(time.time())
+
+    def _day(self,now: float) -> str:
+        return datetime.fromtimestamp(now,self.timezone).date().isoformat()
+
+    def _roll(self,now: float):
+        day = self._day(now)
+        if day != self.day:
+            self.day = day
+            self.used = 0
+
+    def available(self,now: float) -> float:
+        """Requests left in the current day"""
+        self._roll(now)
+        return self.capacity - self.used
+
+    def wait_time(self,now: float,tokens: float = 1) -> float:
+        """Seconds until the budget holds the given number of requests"""
+        if self.available(now) >= tokens:
+            return 0.0
+        tomorrow = datetime.fromtimestamp(now,self.timezone).date() + timedelta(days=1)
+        return datetime.combine(tomorrow,day_start(),tzinfo=self.timezone).timestamp() - now
+
+    def consume(self,now: float,tokens: float = 1):
+        self._roll(now)
+        self.used += tokens
+
+    def to_state(self) -> Dict:
+        return {'day': self.day,'used': self.used}
+
+    def load_state(self,state: Dict):
+        if 'day' in state:
+            self.day = state['day']
+            self.used = state.get('used',0)
+        elif 'tokens' in state:
+            # Continuous bucket saved by earlier versions
+            self.day = self._day(state.get('updated',time.time()))
+            self.used = max(0,self.capacity - state['tokens'])
+
+
+class RateLimiter:
+    """
+    Rate limiter for one provider
+
+    Combines per-second and per-minute token buckets with a daily budget
+    reset at midnight in reset_timezone. Waiting requests are granted in
+    priority order, and requests below Priority.BACKFILL may not spend the
+    last `reserve` fraction of the daily budget, which is kept for
+    watchlist and trading fetches. With a registry state file, grants are
+    decided against the budget shared by every process (see
+    RateLimiterRegistry).
+    """
+
+    PERIODS = {'per_second': 1,'per_minute': 60}
+
+    def __init__(
+            self,
+            name: str,
+            per_second: Optional[float] = None,
+            per_minute: Optional[float] = None,
+            per_day: Optional[float] = None,
+            reserve: float = 0.2,
+            max_wait: float = 30,
+            reset_timezone: str = "UTC",
+            registry: Optional["RateLimiterRegistry"] = None
+    ):
+        self.name = name
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.registry = registry
+        self.buckets: Dict[str,Union[TokenBucket,DailyWindow]] = {}
+        for key,limit in (('per_second',per_second),('per_minute',per_minute)):
+            if limit:
+                self.buckets[key] = TokenBucket(limit,self.PERIODS[key])
+        if per_day:
+            self.buckets['per_day'] = DailyWindow(per_day,reset_timezone)
+
+        self._waiters: List[Tuple[int,int,asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.granted = 0
+        self.rejected = 0
+
+    async def acquire(self,priority: Optional[Priority] = None,max_wait: Optional[float] = None):
+        """
+        Wait for a token at the given priority (defaults to the request's)
+        Raises RateLimitExceeded if none is available within max_wait
+        """
+        if not self.buckets:
+            return
+
+        priority = request_priority.get() if priority is None else priority
+        max_wait = self.max_wait if max_wait is None else max_wait
+
+        if self._day_exhausted(priority,time.time()):
+            self.rejected += 1
+            raise RateLimitExceeded(f"{self.name} daily budget exhausted for {priority.name}")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters,(int(priority),next(self._sequence),future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+        try:
+            await asyncio.wait_for(future,timeout=max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise RateLimitExceeded(f"{self.name} rate limit wait exceeded {max_wait}s")
+
+    async def _dispatch(self):
+        """Grant tokens to waiters in priority order as buckets refill"""
+        while self._waiters:
+            priority,_,future = self._waiters[0]
+            if future.done():
+                # Waiter timed out or was cancelled
+                heapq.heappop(self._waiters)
+                continue
+
+            if self.registry is not None and self.registry.state_file is not None:
+                wait = await asyncio.to_thread(self.registry.take,self,Priority(priority))
+            else:
+                wait = self.take(Priority(priority),time.time())
+
+            if wait is None:
+                heapq.heappop(self._waiters)
+                if not future.done():
+                    self.rejected += 1
+                    future.set_exception(RateLimitExceeded(f"{self.name} daily budget exhausted"))
+                continue
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            # A waiter that timed out during a shared grant leaves its token spent
+            heapq.heappop(self._waiters)
+            if not future.done():
+                self.granted += 1
+                future.set_result(None)
+
+    def take(self,priority: Priority,now: float) -> Optional[float]:
+        """
+        Consume one token from every bucket if all have one
+        Returns 0 when consumed, else the seconds to wait, or None when the
+        daily budget is exhausted for this priority.
+        """
+        if self._day_exhausted(priority,now):
+            return None
+        wait = max(bucket.wait_time(now) for bucket in self.buckets.values())
+        if wait > 0:
+            return wait
+        for bucket in self.buckets.values():
+            bucket.consume(now)
+        return 0.0
+
+    def _day_exhausted(self,priority: Priority,now: float) -> bool:
+        """Whether the daily bucket cannot serve this priority any more"""
+        bucket = self.buckets.get('per_day')
+        if bucket is None:
+            return False
+        floor = bucket.capacity * self.reserve if priority > Priority.BACKFILL else 0
+        return bucket.available(now) < 1 + floor
+
+    def remaining(self) -> Dict[str,float]:
+        """Tokens currently left in each bucket"""
+        now = time.time()
+        return {key: bucket.available(now) for key,bucket in self.buckets.items()}
+
+    def is_exhausted(self) -> bool:
+        """Whether the daily budget is used up for every priority"""
+        return self._day_exhausted(Priority.TRADING,time.time())
+
+    def stats(self) -> Dict:
+        return {
+            'remaining': self.remaining(),
+            'waiting': sum(1 for _,_,future in self._waiters if not future.done()),
+            'granted': self.granted,
+            'rejected': self.rejected,
+        }
+
+
+class RateLimiterRegistry:
+    """
+    Rate limiters for all providers, with one budget per provider shared
+    through state_file by every process using it
+
+    Server workers and the download script all spend the same provider
+    quota. Each grant is a read-modify-write of state_file under a lock
+    file, run in a worker thread: the limiter loads its buckets as the
+    other processes left them, takes a token and writes them back. Without
+    a state file budgets are kept in this process only.
+    """
+
+    def __init__(
+            self,
+            state_file: Optional[str] = "data/rate_limits.json",
+            reserve: float = 0.2,
+            max_wait: float = 30
+    ):
+        self.state_file = Path(state_file) if state_file else None
+        self.lock_file = self.state_file.with_suffix(".lock") if self.state_file else None
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.limiters: Dict[str,RateLimiter] = {}
+        self._state = self._load_state()
+
+    def for_provider(self,name: str,rate_limit) -> Optional[RateLimiter]:
+        """
+        Build the limiter for a provider's rate_limit config entry
+        Accepts a mapping of per_second/per_minute/per_day (and
+        reset_timezone, the provider's day boundary) or a bare number
+        (requests per day). Returns None when the provider is unlimited.
+        """
+        if not rate_limit:
+            return None
+        if isinstance(rate_limit,(int,float)):
+            rate_limit = {'per_day': rate_limit}
+
+        limiter = RateLimiter(
+            name,
+            per_second=rate_limit.get('per_second'),
+            per_minute=rate_limit.get('per_minute'),
+            per_day=rate_limit.get('per_day'),
+            reserve=rate_limit.get('reserve',self.reserve),
+            max_wait=rate_limit.get('max_wait',self.max_wait),
+            reset_timezone=rate_limit.get('reset_timezone',"UTC"),
+            registry=self
+        )
+        self._load_buckets(limiter,self._state)
+
+        self.limiters[name] = limiter
+        return limiter
+
+    def take(self,limiter: RateLimiter,priority: Priority) -> Optional[float]:
+        """Decide one grant of limiter against the shared state (see RateLimiter.take)"""
+        try:
+            with file_lock(self.lock_file):
+                state = self._load_state()
+                self._load_buckets(limiter,state)
+                wait = limiter.take(priority,time.time())
+                if wait == 0:
+                    state[limiter.name] = {key: bucket.to_state() for key,bucket in limiter.buckets.items()}
+                    self._write(state)
+                return wait
+        except OSError as e:
+            print(f"Rate limit state {self.state_file} not shared: {e}")
+            return limiter.take(priority,time.time())
+
+    @staticmethod
+    def _load_buckets(limiter: RateLimiter,state: Dict):
+        for key,bucket_state in state.get(limiter.name,{}).items():
+            if key in limiter.buckets:
+                limiter.buckets[key].load_state(bucket_state)
+
+    def _load_state(self) -> Dict:
+        if self.state_file is None or not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file,'r') as f:
+                return json.load(f)
+        except (OSError,ValueError) as e:
+            print(f"Ignoring unreadable rate limit state {self.state_file}: {e}")
+            return {}
+
+    def _write(self,state: Dict):
+        self.state_file.parent.mkdir(parents=True,exist_ok=True)
+        tmp = self.state_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp,'w') as f:
+            json.dump(state,f)
+        os.replace(tmp,self.state_file)
+
+    def stats(self) -> Dict[str,Dict]:
+        return {name: limiter.stats() for name,limiter in self.limiters.items()}
@@ -0,0 +1,48 @@
+from typing import Callable,Dict,Optional
+from .base import BaseDataProvider
+
+# Keys of a data.providers entry read by DataAggregator; the rest are
+# passed to the provider's constructor
+AGGREGATOR_KEYS = ('name','enabled','priority','rate_limit')
+
+
+def _yfinance(options: Dict,settings) -> BaseDataProvider:
+    from .yfinance_provider import YFinanceProvider
+    return YFinanceProvider(**options)
+
+
+def _alpha_vantage(options: Dict,settings) -> Optional[BaseDataProvider]:
+    if not settings.alpha_vantage_api_key:
+        return None
+    from .alpha_vantage_provider import AlphaVantageProvider
+    return AlphaVantageProvider(settings.alpha_vantage_api_key)
+
+
+def _synthetic(options: Dict,settings) -> BaseDataProvider:
+    from .synthetic_provider import SyntheticProvider
+    return SyntheticProvider(**options)
+
+
+def _replay(options: Dict,settings) -> BaseDataProvider:
+    from .replay_provider import ReplayProvider
+    return ReplayProvider(**options)
+
+
+# data.providers name -> factory(options, settings), returning None when the
+# provider cannot run (e.g. no API key). Imports stay inside the factories
+# so only configured providers are loaded.
+PROVIDERS: Dict[str,Callable[[Dict,object],Optional[BaseDataProvider]]] = {
+    'yfinance': _yfinance,
+    'alpha_vantage': _alpha_vantage,
+    'synthetic': _synthetic,
+    'replay': _replay,
+}
+
+
+def create_provider(entry: Dict,settings) -> Optional[BaseDataProvider]:
+    """Build the provider for a data.providers entry"""
+    factory = PROVIDERS.get(entry.get('name'))
+    if factory is None:
+        raise ValueError(f"Unknown data provider: {entry.get('name')}")
+    options = {key: value for key,value in entry.items() if key not in AGGREGATOR_KEYS}
+    return factory(options,settings)
@@ -0,0 +1,229 @@
+import asyncio
+import os
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Callable,Dict,List,Optional,Tuple
+from datetime import datetime
+from .base import BaseDataProvider
+from app.schemas.quote import Quote
+
+COLUMNS = ('open','high','low','close','volume')
+
+
+def _to_ns(value) -> int:
+    """UTC nanoseconds for a datetime, reading naive values as local time"""
+    if isinstance(value,datetime) and value.tzinfo is None:
+        value = value.astimezone()
+    timestamp = pd.Timestamp(value)
+    return (timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')).value
+
+
+def _index_to_ns(index) -> np.ndarray:
+    """UTC nanoseconds for a parsed CSV index (naive treated as UTC, as in the store)"""
+    index = pd.DatetimeIndex(pd.to_datetime(index,utc=True))
+    return index.tz_localize(None).values.astype('datetime64[ns]').view('int64')
+
+
+class Bars:
+    """One symbol's replayable bars as UTC nanosecond timestamps and float columns"""
+
+    __slots__ = ('timestamps','columns')
+
+    def __init__(self,timestamps: np.ndarray,columns: Dict[str,np.ndarray]):
+        self.timestamps = timestamps
+        self.columns = columns
+
+    @classmethod
+    def read_csv(cls,path: Path) -> "Bars":
+        df = pd.read_csv(path,index_col=0)
+        df.columns = [str(column).lower() for column in df.columns]
+        timestamps = _index_to_ns(df.index)
+        order = np.argsort(timestamps,kind='stable')
+        columns = {
+            column: df[column].to_numpy(dtype=float)[order]
+            for column in COLUMNS if column in df.columns
+        }
+        return cls(timestamps[order],columns)
+
+    def at(self,position: int,column: str) -> float:
+        values = self.columns.get(column)
+        return float(values[position]) if values is not None else 0.0
+
+
+class ReplayProvider(BaseDataProvider):
+    """
+    Replays the CSVs written by scripts/download_data.py --csv
+
+    Reads data/raw/{symbol}_{interval}_historical.csv on first use of a
+    symbol. A replay clock starts at the earliest bar across the directory
+    (or start) when the provider is created and runs at speed simulated
+    seconds per wall-clock second: 86400 replays one daily bar per second.
+    A quote is the last bar at or before the replay time, priced at its
+    close with the previous bar's close as prev_close; with loop, the clock
+    wraps to the beginning after the latest bar. Historical requests never
+    return bars after the replay time, so consumers see no look-ahead.
+    """
+
+    supports_bulk_quotes = True
+
+    def __init__(
+            self,
+            path: str = "data/raw",
+            interval: str = "1d",
+            speed: float = 86400.0,
+            start: Optional[str] = None,
+            loop: bool = True,
+            spread_bps: float = 5.0,
+            bulk_chunk_size: int = 5000,
+            clock: Callable[[],float] = time.monotonic
+    ):
+        super().__init__(api_key=None)
+        self.path = Path(path)
+        self.interval = interval
+        self.speed = speed
+        self.loop = loop
+        self.spread = spread_bps / 10000.0
+        self.bulk_chunk_size = bulk_chunk_size
+        self._clock = clock
+        self._started = clock()
+        self._start = _to_ns(pd.Timestamp(start).to_pydatetime()) if start else None
+        self._span: Optional[Tuple[int,int]] = None
+        self._bars: Dict[Tuple[str,str],Optional[Bars]] = {}
+
+    def _file(self,symbol: str,interval: str) -> Path:
+        return self.path / f"{symbol}_{interval}_historical.csv"
+
+    def files(self,interval: Optional[str] = None) -> Dict[str,Path]:
+        """Replayable symbols and their CSV files"""
+        suffix = f"_{interval or self.interval}_historical.csv"
+        if not self.path.is_dir():
+            return {}
+        return {
+            name[:-len(suffix)]: self.path / name
+            for name in sorted(os.listdir(self.path)) if name.endswith(suffix)
+        }
+
+    # Replay clock
+
+    @staticmethod
+    def _edge_timestamp(path: Path,last: bool) -> Optional[int]:
+        """Timestamp of the first or last data row, reading only the file's ends"""
+        with open(path,'rb') as handle:
+            if last:
+                handle.seek(0,os.SEEK_END)
+                handle.seek(max(handle.tell() - 4096,0))
+            lines = [line for line in handle.read(4096).splitlines() if line.strip()]
+        rows = lines[-1:] if last else lines[1:2]
+        if not rows:
+            return None
+        try:
+            return int(_index_to_ns([rows[0].split(b',',1)[0].decode()])[0])
+        except (ValueError,TypeError):
+            return None
+
+    def span(self) -> Tuple[int,int]:
+        """Earliest and latest bar across the replayed files, scanned once"""
+        if self._span is None:
+            firsts,lasts = [],[]
+            for path in self.files().values():
+                first = self._edge_timestamp(path,last=False)
+                last = self._edge_timestamp(path,last=True)
+                if first is not None and last is not None:
+                    firsts.append(first)
+                    lasts.append(last)
+            self._span = (min(firsts),max(lasts)) if firsts else (0,0)
+        return self._span
+
+    def replay_time(self) -> int:
+        """Current replay time in UTC nanoseconds"""
+        first,last = self.span()
+        origin = self._start if self._start is not None else first
+        elapsed = int((self._clock() - self._started) * self.speed * 1e9)
+        if self.loop and last > origin:
+            elapsed %= last - origin + 1
+        return origin + elapsed
+
+    # Bar loading
+
+    def _load(self,symbol: str,interval: str) -> Optional[Bars]:
+        key = (symbol,interval)
+        if key not in self._bars:
+            path = self._file(symbol,interval)
+            try:
+                self._bars[key] = Bars.read_csv(path) if path.exists() else None
+            except Exception as e:
+                print(f"Replay file {path} unreadable: {e}")
+                self._bars[key] = None
+        return self._bars[key]
+
+    async def _bars_for(self,symbols: List[str],interval: str) -> List[Optional[Bars]]:
+        """Bars of each symbol, reading uncached files in one worker thread"""
+        missing = [symbol for symbol in symbols if (symbol,interval) not in self._bars]
+        if missing:
+            await asyncio.to_thread(lambda: [self._load(symbol,interval) for symbol in missing])
+        return [self._bars[(symbol,interval)] for symbol in symbols]
+
+    # Provider interface
+
+    async def get_quote(self,symbol: str) -> Quote:
+        """Get the replayed quote for a symbol"""
+        return (await self.get_quotes([symbol]))[0]
+
+    async def get_quotes(self,symbols: List[str]) -> List[Quote]:
+        """Get replayed quotes: each symbol's last bar at or before the replay time"""
+        all_bars = await self._bars_for(symbols,self.interval)
+        now = self.replay_time()
+        quotes = []
+        for symbol,bars in zip(symbols,all_bars):
+            position = -1 if bars is None else int(np.searchsorted(bars.timestamps,now,side='right')) - 1
+            if position < 0:
+                quotes.append(Quote.empty(symbol))
+                continue
+            price = bars.at(position,'close')
+            prev_close = bars.at(position - 1,'close') if position > 0 else bars.at(position,'open')
+            half_spread = price * self.spread / 2
+            quotes.append(Quote(
+                symbol,
+                price=price,
+                change=price - prev_close,
+                change_percent=(price / prev_close - 1.0) * 100 if prev_close else 0.0,
+                volume=int(bars.at(position,'volume')),
+                timestamp=pd.Timestamp(int(bars.timestamps[position]),tz='UTC').to_pydatetime(),
+                bid=price - half_spread,
+                ask=price + half_spread,
+                open=bars.at(position,'open'),
+                high=bars.at(position,'high'),
+                low=bars.at(position,'low'),
+                close=price,
+                prev_close=prev_close,
+                provider=self.name
+            ))
+        return quotes
+
+    async def get_historical(
+            self,
+            symbol: str,
+            start_date: datetime,
+            end_date: datetime,
+            interval: str = "1d"
+    ) -> pd.DataFrame:
+        """Get replayed bars in [start_date, end_date), none after the replay time"""
+        bars = (await self._bars_for([symbol],interval))[0]
+        if bars is None:
+            return pd.DataFrame()
+
+        end = min(_to_ns(end_date),self.replay_time() + 1)
+        lo = int(np.searchsorted(bars.timestamps,_to_ns(start_date),side='left'))
+        hi = int(np.searchsorted(bars.timestamps,end,side='left'))
+        if hi <= lo:
+            return pd.DataFrame()
+
+        index = pd.DatetimeIndex(bars.timestamps[lo:hi].view('datetime64[ns]'),tz='UTC')
+        index.name = 'Date'
+        return pd.DataFrame({column: values[lo:hi] for column,values in bars.columns.items()},index=index)
+
+    async def is_available(self) -> bool:
+        """Available when the replay directory holds files for the interval"""
+        return bool(self.files())
@@ -0,0 +1,246 @@
+import math
+import time
+import zlib
+import numpy as np
+import pandas as pd
+from typing import Callable,Dict,List
+from datetime import datetime
+from .base import BaseDataProvider
+from app.schemas.quote import Quote
+
+# Simulated trading time: one session is 6.5 hours, a year 252 sessions
+SESSION_SECONDS = 6.5 * 3600
+YEAR_SECONDS = 252 * SESSION_SECONDS
+
+# Simulated trading seconds per bar of each interval
+BAR_SECONDS = {
+    'm': 60,'h': 3600,'d': SESSION_SECONDS,
+    'wk': 5 * SESSION_SECONDS,'mo': 21 * SESSION_SECONDS,
+}
+
+
+def _interval_parts(interval: str):
+    unit = interval.lstrip('0123456789')
+    count = int(interval[:len(interval) - len(unit)] or 1)
+    if unit not in BAR_SECONDS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    return count,unit
+
+
+def session_index(start: datetime,end: datetime,interval: str) -> pd.DatetimeIndex:
+    """Bar times in [start, end): regular-session bars for intraday intervals, else one per period"""
+    count,unit = _interval_parts(interval)
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end)
+    start = start.tz_localize('America/New_York') if start.tzinfo is None else start.tz_convert('America/New_York')
+    end = end.tz_localize('America/New_York') if end.tzinfo is None else end.tz_convert('America/New_York')
+
+    days = pd.bdate_range(start.normalize().tz_localize(None),end.normalize().tz_localize(None))
+    if unit in ('m','h'):
+        step = count * BAR_SECONDS[unit]
+        offsets = pd.to_timedelta(np.arange(9.5 * 3600,16 * 3600,step),unit='s')
+        times = (days.values[:,None] + offsets.values[None,:]).ravel()
+        index = pd.DatetimeIndex(times).tz_localize('America/New_York')
+    elif unit == 'd':
+        index = days.tz_localize('America/New_York')
+    else:
+        index = pd.date_range(start.normalize(),end,freq=f"{count}W-MON" if unit == 'wk' else f"{count}MS")
+    index = index[(index >= start) & (index < end)]
+    index.name = 'Date'
+    return index
+
+
+class SyntheticProvider(BaseDataProvider):
+    """
+    Locally generated market of correlated geometric Brownian motions
+
+    Any requested symbol joins the market with a seeded starting price,
+    volatility (volatility scaled within +-dispersion) and typical daily
+    volume. Shocks load on one market factor, giving every pair of symbols
+    the configured correlation. Prices advance with wall-clock time at
+    speed simulated trading seconds per second; a request steps every
+    known symbol at once with one vectorized draw, so thousands of symbols
+    cost a few array operations. Sessions roll over every 6.5 simulated
+    hours (open, high, low, volume and prev_close reset).
+
+    Historical bars come from the same model and end at the symbol's
+    current price, with the market factor shared across symbols for the
+    same range. No network, no API key.
+    """
+
+    supports_bulk_quotes = True
+
+    def __init__(
+            self,
+            volatility: float = 0.25,
+            drift: float = 0.05,
+            correlation: float = 0.3,
+            dispersion: float = 0.5,
+            spread_bps: float = 5.0,
+            speed: float = 1.0,
+            seed: int = 42,
+            bulk_chunk_size: int = 5000,
+            clock: Callable[[],float] = time.monotonic
+    ):
+        super().__init__(api_key=None)
+        if not 0.0 <= correlation < 1.0:
+            raise ValueError("correlation must be in [0, 1)")
+        self.volatility = volatility
+        self.drift = drift
+        self.correlation = correlation
+        self.dispersion = dispersion
+        self.spread = spread_bps / 10000.0
+        self.speed = speed
+        self.seed = seed
+        self.bulk_chunk_size = bulk_chunk_size
+        self._clock = clock
+        self._rng = np.random.default_rng(seed)
+
+        self.symbols: List[str] = []
+        self.slots: Dict[str,int] = {}
+        capacity = 64
+        self.log_price = np.zeros(capacity)
+        self.sigma = np.zeros(capacity)
+        self.daily_volume = np.zeros(capacity)
+        self.open = np.zeros(capacity)
+        self.high = np.zeros(capacity)
+        self.low = np.zeros(capacity)
+        self.prev_close = np.zeros(capacity)
+        self.volume = np.zeros(capacity,dtype=np.int64)
+
+        self._last = clock()
+        self.elapsed = 0.0
+        self._session = 0
+
+    # Market state
+
+    def _uniform(self,symbol: str,salt: int) -> float:
+        """Seeded draw in [0, 1) fixed per symbol"""
+        return zlib.crc32(f"{self.seed}:{salt}:{symbol}".encode()) / 2 ** 32
+
+    def _grow(self):
+        for name in ('log_price','sigma','daily_volume','open','high','low','prev_close','volume'):
+            values = getattr(self,name)
+            grown = np.zeros(2 * len(values),dtype=values.dtype)
+            grown[:len(values)] = values
+            setattr(self,name,grown)
+
+    def _slot(self,symbol: str) -> int:
+        slot = self.slots.get(symbol)
+        if slot is None:
+            slot = len(self.symbols)
+            if slot == len(self.log_price):
+                self._grow()
+            price = 10.0 + 490.0 * self._uniform(symbol,0)
+            self.log_price[slot] = math.log(price)
+            self.sigma[slot] = self.volatility * (1.0 + self.dispersion * (2.0 * self._uniform(symbol,1) - 1.0))
+            self.daily_volume[slot] = 10 ** (5.0 + 2.0 * self._uniform(symbol,2))
+            self.open[slot] = self.high[slot] = self.low[slot] = self.prev_close[slot] = price
+            self.symbols.append(symbol)
+            self.slots[symbol] = slot
+        return slot
+
+    def advance(self):
+        """Step every symbol to the current simulated time"""
+        now = self._clock()
+        seconds = (now - self._last) * self.speed
+        self._last = now
+        count = len(self.symbols)
+        if seconds <= 0 or count == 0:
+            return
+
+        dt = seconds / YEAR_SECONDS
+        sigma = self.sigma[:count]
+        market = self._rng.standard_normal()
+        idiosyncratic = self._rng.standard_normal(count)
+        shock = math.sqrt(self.correlation) * market + math.sqrt(1.0 - self.correlation) * idiosyncratic
+        self.log_price[:count] += (self.drift - 0.5 * sigma * sigma) * dt + sigma * math.sqrt(dt) * shock
+
+        self.elapsed += seconds
+        session = int(self.elapsed // SESSION_SECONDS)
+        price = np.exp(self.log_price[:count])
+        if session != self._session:
+            self._session = session
+            self.prev_close[:count] = self.open[:count] = self.high[:count] = self.low[:count] = price
+            self.volume[:count] = 0
+        else:
+            np.maximum(self.high[:count],price,out=self.high[:count])
+            np.minimum(self.low[:count],price,out=self.low[:count])
+        self.volume[:count] += self._rng.poisson(self.daily_volume[:count] * seconds / SESSION_SECONDS)
+
+    # Provider interface
+
+    async def get_quote(self,symbol: str) -> Quote:
+        """Get the current synthetic quote for a symbol"""
+        return (await self.get_quotes([symbol]))[0]
+
+    async def get_quotes(self,symbols: List[str]) -> List[Quote]:
+        """Get current synthetic quotes, stepping the whole market once"""
+        slots = np.array([self._slot(symbol) for symbol in symbols],dtype=np.intp)
+        self.advance()
+
+        price = np.exp(self.log_price[slots])
+        half_spread = price * self.spread / 2
+        prev_close = self.prev_close[slots]
+        now = datetime.now()
+        return [
+            Quote(
+                symbol,
+                price=float(price[i]),
+                change=float(price[i] - prev_close[i]),
+                change_percent=float((price[i] / prev_close[i] - 1.0) * 100),
+                volume=int(self.volume[slot]),
+                timestamp=now,
+                bid=float(price[i] - half_spread[i]),
+                ask=float(price[i] + half_spread[i]),
+                open=float(self.open[slot]),
+                high=float(max(self.high[slot],price[i])),
+                low=float(min(self.low[slot],price[i])),
+                close=float(price[i]),
+                prev_close=float(prev_close[i]),
+                provider=self.name
+            )
+            for i,(symbol,slot) in enumerate(zip(symbols,slots))
+        ]
+
+    async def get_historical(
+            self,
+            symbol: str,
+            start_date: datetime,
+            end_date: datetime,
+            interval: str = "1d"
+    ) -> pd.DataFrame:
+        """Get synthetic bars over the range, ending at the symbol's current price"""
+        index = session_index(start_date,end_date,interval)
+        if len(index) == 0:
+            return pd.DataFrame()
+
+        count,unit = _interval_parts(interval)
+        dt = count * BAR_SECONDS[unit] / YEAR_SECONDS
+        slot = self._slot(symbol)
+        sigma = self.sigma[slot]
+        first = int(index[0].value)
+        # The market factor depends only on the range, so symbols fetched
+        # over the same range are correlated as in the live stream
+        market = np.random.default_rng([self.seed,count,ord(unit[0]),first]).standard_normal(len(index))
+        rng = np.random.default_rng([self.seed,zlib.crc32(symbol.encode()),count,ord(unit[0]),first])
+        shock = math.sqrt(self.correlation) * market + math.sqrt(1.0 - self.correlation) * rng.standard_normal(len(index))
+
+        log_returns = (self.drift - 0.5 * sigma * sigma) * dt + sigma * math.sqrt(dt) * shock
+        path = np.cumsum(log_returns)
+        close = np.exp(self.log_price[slot] + path - path[-1])
+        open_ = np.concatenate(([close[0] * math.exp(-log_returns[0])],close[:-1]))
+        wick = np.abs(rng.standard_normal(len(index))) * sigma * math.sqrt(dt) / 2
+        bar_volume = self.daily_volume[slot] * count * BAR_SECONDS[unit] / SESSION_SECONDS
+
+        return pd.DataFrame({
+            'open': open_,
+            'high': np.maximum(open_,close) * (1.0 + wick),
+            'low': np.minimum(open_,close) * (1.0 - wick),
+            'close': close,
+            'volume': rng.poisson(bar_volume,len(index)),
+        },index=index)
+
+    async def is_available(self) -> bool:
+        """Always available: nothing is fetched"""
+        return True
@@ -1,21 +1,47 @@
 import yfinance as yf
+import numpy as np
 import pandas as pd
 from typing import List,Dict,Optional
 from datetime import datetime,timedelta
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from .base import BaseDataProvider
+from .rate_limiter import RateLimitExceeded
+from app.schemas.quote import Quote
 
 
 class YFinanceProvider(BaseDataProvider):
-    """Yahoo Finance data provider (free, no API key needed)"""
+    """
+    Yahoo Finance data provider (free, no API key needed)
 
-    def __init__(self):
+    In bulk mode get_quotes downloads recent bars for all symbols in one
+    batched yf.download call; bid/ask (a slow per-symbol ticker.info call)
+    is only fetched when fetch_bid_ask is enabled
+    """
+
+    def __init__(
+            self,
+            bulk_quotes: bool = True,
+            fetch_bid_ask: bool = False,
+            bulk_chunk_size: int = 200,
+            download=None
+    ):
         super().__init__(api_key=None)
         self.executor = ThreadPoolExecutor(max_workers=10)
+        self.supports_bulk_quotes = bulk_quotes
+        self.fetch_bid_ask = fetch_bid_ask
+        self.bulk_chunk_size = bulk_chunk_size
+        # Injectable so the bulk path can run against a local stand-in
+        self._download = download or yf.download
 
-    async def get_quote(self,symbol: str) -> Dict:
+    async def get_quote(self,symbol: str) -> Quote:
         """Get real-time quote from Yahoo Finance"""
+        try:
+            await self.acquire_rate_limit()
+        except RateLimitExceeded as e:
+            print(f"Yahoo Finance rate limit for {symbol}: {e}")
+            return Quote.empty(symbol)
+
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(
             self.executor,
@@ -23,20 +49,20 @@ class YFinanceProvider(BaseDataProvider):
             symbol
         )
 
-    def _get_quote_sync(self,symbol: str) -> Dict:
+    def _get_quote_sync(self,symbol: str) -> Quote:
         """Synchronous quote fetch"""
         try:
             ticker = yf.Ticker(symbol)
-            info = ticker.info
             hist = ticker.history(period="2d")
 
             if hist.empty:
-                return self._empty_quote(symbol)
+                return Quote.empty(symbol)
 
             current_price = hist['Close'].iloc[-1]
             prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
             change = current_price - prev_close
             change_percent = (change / prev_close * 100) if prev_close > 0 else 0
+            bid,ask = self._get_bid_ask(ticker,current_price)
 
             return self.format_quote({
                 'symbol': symbol,
@@ -50,28 +76,134 @@ class YFinanceProvider(BaseDataProvider):
                 'low': float(hist['Low'].iloc[-1]),
                 'close': float(current_price),
                 'prev_close': float(prev_close),
-                'bid': info.get('bid',current_price),
-                'ask': info.get('ask',current_price),
+                'bid': bid,
+                'ask': ask,
             })
         except Exception as e:
             print(f"Error fetching quote for {symbol}: {e}")
-            return self._empty_quote(symbol)
-
-    def _empty_quote(self,symbol: str) -> Dict:
-        """Return empty quote structure"""
-        return self.format_quote({
-            'symbol': symbol,
-            'price': 0.0,
-            'change': 0.0,
-            'change_percent': 0.0,
-            'volume': 0,
-            'timestamp': datetime.now(),
-        })
-
-    async def get_quotes(self,symbols: List[str]) -> List[Dict]:
-        """Get quotes for multiple symbols concurrently"""
-        tasks = [self.get_quote(symbol) for symbol in symbols]
-        return await asyncio.gather(*tasks)
+            return Quote.empty(symbol)
+
+    def _get_bid_ask(self,ticker,price: float):
+        """Bid/ask from ticker.info when enabled, otherwise the last price"""
+        if not self.fetch_bid_ask:
+            return float(price),float(price)
+        try:
+            info = ticker.info
+            return info.get('bid',price),info.get('ask',price)
+        except Exception as e:
+            print(f"Error fetching bid/ask for {ticker.ticker}: {e}")
+            return float(price),float(price)
+
+    def _get_quotes_bulk_sync(self,symbols: List[str]) -> List[Quote]:
+        """Fetch the last bars for all symbols in one batched download"""
+        try:
+            # A few days back so every symbol has two bars across holidays
+            # and weekend-only crypto rows
+            frame = self._download(
+                symbols,
+                period="5d",
+                interval="1d",
+                group_by="column",
+                auto_adjust=False,
+                progress=False,
+                threads=True
+            )
+        except Exception as e:
+            print(f"Error fetching bulk quotes for {len(symbols)} symbols: {e}")
+            return [Quote.empty(symbol) for symbol in symbols]
+
+        if frame is None or frame.empty:
+            return [Quote.empty(symbol) for symbol in symbols]
+
+        return self._quotes_from_frame(frame,symbols)
+
+    def _quotes_from_frame(self,frame: pd.DataFrame,symbols: List[str]) -> List[Quote]:
+        """Compute quotes for all symbols in one vectorized pass over the bars"""
+        if not isinstance(frame.columns,pd.MultiIndex):
+            # Single-symbol downloads may come back with flat columns
+            frame = pd.concat({symbols[0]: frame},axis=1).swaplevel(axis=1)
+
+        fields = {
+            field: frame[field].reindex(columns=symbols).to_numpy(dtype=float)
+            for field in ('Open','High','Low','Close','Volume')
+        }
+        close = fields['Close']
+        columns = np.arange(len(symbols))
+
+        # Number of valid bars at or after each row picks out the last and
+        # second-to-last bar per symbol regardless of gaps in the index
+        valid = ~np.isnan(close)
+        remaining = valid[::-1].cumsum(axis=0)[::-1]
+        last_row = np.argmax(valid & (remaining == 1),axis=0)
+        prev_row = np.argmax(valid & (remaining == 2),axis=0)
+        has_last = remaining[0] >= 1
+        has_prev = remaining[0] >= 2
+
+        price = close[last_row,columns]
+        prev_close = np.where(has_prev,close[prev_row,columns],price)
+        change = price - prev_close
+        change_percent = np.divide(
+            change * 100,
+            prev_close,
+            out=np.zeros_like(change),
+            where=prev_close > 0
+        )
+        last_bar = {
+            field: np.nan_to_num(values[last_row,columns])
+            for field,values in fields.items()
+        }
+        timestamps = frame.index[last_row]
+
+        quotes = []
+        for i,symbol in enumerate(symbols):
+            if not has_last[i]:
+                quotes.append(Quote.empty(symbol))
+                continue
+
+            bid,ask = float(price[i]),float(price[i])
+            if self.fetch_bid_ask:
+                bid,ask = self._get_bid_ask(yf.Ticker(symbol),price[i])
+
+            quotes.append(Quote(
+                symbol,
+                price=float(price[i]),
+                change=float(change[i]),
+                change_percent=float(change_percent[i]),
+                volume=int(last_bar['Volume'][i]),
+                timestamp=timestamps[i],
+                open=float(last_bar['Open'][i]),
+                high=float(last_bar['High'][i]),
+                low=float(last_bar['Low'][i]),
+                close=float(price[i]),
+                prev_close=float(prev_close[i]),
+                bid=bid,
+                ask=ask,
+            ))
+        return quotes
+
+    async def get_quotes(self,symbols: List[str]) -> List[Quote]:
+        """Get quotes for multiple symbols (batched download in bulk mode)"""
+        if not self.supports_bulk_quotes:
+            tasks = [self.get_quote(symbol) for symbol in symbols]
+            return await asyncio.gather(*tasks)
+
+        chunks = [
+            symbols[i:i + self.bulk_chunk_size]
+            for i in range(0,len(symbols),self.bulk_chunk_size)
+        ]
+        results = await asyncio.gather(*[self._get_quotes_bulk(chunk) for chunk in chunks])
+        return [quote for chunk_quotes in results for quote in chunk_quotes]
+
+    async def _get_quotes_bulk(self,symbols: List[str]) -> List[Quote]:
+        """One batched download, costing a single rate limit token"""
+        try:
+            await self.acquire_rate_limit()
+        except RateLimitExceeded as e:
+            print(f"Yahoo Finance rate limit for {len(symbols)} symbols: {e}")
+            return [Quote.empty(symbol) for symbol in symbols]
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor,self._get_quotes_bulk_sync,symbols)
 
     async def get_historical(
             self,
@@ -81,6 +213,12 @@ class YFinanceProvider(BaseDataProvider):
             interval: str = "1d"
     ) -> pd.DataFrame:
         """Get historical data"""
+        try:
+            await self.acquire_rate_limit()
+        except RateLimitExceeded as e:
+            print(f"Yahoo Finance rate limit for historical {symbol}: {e}")
+            return pd.DataFrame()
+
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(
             self.executor,
@@ -0,0 +1,332 @@
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from datetime import datetime
+from typing import AsyncIterator,Dict,List,Optional,Set,Tuple
+from app.schemas.quote import Quote
+from app.utils.json_encoding import dumps
+
+# Fields sent as ISO strings that decode back to datetimes
+_DATETIME_FIELDS = ('timestamp','as_of')
+
+
+def encode(payload) -> bytes:
+    return dumps(payload)
+
+
+def decode(data: bytes):
+    return json.loads(data)
+
+
+def decode_fields(fields: Dict) -> Dict:
+    """Quote fields from a decoded payload, with datetimes restored"""
+    for name in _DATETIME_FIELDS:
+        value = fields.get(name)
+        if isinstance(value,str):
+            fields[name] = datetime.fromisoformat(value)
+    return fields
+
+
+def decode_quote(data: bytes) -> Quote:
+    return Quote.from_dict(decode_fields(decode(data)))
+
+
+class MemoryBackend:
+    """
+    In-process stand-in for Redis: expiring keys, leases and pub/sub
+    Shared only by the services of one worker; used when Redis is not
+    configured or reachable, and as the test double for RedisBackend.
+    """
+
+    name = 'memory'
+
+    def __init__(self,max_pending: int = 1000):
+        self.max_pending = max_pending
+        self._values: Dict[str,Tuple[Optional[float],bytes]] = {}
+        self._channels: Dict[str,Set[asyncio.Queue]] = {}
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        self._values.clear()
+
+    def _lookup(self,key: str) -> Optional[bytes]:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        expires,value = entry
+        if expires is not None and expires <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    async def get(self,key: str) -> Optional[bytes]:
+        return self._lookup(key)
+
+    async def mget(self,keys: List[str]) -> List[Optional[bytes]]:
+        return [self._lookup(key) for key in keys]
+
+    async def set(self,key: str,value: bytes,ttl: Optional[float] = None):
+        self._values[key] = (time.monotonic() + ttl if ttl else None,value)
+
+    async def mset(self,values: Dict[str,bytes],ttl: Optional[float] = None):
+        expires = time.monotonic() + ttl if ttl else None
+        for key,value in values.items():
+            self._values[key] = (expires,value)
+
+    async def hold(self,key: str,token: str,ttl: float) -> bool:
+        """Take or extend a lease on key for token; False if another token holds it"""
+        current = self._lookup(key)
+        if current is not None and current != token.encode():
+            return False
+        self._values[key] = (time.monotonic() + ttl,token.encode())
+        return True
+
+    async def release(self,key: str,token: str):
+        if self._lookup(key) == token.encode():
+            del self._values[key]
+
+    async def publish(self,channel: str,message: bytes):
+        for queue in self._channels.get(channel,()):
+            if queue.full():
+                # A subscriber that stopped reading loses its oldest message
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def listen(self,channel: str) -> AsyncIterator[bytes]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        self._channels.setdefault(channel,set()).add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._channels[channel].discard(queue)
+
+
+class RedisBackend:
+    """Redis keys, leases and pub/sub shared by every worker"""
+
+    name = 'redis'
+
+    # Take the lease if free, extend it if already ours
+    HOLD = """
+        local current = redis.call('get', KEYS[1])
+        if current == ARGV[1] then
+            redis.call('pexpire', KEYS[1], ARGV[2])
+            return 1
+        end
+        if not current then
+            redis.call('set', KEYS[1], ARGV[1], 'PX', ARGV[2])
+            return 1
+        end
+        return 0
+    """
+    RELEASE = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(
+            self,
+            host: str = "localhost",
+            port: int = 6379,
+            db: int = 0,
+            password: Optional[str] = None,
+            connect_timeout: float = 1.0,
+            client=None
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.connect_timeout = connect_timeout
+        self.client = client
+
+    async def connect(self):
+        if self.client is None:
+            import redis.asyncio as redis
+            from redis.asyncio.retry import Retry
+            from redis.backoff import ExponentialBackoff
+            self.client = redis.Redis(
+                host=self.host,
+                port=self.port,
+                db=self.db,
+                password=self.password,
+                socket_connect_timeout=self.connect_timeout,
+                # Fail over to the in-process backend quickly rather than retrying for seconds
+                retry=Retry(ExponentialBackoff(cap=0.5,base=0.05),retries=2)
+            )
+        await self.client.ping()
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get(self,key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def mget(self,keys: List[str]) -> List[Optional[bytes]]:
+        return await self.client.mget(keys) if keys else []
+
+    async def set(self,key: str,value: bytes,ttl: Optional[float] = None):
+        await self.client.set(key,value,px=int(ttl * 1000) if ttl else None)
+
+    async def mset(self,values: Dict[str,bytes],ttl: Optional[float] = None):
+        # One round trip for the whole batch
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key,value in values.items():
+                pipe.set(key,value,px=int(ttl * 1000) if ttl else None)
+            await pipe.execute()
+
+    async def hold(self,key: str,token: str,ttl: float) -> bool:
+        return bool(await self.client.eval(self.HOLD,1,key,token,int(ttl * 1000)))
+
+    async def release(self,key: str,token: str):
+        await self.client.eval(self.RELEASE,1,key,token)
+
+    async def publish(self,channel: str,message: bytes):
+        await self.client.publish(channel,message)
+
+    async def listen(self,channel: str) -> AsyncIterator[bytes]:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    yield message['data']
+        finally:
+            await pubsub.aclose()
+
+
+class WorkerCoordinator:
+    """
+    Shared cache backend and upstream poller election across workers
+
+    Connects to Redis (data.shared.backend redis or auto) and falls back to
+    an in-process MemoryBackend when it is not reachable, in which case
+    each worker polls for itself as before. Workers compete for a lease on
+    the poller key: the holder renews it every lease/3 seconds and is the
+    only worker polling upstream, while the others follow its published
+    snapshots. If the holder dies its lease expires and another worker
+    takes over. A backend error while renewing keeps the worker polling,
+    so quotes keep flowing when Redis goes away.
+
+    The backend is connected in the background; wait_ready() returns once
+    this worker's role is known.
+    """
+
+    def __init__(
+            self,
+            backend: str = "auto",
+            key_prefix: str = "aqpm",
+            lease: float = 15.0,
+            settings=None,
+            client=None
+    ):
+        self.kind = backend
+        self.key_prefix = key_prefix
+        self.lease = lease
+        self.settings = settings
+        self.client = client
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.backend = None
+        self.is_leader = False
+        self.elections = 0
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls,config_manager=None) -> "WorkerCoordinator":
+        """Coordinator using data.shared settings and the Redis settings"""
+        if config_manager is None:
+            from app.core.config import config_manager
+        shared_config = config_manager.get_shared_config()
+        return cls(
+            backend=shared_config.get('backend','auto'),
+            key_prefix=shared_config.get('key_prefix','aqpm'),
+            lease=shared_config.get('lease',15.0),
+            settings=config_manager.settings
+        )
+
+    def key(self,name: str) -> str:
+        return f"{self.key_prefix}:{name}"
+
+    @property
+    def ready(self) -> bool:
+        return self._ready is not None and self._ready.is_set()
+
+    async def wait_ready(self):
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        await self._ready.wait()
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            if self._ready is None:
+                self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.backend is not None:
+            try:
+                if self.is_leader:
+                    await self.backend.release(self.key('poller'),self.worker_id)
+                await self.backend.close()
+            except Exception as e:
+                print(f"Shared backend shutdown failed: {e}")
+        self.is_leader = False
+
+    async def _connect(self):
+        if self.kind in ("auto","redis"):
+            settings = self.settings
+            backend = RedisBackend(
+                host=getattr(settings,'redis_host','localhost'),
+                port=getattr(settings,'redis_port',6379),
+                db=getattr(settings,'redis_db',0),
+                password=getattr(settings,'redis_password',None),
+                client=self.client
+            )
+            try:
+                await backend.connect()
+                return backend
+            except Exception as e:
+                print(f"Redis unavailable ({e}); quotes are shared within this worker only")
+        return MemoryBackend()
+
+    async def _run(self):
+        self.backend = await self._connect()
+        while True:
+            try:
+                leader = await self.backend.hold(self.key('poller'),self.worker_id,self.lease)
+            except Exception as e:
+                print(f"Poller lease renewal failed: {e}")
+                leader = True
+            if leader != self.is_leader:
+                self.is_leader = leader
+                self.elections += 1
+                print(f"Worker {self.worker_id} {'polls upstream' if leader else 'follows the shared snapshot'}")
+            self._ready.set()
+            await asyncio.sleep(self.lease / 3)
+
+    def status(self) -> Dict:
+        return {
+            'worker_id': self.worker_id,
+            'backend': self.backend.name if self.backend is not None else None,
+            'leader': self.is_leader,
+            'elections': self.elections,
+            'lease': self.lease,
+        }
@@ -0,0 +1,215 @@
+import asyncio
+import time
+from typing import Callable,List,Dict,Optional
+from datetime import datetime
+from app.data.providers.rate_limiter import Priority,priority_scope
+from app.data.shared import decode,decode_fields,encode
+from app.data.streaming import quote_delta
+from app.schemas.quote import Quote
+
+
+class QuoteSnapshotService:
+    """
+    Keeps an in-memory snapshot of watchlist quotes up to date
+
+    A background task refreshes the watchlist every update interval, so
+    request handlers answer from memory instead of calling upstream. Each
+    quote carries an as_of timestamp of when it was fetched; a symbol that
+    fails to refresh keeps its last good quote.
+
+    With a WorkerCoordinator only the elected worker polls upstream. It
+    stores each snapshot in the shared backend and publishes the refresh's
+    deltas, which the other workers apply as their own refresh, so
+    listeners run the same in every worker. A follower that misses a
+    message (its version skips) reloads the stored snapshot.
+    """
+
+    def __init__(self,data_aggregator,symbols: List[str],interval: float = 60,coordinator=None):
+        self.data_aggregator = data_aggregator
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.coordinator = coordinator
+        self.version = 0
+        self.quotes: Dict[str,Quote] = {}
+        self.refreshed_at: Optional[datetime] = None
+        self.refresh_count = 0
+        self.last_refresh_duration = 0.0
+        self._watchlist_quotes: List[Quote] = []
+        self._task: Optional[asyncio.Task] = None
+        self._follow_task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Dict[str,Dict]],None]] = []
+
+    def add_listener(self,listener: Callable[[Dict[str,Dict]],None]):
+        """Register a callback receiving {symbol: changed fields} per refresh"""
+        self._listeners.append(listener)
+
+    @property
+    def ready(self) -> bool:
+        """Whether at least one refresh has completed"""
+        return self.refreshed_at is not None
+
+    @property
+    def polling(self) -> bool:
+        """Whether this worker fetches upstream rather than following another"""
+        return self.coordinator is None or self.coordinator.is_leader
+
+    async def start(self):
+        """Start the background refresh loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background refresh loop"""
+        for task in (self._task,self._follow_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._follow_task = None
+
+    async def _run(self):
+        if self.coordinator is not None:
+            await self.coordinator.wait_ready()
+            self._follow_task = asyncio.create_task(self._follow())
+        while True:
+            started = time.monotonic()
+            try:
+                if self.polling:
+                    await self.refresh()
+                elif not self.ready:
+                    await self.load_shared()
+            except Exception as e:
+                print(f"Watchlist refresh failed: {e}")
+            # Keep a fixed cadence regardless of how long the refresh took
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(0.0,self.interval - elapsed))
+
+    async def refresh(self):
+        """Fetch the watchlist once, bypassing the quote cache"""
+        started = time.monotonic()
+        with priority_scope(Priority.WATCHLIST):
+            quotes = await self.data_aggregator.get_quotes(self.symbols,use_cache=False)
+
+        deltas = {}
+        for quote in quotes:
+            symbol = quote.symbol
+            if (quote.stale or quote.price <= 0) and symbol in self.quotes:
+                continue
+
+            delta = quote_delta(self.quotes.get(symbol),quote)
+            if delta:
+                deltas[symbol] = delta
+            self.quotes[symbol] = quote
+
+        self.version += 1
+        self._commit(deltas,started)
+        if self.coordinator is not None and self.coordinator.backend is not None:
+            await self.publish(deltas)
+
+    def _commit(self,deltas: Dict[str,Dict],started: float):
+        # Prebuilt list so the default watchlist response is a single lookup
+        self._watchlist_quotes = [
+            self.quotes[symbol] for symbol in self.symbols if symbol in self.quotes
+        ]
+        self.refreshed_at = datetime.now()
+        self.refresh_count += 1
+        self.last_refresh_duration = time.monotonic() - started
+
+        for listener in self._listeners:
+            try:
+                listener(deltas)
+            except Exception as e:
+                print(f"Snapshot listener failed: {e}")
+
+    # Sharing across workers
+
+    async def publish(self,deltas: Dict[str,Dict]):
+        """Store the snapshot and publish this refresh's deltas to the other workers"""
+        coordinator = self.coordinator
+        header = {'worker': coordinator.worker_id,'version': self.version}
+        try:
+            await coordinator.backend.set(
+                coordinator.key('snapshot'),
+                encode({**header,'quotes': [quote.to_dict() for quote in self.quotes.values()]})
+            )
+            await coordinator.backend.publish(coordinator.key('deltas'),encode({**header,'deltas': deltas}))
+        except Exception as e:
+            print(f"Snapshot publish failed: {e}")
+
+    async def load_shared(self) -> bool:
+        """Replace the snapshot with the one stored by the polling worker"""
+        coordinator = self.coordinator
+        started = time.monotonic()
+        data = await coordinator.backend.get(coordinator.key('snapshot'))
+        if data is None:
+            return False
+        snapshot = decode(data)
+
+        deltas = {}
+        for fields in snapshot['quotes']:
+            quote = Quote.from_dict(decode_fields(fields))
+            delta = quote_delta(self.quotes.get(quote.symbol),quote)
+            if delta:
+                deltas[quote.symbol] = delta
+            self.quotes[quote.symbol] = quote
+        self.version = snapshot['version']
+        self._commit(deltas,started)
+        return True
+
+    def apply(self,version: int,deltas: Dict[str,Dict]):
+        """Apply deltas published by the polling worker as a refresh"""
+        started = time.monotonic()
+        for symbol,delta in deltas.items():
+            delta = decode_fields(delta)
+            current = self.quotes.get(symbol)
+            if current is None:
+                quote = Quote.from_dict(delta)
+            else:
+                # A new object, as a refresh would give, for readers holding the old one
+                quote = current.copy()
+                for field,value in delta.items():
+                    if field in Quote.FIELDS:
+                        setattr(quote,field,value)
+            self.quotes[symbol] = quote
+        self.version = version
+        self._commit(deltas,started)
+
+    async def _follow(self):
+        coordinator = self.coordinator
+        async for data in coordinator.backend.listen(coordinator.key('deltas')):
+            try:
+                message = decode(data)
+                if message['worker'] == coordinator.worker_id or self.polling:
+                    continue
+                if self.ready and message['version'] == self.version + 1:
+                    self.apply(message['version'],message['deltas'])
+                else:
+                    # First message, a missed one, or a new poller: resync in full
+                    await self.load_shared()
+            except Exception as e:
+                print(f"Shared snapshot update failed: {e}")
+
+    def get_watchlist_quotes(self) -> List[Quote]:
+        """Latest quotes for the whole watchlist"""
+        return self._watchlist_quotes
+
+    def get_quotes(self,symbols: List[str]) -> Optional[List[Quote]]:
+        """Latest quotes for symbols, or None if any is not in the snapshot"""
+        quotes = [self.quotes.get(symbol) for symbol in symbols]
+        if any(quote is None for quote in quotes):
+            return None
+        return quotes
+
+    def status(self) -> Dict:
+        return {
+            'symbols': len(self.symbols),
+            'interval': self.interval,
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None,
+            'refresh_count': self.refresh_count,
+            'last_refresh_duration': self.last_refresh_duration,
+            'version': self.version,
+            'polling': self.polling,
+        }
@@ -0,0 +1,415 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any,Deque,Dict,List,Optional
+
+TABLES = ('quotes','orders','fills','positions')
+
+
+def _build_tables(metadata):
+    """Audit trail tables, each indexed for (symbol, time range) queries"""
+    from sqlalchemy import Column,DateTime,Float,Index,Integer,String,Table,Text
+
+    return {
+        'quotes': Table(
+            'quotes',metadata,
+            Column('id',Integer,primary_key=True),
+            Column('symbol',String(32),nullable=False),
+            Column('price',Float),
+            Column('bid',Float),
+            Column('ask',Float),
+            Column('volume',Integer),
+            Column('provider',String(32)),
+            Column('timestamp',DateTime,nullable=False),
+            Index('ix_quotes_symbol_timestamp','symbol','timestamp'),
+        ),
+        'orders': Table(
+            'orders',metadata,
+            Column('id',Integer,primary_key=True),
+            Column('order_key',String(96),nullable=False),
+            Column('order_id',Integer,nullable=False),
+            Column('symbol',String(32),nullable=False),
+            Column('quantity',Float),
+            Column('order_type',String(16)),
+            Column('limit_price',Float),
+            Column('status',String(16)),
+            Column('fill_price',Float),
+            Column('commission',Float),
+            Column('reason',Text),
+            Column('created_at',DateTime),
+            Column('timestamp',DateTime,nullable=False),
+            Index('ix_orders_symbol_timestamp','symbol','timestamp'),
+            Index('ix_orders_order_key','order_key'),
+        ),
+        'fills': Table(
+            'fills',metadata,
+            Column('id',Integer,primary_key=True),
+            Column('order_key',String(96),nullable=False),
+            Column('order_id',Integer,nullable=False),
+            Column('symbol',String(32),nullable=False),
+            Column('quantity',Float),
+            Column('price',Float),
+            Column('commission',Float),
+            Column('timestamp',DateTime,nullable=False),
+            Index('ix_fills_symbol_timestamp','symbol','timestamp'),
+            Index('ix_fills_order_key','order_key'),
+        ),
+        'positions': Table(
+            'positions',metadata,
+            Column('id',Integer,primary_key=True),
+            Column('symbol',String(32),nullable=False),
+            Column('quantity',Float),
+            Column('cost',Float),
+            Column('price',Float),
+            Column('market_value',Float),
+            Column('unrealized_pnl',Float),
+            Column('timestamp',DateTime,nullable=False),
+            Index('ix_positions_symbol_timestamp','symbol','timestamp'),
+        ),
+    }
+
+
+class Database:
+    """
+    Async audit trail of quotes, orders, fills and positions on database_url
+
+    record_*() only appends a row to an in-memory buffer, so the quote and
+    order paths never wait on the database. A background task writes the
+    buffers in one transaction of bulk inserts whenever batch_size rows are
+    pending or flush_interval seconds have passed. Rows of a failed flush
+    are kept and retried; past max_pending the oldest rows are dropped and
+    counted. SQLite databases run in WAL mode, so reads proceed while a
+    flush writes.
+
+    Quotes are recorded from snapshot refreshes and orders, fills and the
+    resulting positions from the execution simulator's order updates.
+    Order ids restart in every process, so orders and fills are keyed by
+    order_key, "{worker_id}/{order id}", unique across workers and
+    restarts. Workers starting together may race to create the tables;
+    the losers retry.
+    SQLAlchemy is imported when the database starts, in the background, so
+    the application starts without it.
+    """
+
+    CREATE_ATTEMPTS = 5
+
+    def __init__(
+            self,
+            url: str,
+            snapshot_service=None,
+            risk_engine=None,
+            worker_id: Optional[str] = None,
+            batch_size: int = 500,
+            flush_interval: float = 1.0,
+            max_pending: int = 100000,
+            pool_size: int = 5,
+            record_quotes: bool = True
+    ):
+        self.url = url
+        self.snapshot_service = snapshot_service
+        self.risk_engine = risk_engine
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pool_size = pool_size
+        self.record_quotes = record_quotes
+        self.engine = None
+        self.tables: Dict[str,Any] = {}
+
+        self._buffers: Dict[str,Deque[Dict]] = {name: deque() for name in TABLES}
+        self._pending = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+        self.last_flush_rows = 0
+
+    @classmethod
+    def from_config(
+            cls,
+            snapshot_service=None,
+            risk_engine=None,
+            config_manager=None,
+            worker_id: Optional[str] = None
+    ) -> "Database":
+        """Database on settings.database_url with write-behind settings from database config"""
+        if config_manager is None:
+            from app.core.config import config_manager
+        database_config = dict(config_manager.get_database_config())
+        database_config.pop('enabled',None)
+        return cls(
+            config_manager.settings.database_url,
+            snapshot_service,
+            risk_engine,
+            worker_id=worker_id,
+            **database_config
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.engine is not None
+
+    @property
+    def sqlite(self) -> bool:
+        return self.url.startswith('sqlite')
+
+    async def start(self):
+        """Open the database and start flushing in the background"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush what is buffered, then close the pool"""
+        if self._task is not None:
+            # Let the loop finish its current flush rather than cancelling it
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self.engine is not None:
+            await self.flush()
+            await self.engine.dispose()
+            self.engine = None
+
+    async def _connect(self):
+        from sqlalchemy import MetaData,event
+        from sqlalchemy.exc import DBAPIError
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        options: Dict[str,Any] = {}
+        if self.sqlite:
+            path = self.url.split(':///',1)[-1]
+            if path and path != ':memory:':
+                Path(path).parent.mkdir(parents=True,exist_ok=True)
+        else:
+            options.update(pool_size=self.pool_size,max_overflow=self.pool_size,pool_pre_ping=True)
+        engine = create_async_engine(self.url,**options)
+
+        if self.sqlite:
+            @event.listens_for(engine.sync_engine,'connect')
+            def _sqlite_pragmas(connection,record):
+                cursor = connection.cursor()
+                # WAL lets readers run during a flush; NORMAL sync is durable in WAL mode
+                cursor.execute('PRAGMA journal_mode=WAL')
+                cursor.execute('PRAGMA synchronous=NORMAL')
+                cursor.close()
+
+        metadata = MetaData()
+        tables = _build_tables(metadata)
+        for attempt in range(self.CREATE_ATTEMPTS):
+            try:
+                async with engine.begin() as connection:
+                    await connection.run_sync(metadata.create_all)
+                break
+            except DBAPIError:
+                # Another worker created a table (or held the SQLite write
+                # lock) between the existence check and the CREATE
+                if attempt == self.CREATE_ATTEMPTS - 1:
+                    await engine.dispose()
+                    raise
+                await asyncio.sleep(0.1 * (attempt + 1))
+        self.tables = tables
+        self.engine = engine
+
+    async def _run(self):
+        try:
+            await self._connect()
+            print(f"Audit database ready ({self.url.split('://',1)[0]})")
+        except Exception as e:
+            print(f"Audit database unavailable: {e}")
+            return
+
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(),self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._stopping:
+                await self.flush()
+
+    async def flush(self) -> int:
+        """Write every buffered row in one transaction; returns the rows written"""
+        if self.engine is None or not self._pending:
+            return 0
+        from sqlalchemy import insert
+
+        batches = {}
+        for name,buffer in self._buffers.items():
+            if buffer:
+                batches[name] = list(buffer)
+                buffer.clear()
+        rows = sum(len(batch) for batch in batches.values())
+        self._pending -= rows
+
+        started = time.perf_counter()
+        try:
+            async with self.engine.begin() as connection:
+                for name,batch in batches.items():
+                    await connection.execute(insert(self.tables[name]),batch)
+        except BaseException as e:
+            # Keep the rows ahead of anything recorded since, for the next
+            # flush, also when the flush itself is cancelled
+            for name,batch in batches.items():
+                self._buffers[name].extendleft(reversed(batch))
+            self._pending += rows
+            self._trim()
+            if not isinstance(e,Exception):
+                raise
+            print(f"Audit flush of {rows} rows failed: {e}")
+            self.failed_flushes += 1
+            return 0
+
+        self.written += rows
+        self.flushes += 1
+        self.last_flush_rows = rows
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        return rows
+
+    # Recording
+
+    def _append(self,table: str,row: Dict):
+        self._buffers[table].append(row)
+        self._pending += 1
+        if self._pending > self.max_pending:
+            self._trim()
+        if self._pending >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _trim(self):
+        while self._pending > self.max_pending:
+            largest = max(self._buffers.values(),key=len)
+            largest.popleft()
+            self._pending -= 1
+            self.dropped += 1
+
+    def record_quote(self,quote):
+        self._append('quotes',{
+            'symbol': quote.symbol,
+            'price': quote.price,
+            'bid': quote.bid,
+            'ask': quote.ask,
+            'volume': quote.volume,
+            'provider': quote.provider,
+            'timestamp': quote.as_of or quote.timestamp,
+        })
+
+    def order_key(self,order) -> str:
+        """Key of an order unique across workers and restarts"""
+        return f"{self.worker_id}/{order.id}"
+
+    def record_order(self,order):
+        self._append('orders',{
+            'order_key': self.order_key(order),
+            'order_id': order.id,
+            'symbol': order.symbol,
+            'quantity': order.quantity,
+            'order_type': order.order_type,
+            'limit_price': order.limit_price,
+            'status': order.status,
+            'fill_price': order.fill_price,
+            'commission': order.commission,
+            'reason': order.reason,
+            'created_at': order.created_at,
+            'timestamp': datetime.now(),
+        })
+
+    def record_fill(self,order):
+        self._append('fills',{
+            'order_key': self.order_key(order),
+            'order_id': order.id,
+            'symbol': order.symbol,
+            'quantity': order.quantity,
+            'price': order.fill_price,
+            'commission': order.commission,
+            'timestamp': order.filled_at or datetime.now(),
+        })
+
+    def record_position(self,symbol: str,position: Dict):
+        self._append('positions',{
+            'symbol': symbol,
+            'quantity': position['quantity'],
+            'cost': position['cost'],
+            'price': position['price'],
+            'market_value': position['market_value'],
+            'unrealized_pnl': position['unrealized_pnl'],
+            'timestamp': datetime.now(),
+        })
+
+    # Listeners
+
+    def on_refresh(self,deltas: Dict[str,Dict]):
+        """Snapshot listener recording the quotes that changed"""
+        # Only the polling worker records, not every worker following it
+        if not self.record_quotes or self.snapshot_service is None or not self.snapshot_service.polling:
+            return
+        quotes = self.snapshot_service.quotes
+        for symbol in deltas:
+            quote = quotes.get(symbol)
+            if quote is not None:
+                self.record_quote(quote)
+
+    def on_order(self,order):
+        """Order listener recording each status change, and the fill and position it leaves"""
+        self.record_order(order)
+        if order.status != "filled":
+            return
+        self.record_fill(order)
+        if self.risk_engine is not None:
+            position = self.risk_engine.position(order.symbol)
+            if position is not None:
+                self.record_position(order.symbol,position)
+
+    # Queries
+
+    async def query(
+            self,
+            table: str,
+            symbol: Optional[str] = None,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            limit: int = 1000
+    ) -> List[Dict]:
+        """Rows of a table for a symbol and [start, end) range, newest first"""
+        if self.engine is None:
+            raise RuntimeError("Database is not ready")
+        from sqlalchemy import select
+
+        model = self.tables[table]
+        statement = select(model)
+        if symbol is not None:
+            statement = statement.where(model.c.symbol == symbol)
+        if start is not None:
+            statement = statement.where(model.c.timestamp >= start)
+        if end is not None:
+            statement = statement.where(model.c.timestamp < end)
+        statement = statement.order_by(model.c.timestamp.desc()).limit(limit)
+
+        async with self.engine.connect() as connection:
+            result = await connection.execute(statement)
+            return [dict(row._mapping) for row in result]
+
+    def status(self) -> Dict:
+        return {
+            'ready': self.ready,
+            'pending': self._pending,
+            'written': self.written,
+            'dropped': self.dropped,
+            'flushes': self.flushes,
+            'failed_flushes': self.failed_flushes,
+            'last_flush_rows': self.last_flush_rows,
+            'last_flush_ms': self.last_flush_ms,
+        }
@@ -0,0 +1,340 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import List,Dict,Optional,Tuple
+from datetime import datetime
+from app.utils.file_lock import file_lock
+
+
+class OHLCVStore:
+    """
+    Partitioned columnar store for OHLCV bars
+
+    Layout: {root}/{symbol}/{interval}/{year}.v{n}/{column}.npy with one
+    int64 UTC-nanosecond 'timestamp' array per partition and one array per
+    data column, read back through memory maps. A meta.json per
+    symbol/interval keeps the column schema, the source timezone, the time
+    ranges that have already been fetched, so callers only download the
+    gaps, and the current directory of each year.
+
+    Writers never modify a partition in place: they write a new version
+    directory and switch meta.json to it atomically, so readers in other
+    threads or processes always find a complete partition. A reader that
+    loaded meta.json just before a switch retries with the new one.
+    Writers of one symbol/interval, in any thread or process, take turns
+    through a lock file in the series directory.
+    """
+
+    TIMESTAMP = 'timestamp'
+    READ_ATTEMPTS = 3
+
+    def __init__(self,root: str = "data/store"):
+        self.root = Path(root)
+        self._locks: Dict[Tuple[str,str],threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def read(
+            self,
+            symbol: str,
+            interval: str,
+            start_date: Optional[datetime] = None,
+            end_date: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """Read bars in [start_date, end_date) as a DataFrame"""
+        for attempt in range(self.READ_ATTEMPTS):
+            meta = self._load_meta(symbol,interval)
+            if meta is None:
+                return pd.DataFrame()
+            try:
+                return self._read(symbol,interval,meta,start_date,end_date)
+            except FileNotFoundError:
+                # A writer replaced a partition after meta.json was loaded
+                if attempt == self.READ_ATTEMPTS - 1:
+                    raise
+
+    def _read(
+            self,
+            symbol: str,
+            interval: str,
+            meta: Dict,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime]
+    ) -> pd.DataFrame:
+        start_ns = self._to_ns(start_date) if start_date is not None else None
+        end_ns = self._to_ns(end_date) if end_date is not None else None
+
+        timestamps = []
+        columns = {column: [] for column in meta['columns']}
+        for year in self._years(symbol,interval,meta):
+            if start_ns is not None and year < pd.Timestamp(start_ns,tz='UTC').year:
+                continue
+            if end_ns is not None and year > pd.Timestamp(end_ns,tz='UTC').year:
+                continue
+
+            partition = self._partition_dir(symbol,interval,meta,year)
+            ts = np.load(partition / f"{self.TIMESTAMP}.npy",mmap_mode='r')
+            lo = 0 if start_ns is None else int(np.searchsorted(ts,start_ns,side='left'))
+            hi = len(ts) if end_ns is None else int(np.searchsorted(ts,end_ns,side='left'))
+            if hi <= lo:
+                continue
+
+            timestamps.append(np.array(ts[lo:hi]))
+            for column in meta['columns']:
+                values = np.load(partition / f"{column}.npy",mmap_mode='r')
+                columns[column].append(np.array(values[lo:hi]))
+
+        if not timestamps:
+            return pd.DataFrame()
+
+        index = pd.DatetimeIndex(np.concatenate(timestamps).view('datetime64[ns]'),tz='UTC')
+        if meta.get('tz'):
+            index = index.tz_convert(meta['tz'])
+        else:
+            index = index.tz_localize(None)
+        index.name = meta.get('index_name')
+
+        return pd.DataFrame(
+            {column: np.concatenate(parts) for column,parts in columns.items()},
+            index=index
+        )
+
+    def append(
+            self,
+            symbol: str,
+            interval: str,
+            df: pd.DataFrame,
+            covered_start: Optional[datetime] = None,
+            covered_end: Optional[datetime] = None
+    ):
+        """
+        Upsert bars into their year partitions
+        Bars with an existing timestamp replace the stored values. When a
+        covered range is given it is recorded as fetched.
+        """
+        with self._lock(symbol,interval),file_lock(self._series_dir(symbol,interval) / ".lock"):
+            meta = self._load_meta(symbol,interval)
+            if meta is None:
+                index = pd.DatetimeIndex(df.index)
+                meta = {
+                    'columns': [str(column) for column in df.columns],
+                    'tz': str(index.tz) if index.tz is not None else None,
+                    'index_name': df.index.name,
+                    'coverage': [],
+                    'partitions': {},
+                }
+
+            if not df.empty:
+                self._write_bars(symbol,interval,df,meta)
+
+            if covered_start is not None and covered_end is not None:
+                meta['coverage'] = self._merge_ranges(meta['coverage'] + [[
+                    self._to_ns(covered_start),
+                    self._to_ns(covered_end),
+                ]])
+
+            self._save_meta(symbol,interval,meta)
+            # Only now that meta.json points at the new versions
+            self._remove_unreferenced(symbol,interval,meta)
+
+    def missing_ranges(
+            self,
+            symbol: str,
+            interval: str,
+            start_date: datetime,
+            end_date: datetime,
+            min_gap: float = 0
+    ) -> List[Tuple[datetime,datetime]]:
+        """
+        Sub-ranges of [start_date, end_date) not fetched yet
+        Gaps shorter than min_gap seconds are ignored.
+        """
+        meta = self._load_meta(symbol,interval) or {'coverage': []}
+        start_ns = self._to_ns(start_date)
+        end_ns = self._to_ns(end_date)
+
+        gaps = []
+        cursor = start_ns
+        for covered_start,covered_end in meta['coverage']:
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end_ns:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor,covered_start))
+            cursor = max(cursor,covered_end)
+        if cursor < end_ns:
+            gaps.append((cursor,end_ns))
+
+        min_gap_ns = int(min_gap * 1e9)
+        return [
+            (
+                pd.Timestamp(gap_start,tz='UTC').to_pydatetime(),
+                pd.Timestamp(gap_end,tz='UTC').to_pydatetime()
+            )
+            for gap_start,gap_end in gaps
+            if gap_end - gap_start > min_gap_ns
+        ]
+
+    def last_timestamp(self,symbol: str,interval: str) -> Optional[pd.Timestamp]:
+        """Timestamp of the latest stored bar"""
+        for attempt in range(self.READ_ATTEMPTS):
+            meta = self._load_meta(symbol,interval)
+            years = self._years(symbol,interval,meta) if meta is not None else []
+            if not years:
+                return None
+            try:
+                ts = np.load(
+                    self._partition_dir(symbol,interval,meta,years[-1]) / f"{self.TIMESTAMP}.npy",
+                    mmap_mode='r'
+                )
+                break
+            except FileNotFoundError:
+                if attempt == self.READ_ATTEMPTS - 1:
+                    raise
+        if len(ts) == 0:
+            return None
+        last = pd.Timestamp(int(ts[-1]),tz='UTC')
+        return last.tz_convert(meta['tz']) if meta.get('tz') else last.tz_localize(None)
+
+    def _write_bars(self,symbol: str,interval: str,df: pd.DataFrame,meta: Dict):
+        """Merge new bars into new versions of their year partitions, updating meta"""
+        if 'partitions' not in meta:
+            # Stores written before versioned partitions
+            meta['partitions'] = {str(year): str(year) for year in self._listed_years(symbol,interval)}
+        meta['version'] = meta.get('version',0) + 1
+
+        df = df.reindex(columns=meta['columns'])
+        timestamps = self._index_to_ns(df.index)
+        years = pd.DatetimeIndex(timestamps.view('datetime64[ns]')).year.to_numpy()
+
+        for year in np.unique(years):
+            mask = years == year
+            new_ts = timestamps[mask]
+            new_columns = {
+                column: df[column].to_numpy()[mask] for column in meta['columns']
+            }
+
+            partition = self._partition_dir(symbol,interval,meta,int(year))
+            if partition is not None:
+                old_ts = np.load(partition / f"{self.TIMESTAMP}.npy")
+                merged_ts = np.concatenate([old_ts,new_ts])
+                merged = {
+                    column: np.concatenate([np.load(partition / f"{column}.npy"),values])
+                    for column,values in new_columns.items()
+                }
+            else:
+                merged_ts = new_ts
+                merged = new_columns
+
+            # Stable sort keeps later (newer) rows after older ones for the
+            # same timestamp, so keeping the last duplicate upserts
+            order = np.argsort(merged_ts,kind='stable')
+            merged_ts = merged_ts[order]
+            keep = np.append(merged_ts[1:] != merged_ts[:-1],True)
+
+            name = f"{int(year)}.v{meta['version']}.{uuid.uuid4().hex[:8]}"
+            self._write_partition(
+                self._series_dir(symbol,interval) / name,
+                merged_ts[keep],
+                {column: values[order][keep] for column,values in merged.items()}
+            )
+            meta['partitions'][str(int(year))] = name
+
+    def _write_partition(self,partition: Path,timestamps: np.ndarray,columns: Dict[str,np.ndarray]):
+        """Write a partition to a temp directory and move it into place complete"""
+        tmp = partition.with_name(f"{partition.name}.{os.getpid()}.tmp")
+        tmp.mkdir(parents=True)
+
+        np.save(tmp / f"{self.TIMESTAMP}.npy",timestamps)
+        for column,values in columns.items():
+            np.save(tmp / f"{column}.npy",values)
+
+        os.replace(tmp,partition)
+
+    def _remove_unreferenced(self,symbol: str,interval: str,meta: Dict):
+        """
+        Delete partition versions meta.json no longer points at
+        Covers the versions just superseded and leftovers of writers that
+        died mid-write. Called with the series lock held.
+        """
+        if 'partitions' not in meta:
+            return
+        current = set(meta['partitions'].values())
+        for path in self._series_dir(symbol,interval).iterdir():
+            if path.is_dir() and path.name not in current:
+                shutil.rmtree(path,ignore_errors=True)
+
+    def _lock(self,symbol: str,interval: str) -> threading.Lock:
+        """Per symbol/interval write lock among threads of this process"""
+        with self._locks_guard:
+            return self._locks.setdefault((symbol,interval),threading.Lock())
+
+    def _series_dir(self,symbol: str,interval: str) -> Path:
+        return self.root / symbol / interval
+
+    def _partition_dir(self,symbol: str,interval: str,meta: Dict,year: int) -> Optional[Path]:
+        """Current directory of a year partition, None if the year is not stored"""
+        if 'partitions' in meta:
+            name = meta['partitions'].get(str(year))
+        else:
+            name = str(year) if year in self._listed_years(symbol,interval) else None
+        return self._series_dir(symbol,interval) / name if name is not None else None
+
+    def _years(self,symbol: str,interval: str,meta: Dict) -> List[int]:
+        """Stored partition years in ascending order"""
+        if 'partitions' in meta:
+            return sorted(int(year) for year in meta['partitions'])
+        return self._listed_years(symbol,interval)
+
+    def _listed_years(self,symbol: str,interval: str) -> List[int]:
+        """Year directories of a store written before versioned partitions"""
+        series_dir = self._series_dir(symbol,interval)
+        if not series_dir.exists():
+            return []
+        return sorted(int(path.name) for path in series_dir.iterdir() if path.name.isdigit())
+
+    def _load_meta(self,symbol: str,interval: str) -> Optional[Dict]:
+        meta_file = self._series_dir(symbol,interval) / "meta.json"
+        if not meta_file.exists():
+            return None
+        with open(meta_file,'r') as f:
+            return json.load(f)
+
+    def _save_meta(self,symbol: str,interval: str,meta: Dict):
+        series_dir = self._series_dir(symbol,interval)
+        series_dir.mkdir(parents=True,exist_ok=True)
+        tmp = series_dir / f"meta.json.{os.getpid()}.tmp"
+        with open(tmp,'w') as f:
+            json.dump(meta,f)
+        os.replace(tmp,series_dir / "meta.json")
+
+    @staticmethod
+    def _merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+        """Merge overlapping or touching [start, end) ranges"""
+        merged = []
+        for start,end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1],end)
+            else:
+                merged.append([start,end])
+        return merged
+
+    @staticmethod
+    def _index_to_ns(index) -> np.ndarray:
+        """UTC nanoseconds for a DatetimeIndex (naive treated as UTC)"""
+        index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        return index.values.astype('datetime64[ns]').view('int64')
+
+    @staticmethod
+    def _to_ns(value) -> int:
+        """UTC nanoseconds for a datetime, reading naive values as local time"""
+        if isinstance(value,datetime) and value.tzinfo is None:
+            value = value.astimezone()
+        return pd.Timestamp(value).tz_convert('UTC').value
@@ -0,0 +1,104 @@
+import asyncio
+from typing import List,Dict,Optional,Set
+from datetime import datetime
+from app.schemas.quote import Quote
+from app.utils.json_encoding import dumps_str
+
+
+def quote_delta(old: Optional[Quote],new: Quote) -> Dict:
+    """Fields of new that differ from old (all fields if old is None)"""
+    if old is None:
+        return new.to_dict()
+    return {key: value for key,value in new.items() if old.get(key) != value}
+
+
+class Subscription:
+    """One connected client: its symbol filter and pending events"""
+
+    def __init__(self,symbols: Optional[Set[str]],max_pending: int):
+        self.symbols = symbols
+        # Holds SSE frames, or None when the client must resync
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+
+    def wants(self,symbol: str) -> bool:
+        return self.symbols is None or symbol in self.symbols
+
+
+class QuoteBroadcaster:
+    """
+    Fans quote deltas out to streaming clients
+
+    Each delta is serialized once per symbol and spliced into per-client
+    events, so one upstream refresh costs one encode per changed symbol no
+    matter how many clients are connected. A client that falls too far
+    behind has its backlog dropped and receives a fresh snapshot instead.
+    """
+
+    def __init__(self,max_pending: int = 32):
+        self.max_pending = max_pending
+        self.subscriptions: Set[Subscription] = set()
+        self.published = 0
+        self.resyncs = 0
+
+    def subscribe(self,symbols: Optional[List[str]] = None) -> Subscription:
+        subscription = Subscription(set(symbols) if symbols else None,self.max_pending)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self,subscription: Subscription):
+        self.subscriptions.discard(subscription)
+
+    def publish(self,deltas: Dict[str,Dict]):
+        """Queue a delta event for every client subscribed to a changed symbol"""
+        if not deltas or not self.subscriptions:
+            return
+
+        fragments = {
+            symbol: f'"{symbol}":' + dumps_str(delta)
+            for symbol,delta in deltas.items()
+        }
+        timestamp = datetime.now().isoformat()
+        full_event = None
+
+        for subscription in self.subscriptions:
+            if subscription.symbols is None:
+                if full_event is None:
+                    full_event = self._event("delta",timestamp,fragments.values())
+                event = full_event
+            else:
+                selected = [fragments[s] for s in subscription.symbols if s in fragments]
+                if not selected:
+                    continue
+                event = self._event("delta",timestamp,selected)
+
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog, it gets a snapshot next
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(None)
+                self.resyncs += 1
+        self.published += 1
+
+    def snapshot_event(self,subscription: Subscription,quotes: Dict[str,Quote]) -> str:
+        """Full quotes for a client's symbols, sent on connect and resync"""
+        fragments = [
+            f'"{symbol}":' + dumps_str(quote.to_dict())
+            for symbol,quote in quotes.items()
+            if subscription.wants(symbol)
+        ]
+        return self._event("snapshot",datetime.now().isoformat(),fragments)
+
+    @staticmethod
+    def _event(name: str,timestamp: str,fragments) -> str:
+        """Server-Sent Events frame"""
+        payload = '{"timestamp":"' + timestamp + '","quotes":{' + ','.join(fragments) + '}}'
+        return f"event: {name}\ndata: {payload}\n\n"
+
+    def stats(self) -> Dict:
+        return {
+            'clients': len(self.subscriptions),
+            'published': self.published,
+            'resyncs': self.resyncs,
+        }
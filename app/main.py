@@ -6,11 +6,77 @@ from contextlib import asynccontextmanager
 import uvicorn
 
 from app.core.config import config_manager
-from app.api.routes import market_data
+from app.api.routes import market_data,models,trading
 from app.data.providers.data_aggregator import DataAggregator
+from app.data.shared import WorkerCoordinator
+from app.data.snapshot import QuoteSnapshotService
+from app.data.streaming import QuoteBroadcaster
+from app.data.storage.database import Database
+from app.data.processors.feature_service import FeatureService
+from app.models.inference.service import InferenceService
+from app.trading.risk.engine import RiskEngine
+from app.trading.execution.simulator import ExecutionSimulator
+
+# Shared cache backend and election of the one worker polling upstream
+worker_coordinator = WorkerCoordinator.from_config(config_manager)
 
 # Global data aggregator instance
 data_aggregator = DataAggregator()
+data_aggregator.coordinator = worker_coordinator
+
+# Background watchlist refresher serving /api/v1/quotes
+snapshot_service = QuoteSnapshotService(
+    data_aggregator,
+    config_manager.get_watchlist(),
+    interval=config_manager.settings.realtime_update_interval,
+    coordinator=worker_coordinator
+)
+
+# Pushes each refresh's quote deltas to streaming clients
+quote_broadcaster = QuoteBroadcaster()
+snapshot_service.add_listener(quote_broadcaster.publish)
+
+# Positions and risk limits, revalued on every refresh
+risk_engine = RiskEngine.from_config(config_manager)
+snapshot_service.add_listener(risk_engine.on_refresh)
+
+# Paper order matching against the snapshot quotes
+execution_simulator = ExecutionSimulator.from_config(snapshot_service,risk_engine,config_manager)
+snapshot_service.add_listener(execution_simulator.on_refresh)
+
+# Write-behind audit trail of quotes, orders, fills and positions
+database = Database.from_config(snapshot_service,risk_engine,config_manager,worker_id=worker_coordinator.worker_id)
+database_enabled = config_manager.get_database_config().get('enabled',False)
+if database_enabled:
+    snapshot_service.add_listener(database.on_refresh)
+    execution_simulator.add_listener(database.on_order)
+
+# Technical features, updated incrementally on each refresh
+features_config = dict(config_manager.get_features_config())
+features_enabled = features_config.pop('enabled',False)
+inference_config = dict(config_manager.get_models_config().get('inference',{}) or {})
+inference_enabled = features_enabled and inference_config.pop('enabled',False)
+inference_window = inference_config.pop('window',60)
+feature_service = FeatureService(
+    data_aggregator,
+    snapshot_service,
+    config_manager.get_watchlist(),
+    history=inference_window if inference_enabled else 0,
+    **features_config
+)
+if features_enabled:
+    snapshot_service.add_listener(feature_service.on_refresh)
+
+# Model scores over the feature windows, rescored after each refresh
+inference_service = InferenceService(
+    config_manager.settings.model_checkpoint_dir,
+    feature_service,
+    model_name=config_manager.get_models_config().get('default_model','lstm'),
+    use_gpu=config_manager.settings.use_gpu,
+    **inference_config
+)
+if inference_enabled:
+    snapshot_service.add_listener(inference_service.on_refresh)
 
 
 @asynccontextmanager
@@ -20,17 +86,35 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Automated Quant PM System...")
     print(f"📊 Loaded {len(config_manager.get_watchlist())} instruments")
 
-    # Check provider availability
-    provider_status = await data_aggregator.check_providers()
-    print("📡 Data Provider Status:")
-    for provider,status in provider_status.items():
-        status_icon = "✅" if status else "❌"
-        print(f"   {status_icon} {provider}")
+    # Redis and the poller election run in the background; the snapshot
+    # service waits for this worker's role before its first refresh
+    await worker_coordinator.start()
+
+    # The audit database connects in the background; rows are buffered until then
+    if database_enabled:
+        await database.start()
+
+    # Providers are initialized by the first refresh and their health is
+    # tracked from live traffic, so startup does not wait on the network
+    await snapshot_service.start()
+    print(f"🔄 Refreshing watchlist every {snapshot_service.interval}s")
+    if features_enabled:
+        await feature_service.start()
+    if inference_enabled:
+        await inference_service.start()
+    if config_manager.settings.paper_trading:
+        await execution_simulator.start()
 
     yield
 
     # Shutdown
     print("👋 Shutting down...")
+    await snapshot_service.stop()
+    await feature_service.stop()
+    await inference_service.stop()
+    await execution_simulator.stop()
+    await database.stop()
+    await worker_coordinator.stop()
 
 
 # Create FastAPI app
@@ -56,9 +140,19 @@ templates = Jinja2Templates(directory="templates")
 
 # Include routers
 app.include_router(market_data.router,prefix="/api/v1",tags=["Market Data"])
+app.include_router(models.router,prefix="/api/v1",tags=["Models"])
+app.include_router(trading.router,prefix="/api/v1",tags=["Trading"])
 
 # Make data_aggregator available to routes
 app.state.data_aggregator = data_aggregator
+app.state.worker_coordinator = worker_coordinator
+app.state.snapshot_service = snapshot_service
+app.state.quote_broadcaster = quote_broadcaster
+app.state.feature_service = feature_service
+app.state.inference_service = inference_service
+app.state.risk_engine = risk_engine
+app.state.execution_simulator = execution_simulator
+app.state.database = database
 app.state.templates = templates
 app.state.config_manager = config_manager
 
@@ -80,10 +174,14 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    provider_status = await data_aggregator.check_providers()
+    """Health check endpoint, answered from tracked provider stats"""
+    provider_status = data_aggregator.check_providers()
+    if not data_aggregator.providers_ready:
+        status = "starting"
+    else:
+        status = "healthy" if any(provider_status.values()) else "degraded"
     return {
-        "status": "healthy",
+        "status": status,
         "providers": provider_status
     }
 
@@ -0,0 +1,30 @@
+import torch
+from pathlib import Path
+from app.models.pytorch.lstm import load_checkpoint
+
+
+def export_torchscript(checkpoint_path: str) -> str:
+    """Trace a checkpoint to TorchScript next to it (.ts); returns the path"""
+    model,checkpoint = load_checkpoint(checkpoint_path)
+    example = torch.zeros(1,checkpoint['window'],len(checkpoint['features']))
+    with torch.inference_mode():
+        traced = torch.jit.trace(model,example)
+    path = str(Path(checkpoint_path).with_suffix('.ts'))
+    traced.save(path)
+    return path
+
+
+def export_onnx(checkpoint_path: str) -> str:
+    """Export a checkpoint to ONNX next to it (.onnx) with a dynamic batch axis"""
+    model,checkpoint = load_checkpoint(checkpoint_path)
+    example = torch.zeros(1,checkpoint['window'],len(checkpoint['features']))
+    path = str(Path(checkpoint_path).with_suffix('.onnx'))
+    torch.onnx.export(
+        model,
+        (example,),
+        path,
+        input_names=['input'],
+        output_names=['output'],
+        dynamic_axes={'input': {0: 'batch'},'output': {0: 'batch'}}
+    )
+    return path
@@ -0,0 +1,280 @@
+import asyncio
+import os
+import time
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from typing import Dict,List,Optional,Tuple
+
+
+class InferenceService:
+    """
+    Keeps a model checkpoint warm and scores feature windows in micro-batches
+
+    Single predictions are queued and grouped into batches of up to
+    max_batch_size, waiting at most max_latency_ms for a batch to fill.
+    Batches run in a worker thread under torch.inference_mode on CPU with a
+    fixed thread count. With backend='auto' an exported graph next to the
+    checkpoint is preferred: {model}.onnx when onnxruntime is installed,
+    then {model}.ts (TorchScript), then the eager model. use_gpu moves the
+    torch backends to CUDA when it is available.
+
+    Given a feature service, every snapshot refresh scores the whole
+    watchlist in one pass over its feature windows; a refresh arriving
+    while a pass is running is skipped rather than queued.
+
+    torch is imported in load(), off the event loop, so the application
+    starts without it.
+    """
+
+    def __init__(
+            self,
+            checkpoint_dir: str,
+            feature_service=None,
+            model_name: str = "lstm",
+            backend: str = "auto",
+            max_batch_size: int = 256,
+            max_latency_ms: float = 5.0,
+            num_threads: Optional[int] = None,
+            use_gpu: bool = False
+    ):
+        self.checkpoint_path = Path(checkpoint_dir) / f"{model_name}.pt"
+        self.feature_service = feature_service
+        self.model_name = model_name
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.use_gpu = use_gpu
+        self.device = "cpu"
+
+        self.features: List[str] = []
+        self.window = 0
+        self.active_backend: Optional[str] = None
+        self._run = None
+        self._mean: Optional[np.ndarray] = None
+        self._std: Optional[np.ndarray] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._load_task: Optional[asyncio.Task] = None
+        self._score_task: Optional[asyncio.Task] = None
+
+        self.scores: Dict[str,float] = {}
+        self.scored_at: Optional[datetime] = None
+        self.last_score_ms = 0.0
+
+        self.requests = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._run is not None
+
+    @property
+    def available(self) -> bool:
+        """Whether a checkpoint exists to serve"""
+        return self.checkpoint_path.exists()
+
+    async def start(self):
+        """Load the checkpoint in the background and start the batcher"""
+        if not self.available:
+            print(f"No model checkpoint at {self.checkpoint_path}, inference disabled")
+            return
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._batch_loop())
+        if self._load_task is None:
+            self._load_task = asyncio.create_task(self._load_logged())
+
+    async def stop(self):
+        for task in (self._load_task,self._score_task,self._task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._load_task = None
+        self._score_task = None
+
+    async def _load_logged(self):
+        try:
+            await asyncio.to_thread(self.load)
+            print(f"Loaded {self.model_name} model ({self.active_backend} on {self.device}, {self.num_threads} threads)")
+        except Exception as e:
+            print(f"Model load failed: {e}")
+
+    def load(self):
+        """Load the checkpoint, pick a backend and run a warm-up batch"""
+        import torch
+        from app.models.pytorch.lstm import load_checkpoint
+
+        torch.set_num_threads(self.num_threads)
+        try:
+            # Inference runs one batch at a time; only intra-op threads help
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass
+
+        model,checkpoint = load_checkpoint(str(self.checkpoint_path))
+        self.features = list(checkpoint['features'])
+        self.window = int(checkpoint['window'])
+        if checkpoint.get('mean') is not None:
+            self._mean = np.asarray(checkpoint['mean'],dtype=np.float32)
+            self._std = np.asarray(checkpoint['std'],dtype=np.float32)
+
+        run,backend = self._select_backend(model)
+        run(np.zeros((1,self.window,len(self.features)),dtype=np.float32))
+        self._run = run
+        self.active_backend = backend
+
+    def _select_backend(self,model):
+        import torch
+
+        if self.use_gpu and torch.cuda.is_available():
+            self.device = "cuda"
+        onnx_path = self.checkpoint_path.with_suffix('.onnx')
+        if self.backend in ('auto','onnx') and self.device == "cpu" and onnx_path.exists():
+            try:
+                import onnxruntime
+            except ImportError:
+                if self.backend == 'onnx':
+                    raise
+            else:
+                options = onnxruntime.SessionOptions()
+                options.intra_op_num_threads = self.num_threads
+                session = onnxruntime.InferenceSession(
+                    str(onnx_path),options,providers=['CPUExecutionProvider']
+                )
+                return (lambda inputs: session.run(None,{'input': inputs})[0]),'onnx'
+
+        script_path = self.checkpoint_path.with_suffix('.ts')
+        if self.backend in ('auto','torchscript') and script_path.exists():
+            model = torch.jit.load(str(script_path),map_location=self.device)
+            backend = 'torchscript'
+        elif self.backend in ('auto','eager'):
+            model = model.to(self.device)
+            backend = 'eager'
+        else:
+            raise ValueError(f"No {self.backend} export found for {self.checkpoint_path}")
+
+        def run(inputs: np.ndarray) -> np.ndarray:
+            with torch.inference_mode():
+                return model(torch.from_numpy(inputs).to(self.device)).cpu().numpy()
+
+        return run,backend
+
+    def _predict_batch(self,inputs: np.ndarray) -> np.ndarray:
+        """Normalize and score a B x window x F batch (worker thread)"""
+        inputs = np.ascontiguousarray(inputs,dtype=np.float32)
+        if self._mean is not None:
+            inputs = (inputs - self._mean) / self._std
+        started = time.perf_counter()
+        outputs = np.asarray(self._run(inputs)).reshape(-1)
+        self.batches += 1
+        self.last_batch_size = len(inputs)
+        self.last_batch_ms = (time.perf_counter() - started) * 1000
+        return outputs
+
+    async def predict(self,window: np.ndarray) -> float:
+        """Score one window x F array, batched with concurrent requests"""
+        if not self.ready:
+            raise RuntimeError("Model is not loaded")
+        future = asyncio.get_running_loop().create_future()
+        self.requests += 1
+        self._queue.put_nowait((window,future))
+        return await future
+
+    async def predict_many(self,windows: np.ndarray) -> np.ndarray:
+        """Score a B x window x F array directly in max_batch_size chunks"""
+        if not self.ready:
+            raise RuntimeError("Model is not loaded")
+        self.requests += len(windows)
+        outputs = []
+        for start in range(0,len(windows),self.max_batch_size):
+            chunk = windows[start:start + self.max_batch_size]
+            outputs.append(await asyncio.to_thread(self._predict_batch,chunk))
+        return np.concatenate(outputs) if outputs else np.empty(0,dtype=np.float32)
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[np.ndarray,asyncio.Future]] = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(),remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            futures = [future for _,future in batch]
+            try:
+                outputs = await asyncio.to_thread(
+                    self._predict_batch,np.stack([window for window,_ in batch])
+                )
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for future,output in zip(futures,outputs):
+                if not future.done():
+                    future.set_result(float(output))
+
+    def on_refresh(self,deltas: Dict[str,Dict]):
+        """Snapshot listener rescoring the watchlist after features update"""
+        if not self.ready or self.feature_service is None:
+            return
+        if self._score_task is None or self._score_task.done():
+            self._score_task = asyncio.create_task(self._score_logged())
+
+    async def _score_logged(self):
+        try:
+            await self.score_watchlist()
+        except Exception as e:
+            print(f"Watchlist scoring failed: {e}")
+
+    async def score_watchlist(self) -> Dict[str,float]:
+        """Score every symbol with a complete feature window in one pass"""
+        started = time.perf_counter()
+        symbols,windows = self.feature_service.get_windows(self.window,self.features)
+        outputs = await self.predict_many(windows)
+        self.scores = {symbol: float(output) for symbol,output in zip(symbols,outputs)}
+        self.scored_at = datetime.now()
+        self.last_score_ms = (time.perf_counter() - started) * 1000
+        return self.scores
+
+    async def predict_symbol(self,symbol: str) -> Optional[float]:
+        """Score one symbol's current window through the micro-batcher"""
+        symbols,windows = self.feature_service.get_windows(self.window,self.features,[symbol])
+        if not symbols:
+            return None
+        return await self.predict(windows[0])
+
+    def status(self) -> Dict:
+        return {
+            'model': self.model_name,
+            'ready': self.ready,
+            'backend': self.active_backend,
+            'device': self.device,
+            'threads': self.num_threads,
+            'window': self.window,
+            'requests': self.requests,
+            'batches': self.batches,
+            'last_batch_size': self.last_batch_size,
+            'last_batch_ms': self.last_batch_ms,
+            'scored': len(self.scores),
+            'scored_at': self.scored_at.isoformat() if self.scored_at else None,
+            'last_score_ms': self.last_score_ms,
+        }
@@ -0,0 +1,70 @@
+import torch
+from pathlib import Path
+from torch import nn
+from typing import Dict,List,Optional,Tuple
+
+
+class LSTMModel(nn.Module):
+    """LSTM regressor mapping a (batch, window, features) sequence to one value"""
+
+    def __init__(
+            self,
+            input_size: int,
+            hidden_size: int = 64,
+            num_layers: int = 2,
+            dropout: float = 0.1
+    ):
+        super().__init__()
+        self.lstm = nn.LSTM(
+            input_size,
+            hidden_size,
+            num_layers=num_layers,
+            dropout=dropout if num_layers > 1 else 0.0,
+            batch_first=True
+        )
+        self.head = nn.Linear(hidden_size,1)
+
+    def forward(self,inputs: torch.Tensor) -> torch.Tensor:
+        outputs,_ = self.lstm(inputs)
+        return self.head(outputs[:,-1]).squeeze(-1)
+
+
+MODELS = {
+    'lstm': LSTMModel,
+}
+
+
+def save_checkpoint(
+        path: str,
+        model: nn.Module,
+        name: str,
+        params: Dict,
+        features: List[str],
+        window: int,
+        mean: Optional[torch.Tensor] = None,
+        std: Optional[torch.Tensor] = None
+):
+    """
+    Save weights with what is needed to rebuild and feed the model:
+    architecture name and params, input feature names, window length and
+    optional per-feature normalization
+    """
+    Path(path).parent.mkdir(parents=True,exist_ok=True)
+    torch.save({
+        'model': name,
+        'params': params,
+        'features': features,
+        'window': window,
+        'mean': mean,
+        'std': std,
+        'state_dict': model.state_dict(),
+    },path)
+
+
+def load_checkpoint(path: str) -> Tuple[nn.Module,Dict]:
+    """Rebuild a model in eval mode from a checkpoint; returns (model, checkpoint)"""
+    checkpoint = torch.load(path,map_location='cpu',weights_only=False)
+    model = MODELS[checkpoint['model']](len(checkpoint['features']),**checkpoint['params'])
+    model.load_state_dict(checkpoint['state_dict'])
+    model.eval()
+    return model,checkpoint
@@ -0,0 +1,247 @@
+import json
+import numpy as np
+import torch
+from pathlib import Path
+from typing import Dict,List,Optional,Sequence,Tuple
+from torch.utils.data import DataLoader,Dataset
+
+
+class FeatureArray:
+    """
+    Memory-mapped N x T x F feature array (symbol, time, feature) on disk
+
+    Stored as features.npy plus meta.json (symbols, feature names, bar
+    timestamps, target horizon), so datasets larger than RAM are paged in
+    on demand. horizon is how many bars ahead the targets look, e.g. the
+    horizon given to forward_returns.
+    """
+
+    def __init__(self,path: str):
+        self.path = Path(path)
+        with open(self.path / 'meta.json','r') as f:
+            meta = json.load(f)
+        self.symbols: List[str] = meta['symbols']
+        self.features: List[str] = meta['features']
+        self.index: List[str] = meta['index']
+        self.target: Optional[str] = meta.get('target')
+        self.horizon: Optional[int] = meta.get('horizon')
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.load(self.path / 'features.npy',mmap_mode='r')
+
+    @property
+    def targets(self) -> np.ndarray:
+        return np.load(self.path / 'targets.npy',mmap_mode='r')
+
+    @classmethod
+    def write(
+            cls,
+            path: str,
+            features: Dict[str,np.ndarray],
+            targets: np.ndarray,
+            symbols: Sequence[str],
+            index: Sequence,
+            target: Optional[str] = None,
+            horizon: Optional[int] = None
+    ) -> "FeatureArray":
+        """
+        Write T x N feature panels (as FeatureEngine.compute returns them)
+        and T x N targets to disk in N x T x F layout, one feature at a time
+        """
+        path = Path(path)
+        path.mkdir(parents=True,exist_ok=True)
+        names = list(features)
+        count,width = targets.shape
+
+        values = np.lib.format.open_memmap(
+            path / 'features.npy',mode='w+',dtype=np.float32,shape=(width,count,len(names))
+        )
+        for position,name in enumerate(names):
+            values[:,:,position] = features[name].T
+        values.flush()
+        del values
+        np.save(path / 'targets.npy',np.ascontiguousarray(targets.T,dtype=np.float32))
+
+        with open(path / 'meta.json','w') as f:
+            json.dump({
+                'symbols': list(symbols),
+                'features': names,
+                'index': [str(ts) for ts in index],
+                'target': target,
+                'horizon': horizon,
+            },f)
+        return cls(str(path))
+
+
+def forward_returns(close: np.ndarray,horizon: int = 1) -> np.ndarray:
+    """T x N return over the next horizon bars (NaN where unknown)"""
+    targets = np.full(close.shape,np.nan)
+    targets[:-horizon] = close[horizon:] / close[:-horizon] - 1.0
+    return targets
+
+
+class WindowDataset(Dataset):
+    """
+    Sliding windows over a memory-mapped N x T x F feature array
+
+    Sample k is the window of `window` bars ending at bar t for symbol s,
+    labelled with targets[s, t]. Windows are strided views of the memmap
+    (sliding_window_view), so no per-sample copy is made: __getitems__
+    gathers a whole batch in one indexing operation, which is the only
+    copy. Windows containing NaN features or a NaN target are skipped.
+
+    Arrays are reopened lazily in each DataLoader worker rather than
+    pickled, so workers share the page cache instead of copying data.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            window: int,
+            symbols: Optional[Sequence[str]] = None,
+            samples: Optional[np.ndarray] = None
+    ):
+        self.path = str(path)
+        self.window = window
+        self.array = FeatureArray(self.path)
+        self._windows: Optional[np.ndarray] = None
+        self._targets: Optional[np.ndarray] = None
+
+        if samples is None:
+            symbol_ids = None
+            if symbols is not None:
+                positions = {symbol: i for i,symbol in enumerate(self.array.symbols)}
+                symbol_ids = [positions[symbol] for symbol in symbols]
+            samples = self._valid_samples(symbol_ids)
+        # (symbol, window end) pairs
+        self.samples = samples
+
+    def _valid_samples(self,symbol_ids: Optional[List[int]] = None) -> np.ndarray:
+        """(symbol, end) of every window with complete features and a target"""
+        values = self.array.values
+        targets = self.array.targets
+        if symbol_ids is None:
+            symbol_ids = range(values.shape[0])
+
+        samples = []
+        # One symbol at a time keeps the scan within memory
+        for symbol in symbol_ids:
+            valid = ~np.isnan(values[symbol]).any(axis=1)
+            complete = np.cumsum(valid)
+            complete[self.window:] -= complete[:-self.window].copy()
+            ends = np.nonzero((complete == self.window) & ~np.isnan(targets[symbol]))[0]
+            samples.append(np.column_stack([np.full(len(ends),symbol),ends]))
+
+        if not samples:
+            return np.empty((0,2),dtype=np.int64)
+        return np.concatenate(samples).astype(np.int64)
+
+    def _open(self):
+        if self._windows is None:
+            # N x (T - window + 1) x F x window view, no data copied
+            self._windows = np.lib.stride_tricks.sliding_window_view(
+                self.array.values,self.window,axis=1
+            )
+            self._targets = self.array.targets
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_windows'] = None
+        state['_targets'] = None
+        return state
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def __getitem__(self,item: int) -> Tuple[torch.Tensor,torch.Tensor,int]:
+        inputs,targets,symbols = self.__getitems__([item])
+        return inputs[0],targets[0],int(symbols[0])
+
+    def __getitems__(self,items) -> Tuple[torch.Tensor,torch.Tensor,torch.Tensor]:
+        """A batch of (B x window x F inputs, B targets, B symbol ids)"""
+        self._open()
+        batch = self.samples[np.asarray(items)]
+        symbols,ends = batch[:,0],batch[:,1]
+        starts = ends - self.window + 1
+        inputs = self._windows[symbols,starts].transpose(0,2,1)
+        return (
+            torch.from_numpy(np.ascontiguousarray(inputs)),
+            torch.from_numpy(np.asarray(self._targets[symbols,ends])),
+            torch.from_numpy(symbols),
+        )
+
+    def subset(self,mask: np.ndarray) -> "WindowDataset":
+        """Dataset over the samples selected by a boolean mask"""
+        return WindowDataset(self.path,self.window,samples=self.samples[mask])
+
+
+def _split_gap(dataset: WindowDataset,gap: Optional[int]) -> int:
+    """gap, defaulting to the target horizon stored with the array"""
+    if gap is not None:
+        return gap
+    if dataset.array.horizon is None:
+        raise ValueError(
+            f"{dataset.path} does not record its target horizon; pass gap "
+            f"(the horizon of its targets) to keep training labels out of validation"
+        )
+    return dataset.array.horizon
+
+
+def chronological_split(
+        dataset: WindowDataset,
+        validation_split: float = 0.2,
+        gap: Optional[int] = None
+) -> Tuple[WindowDataset,WindowDataset]:
+    """
+    Split by time: windows ending in the last validation_split of the bars
+    validate, earlier ones train. Training windows ending within gap bars
+    of the cutoff are dropped so their targets do not overlap validation;
+    gap defaults to the array's target horizon
+    """
+    gap = _split_gap(dataset,gap)
+    ends = dataset.samples[:,1]
+    bars = len(dataset.array.index)
+    cutoff = int(bars * (1.0 - validation_split))
+    train = dataset.subset(ends < cutoff - gap)
+    validation = dataset.subset(ends >= cutoff)
+    return train,validation
+
+
+def _passthrough(batch):
+    """Batches are already collated by WindowDataset.__getitems__"""
+    return batch
+
+
+def create_data_loaders(
+        dataset: WindowDataset,
+        gap: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        config_manager=None
+) -> Tuple[DataLoader,DataLoader]:
+    """
+    Chronologically split train and validation loaders, using
+    validation_split and batch_size from models.training and num_workers
+    and pin_memory from models.pytorch in config.yaml
+    Training batches are shuffled across all symbols and dates; gap
+    defaults to the array's target horizon (see chronological_split)
+    """
+    if config_manager is None:
+        from app.core.config import config_manager
+    models_config = config_manager.get_models_config()
+    training_config = models_config.get('training',{}) or {}
+    pytorch_config = models_config.get('pytorch',{}) or {}
+
+    train,validation = chronological_split(
+        dataset,training_config.get('validation_split',0.2),gap=gap
+    )
+    num_workers = pytorch_config.get('num_workers',0)
+    options = dict(
+        batch_size=batch_size or training_config.get('batch_size',32),
+        num_workers=num_workers,
+        # Pinned memory only helps host-to-GPU copies
+        pin_memory=bool(pytorch_config.get('pin_memory',False)) and torch.cuda.is_available(),
+        persistent_workers=num_workers > 0,
+        collate_fn=_passthrough
+    )
+    return DataLoader(train,shuffle=True,**options),DataLoader(validation,shuffle=False,**options)
@@ -0,0 +1,148 @@
+import numpy as np
+from typing import Optional,Tuple
+
+
+def _shrink(
+        cov: np.ndarray,
+        fourth_moment: float,
+        count: int
+) -> Tuple[np.ndarray,float]:
+    """
+    Ledoit-Wolf shrinkage of a sample covariance towards a scaled identity
+    fourth_moment is the mean over samples of ||x_t||^4 (x_t centered)
+    """
+    width = len(cov)
+    mu = np.trace(cov) / width
+    target_distance = np.sum(cov * cov) - 2.0 * mu * np.trace(cov) + width * mu * mu
+    # Sum_t ||x_t x_t' - S||^2 / T^2 without forming the outer products
+    sampling_error = max(fourth_moment - np.sum(cov * cov),0.0) / count
+    if target_distance <= 0.0:
+        return cov.copy(),0.0
+    shrinkage = min(sampling_error,target_distance) / target_distance
+    shrunk = (1.0 - shrinkage) * cov
+    shrunk[np.diag_indices(width)] += shrinkage * mu
+    return shrunk,shrinkage
+
+
+def ledoit_wolf(returns: np.ndarray) -> Tuple[np.ndarray,float]:
+    """
+    Ledoit-Wolf shrunk covariance of a T x N return panel
+    Missing returns count as zero after demeaning; returns (cov, shrinkage)
+    """
+    returns = np.asarray(returns,dtype=np.float64)
+    count = len(returns)
+    centered = np.nan_to_num(returns - np.nanmean(returns,axis=0))
+    cov = centered.T @ centered / count
+    fourth_moment = np.mean(np.sum(centered * centered,axis=1) ** 2)
+    return _shrink(cov,fourth_moment,count)
+
+
+class RollingCovariance:
+    """
+    Covariance of the last `window` return bars, updated as bars arrive
+
+    Keeps the window in a ring buffer with running sums of returns and of
+    their outer products, so update() costs O(N^2) per bar instead of
+    O(window * N^2) for a recomputation. The sums are rebuilt from the
+    ring once per lap so rounding does not accumulate. Missing returns
+    count as zero; complete() marks the names observed on every bar.
+    """
+
+    def __init__(self,width: int,window: int = 252):
+        self.width = width
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.ring = np.zeros((self.window,self.width))
+        self.observed_ring = np.zeros((self.window,self.width),dtype=bool)
+        self.sums = np.zeros(self.width)
+        self.products = np.zeros((self.width,self.width))
+        self.observed = np.zeros(self.width,dtype=np.int64)
+        self.bars = 0
+
+    @property
+    def count(self) -> int:
+        return min(self.bars,self.window)
+
+    @property
+    def ready(self) -> bool:
+        return self.count > 1
+
+    def complete(self) -> np.ndarray:
+        """Mask of the names with a return on every bar of the window"""
+        return self.observed == self.count
+
+    def update(self,returns: np.ndarray):
+        """Add one N-vector of returns, dropping the oldest bar once full"""
+        self.extend(np.asarray(returns,dtype=np.float64)[None])
+
+    def extend(self,returns: np.ndarray):
+        """
+        Add a T x N block of returns
+        The running sums change by the outer products of the entering
+        bars minus those of the bars they overwrite, in two matrix products
+        """
+        returns = np.asarray(returns,dtype=np.float64)[-self.window:]
+        observed = ~np.isnan(returns)
+        returns = np.where(observed,returns,0.0)
+        slots = (self.bars + np.arange(len(returns))) % self.window
+        if self.bars >= self.window:
+            leaving = self.ring[slots]
+            self.sums -= leaving.sum(axis=0)
+            self.products -= leaving.T @ leaving
+            self.observed -= self.observed_ring[slots].sum(axis=0)
+        elif self.bars + len(returns) > self.window:
+            # Part of the block overwrites bars of this block's own first lap
+            self.ring[slots] = returns
+            self.observed_ring[slots] = observed
+            self.bars += len(returns)
+            self._resum()
+            return
+
+        self.ring[slots] = returns
+        self.observed_ring[slots] = observed
+        self.sums += returns.sum(axis=0)
+        self.products += returns.T @ returns
+        self.observed += observed.sum(axis=0)
+        laps = self.bars // self.window
+        self.bars += len(returns)
+        # Re-sum once per lap of the ring so rounding does not accumulate
+        if self.bars // self.window != laps:
+            self._resum()
+
+    def _resum(self):
+        rows = self.ring[:self.count]
+        self.sums = rows.sum(axis=0)
+        self.products = rows.T @ rows
+        self.observed = self.observed_ring[:self.count].sum(axis=0)
+
+    def _rows(self) -> np.ndarray:
+        return self.ring[:self.count]
+
+    def mean(self,names: Optional[np.ndarray] = None) -> np.ndarray:
+        sums = self.sums if names is None else self.sums[names]
+        return sums / self.count
+
+    def sample(self,names: Optional[np.ndarray] = None) -> np.ndarray:
+        """Sample covariance (normalized by count, as in Ledoit-Wolf)"""
+        mean = self.mean(names)
+        products = self.products if names is None else self.products[np.ix_(names,names)]
+        return products / self.count - np.outer(mean,mean)
+
+    def shrunk(self,names: Optional[np.ndarray] = None) -> Tuple[np.ndarray,float]:
+        """
+        Ledoit-Wolf shrunk covariance of the window, optionally restricted
+        to a mask or index of names; returns (cov, shrinkage)
+        """
+        cov = self.sample(names)
+        mean = self.mean(names)
+        rows = self._rows() if names is None else self._rows()[:,names]
+        # ||x_t - m||^2 = ||x_t||^2 - 2 x_t.m + ||m||^2, O(window * N)
+        norms = np.sum(rows * rows,axis=1) - 2.0 * rows @ mean + mean @ mean
+        return _shrink(cov,float(np.mean(norms ** 2)),self.count)
+
+    def covariance(self,shrink: bool = True,names: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        if not self.ready:
+            return None
+        return self.shrunk(names)[0] if shrink else self.sample(names)
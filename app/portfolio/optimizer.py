@@ -0,0 +1,108 @@
+import numpy as np
+from typing import Dict,List,Optional
+from app.portfolio.covariance import RollingCovariance
+from app.portfolio.solvers import OPTIMIZERS,cap_weights
+
+
+class PortfolioOptimizer:
+    """
+    Target weights from a rolling shrunk covariance, one rebalance at a time
+
+    Returns are fed in as bars arrive (update/extend) and the covariance
+    window is maintained incrementally. optimize() solves over the names
+    with a complete window, warm starting the iterative solvers from the
+    previous rebalance's weights, and caps every weight at
+    max_position_size.
+
+        optimizer = PortfolioOptimizer.from_config(symbols)
+        optimizer.extend(returns)
+        weights = optimizer.optimize()
+    """
+
+    def __init__(
+            self,
+            symbols: List[str],
+            method: str = "mean_variance",
+            window: int = 252,
+            max_position_size: Optional[float] = None,
+            risk_aversion: float = 1.0,
+            shrink: bool = True
+    ):
+        if method not in OPTIMIZERS:
+            raise ValueError(f"Unknown optimization method: {method}")
+        self.symbols = list(symbols)
+        self.method = method
+        self.max_position_size = max_position_size
+        self.risk_aversion = risk_aversion
+        self.shrink = shrink
+        self.covariance = RollingCovariance(len(self.symbols),window)
+        self.weights = np.zeros(len(self.symbols))
+        self.shrinkage = 0.0
+
+    @classmethod
+    def from_config(cls,symbols: List[str],config_manager=None,**overrides) -> "PortfolioOptimizer":
+        """Optimizer using the portfolio section and max_position_size from config"""
+        if config_manager is None:
+            from app.core.config import config_manager
+        portfolio_config = config_manager.get_portfolio_config()
+        risk_config = config_manager.get_trading_config().get('risk_management',{}) or {}
+        params = dict(
+            method=portfolio_config.get('optimization_method','mean_variance'),
+            window=portfolio_config.get('covariance_window',252),
+            risk_aversion=portfolio_config.get('risk_aversion',1.0),
+            max_position_size=risk_config.get('max_position_size')
+        )
+        params.update(overrides)
+        return cls(symbols,**params)
+
+    def update(self,returns: np.ndarray):
+        """Add one bar of returns (N-vector aligned with symbols)"""
+        self.covariance.update(returns)
+
+    def extend(self,returns: np.ndarray):
+        """Add a T x N block of returns"""
+        self.covariance.extend(returns)
+
+    def optimize(self,expected_returns: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Target weights for the current window
+        expected_returns (N-vector) only applies to mean_variance; without
+        them it gives the minimum-variance portfolio
+        """
+        weights = np.zeros(len(self.symbols))
+        if not self.covariance.ready:
+            self.weights = weights
+            return weights
+
+        names = np.nonzero(self.covariance.complete())[0]
+        if len(names) == 0:
+            self.weights = weights
+            return weights
+        if self.shrink:
+            cov,self.shrinkage = self.covariance.shrunk(names)
+        else:
+            cov = self.covariance.sample(names)
+
+        previous = self.weights[names]
+        initial = previous / previous.sum() if previous.sum() > 0 else None
+        cap = self.max_position_size
+
+        if self.method == 'mean_variance':
+            mu = None if expected_returns is None else np.asarray(expected_returns)[names]
+            solved = OPTIMIZERS['mean_variance'](
+                cov,mu,risk_aversion=self.risk_aversion,cap=cap,initial=initial
+            )
+        elif self.method == 'risk_parity':
+            if initial is not None:
+                # Names new to the window start from the smallest previous weight
+                initial = np.where(initial > 0,initial,initial[initial > 0].min())
+            solved = OPTIMIZERS['risk_parity'](cov,cap=cap,initial=initial)
+        else:
+            solved = OPTIMIZERS['hierarchical'](cov,cap=cap)
+
+        weights[names] = cap_weights(solved,cap)
+        self.weights = weights
+        return weights
+
+    def weights_by_symbol(self) -> Dict[str,float]:
+        return {symbol: float(weight) for symbol,weight in zip(self.symbols,self.weights) if weight > 0}
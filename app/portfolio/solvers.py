@@ -0,0 +1,302 @@
+import numpy as np
+from typing import List,Optional
+
+
+def cap_weights(weights: np.ndarray,cap: Optional[float] = None) -> np.ndarray:
+    """
+    Long-only weights summing to one with no weight above cap
+    Excess over the cap is handed to the uncapped names pro rata, repeated
+    until nothing exceeds it. When cap * N < 1 every name is held at cap
+    and the remainder stays in cash.
+    """
+    weights = np.clip(np.nan_to_num(weights),0.0,None)
+    total = weights.sum()
+    weights = weights / total if total > 0 else np.full(len(weights),1.0 / len(weights))
+    if cap is None:
+        return weights
+    if cap * len(weights) <= 1.0:
+        return np.full(len(weights),cap)
+
+    capped = np.zeros(len(weights),dtype=bool)
+    for _ in range(len(weights)):
+        over = weights > cap
+        if not over.any():
+            break
+        capped |= over
+        free = ~capped
+        weights[capped] = cap
+        remaining = 1.0 - cap * capped.sum()
+        free_total = weights[free].sum()
+        weights[free] = (
+            weights[free] * remaining / free_total if free_total > 0
+            else remaining / free.sum()
+        )
+    return weights
+
+
+def project_capped_simplex(values: np.ndarray,cap: Optional[float] = None) -> np.ndarray:
+    """
+    Euclidean projection onto {w : sum(w) = 1, 0 <= w <= cap}
+    The projection is clip(values - tau, 0, cap) where the clipped sum,
+    piecewise linear in tau, equals one. Evaluating it at every breakpoint
+    with one sort and prefix sums finds tau exactly in O(N log N).
+    """
+    width = len(values)
+    cap = 1.0 if cap is None else min(cap,1.0)
+    if cap * width <= 1.0:
+        return np.full(width,cap)
+
+    ascending = np.sort(values)
+    prefix = np.concatenate([[0.0],np.cumsum(ascending)])
+    taus = np.sort(np.concatenate([ascending,ascending - cap]))
+    # Names above tau + cap sit at the cap, those between tau and tau + cap are partial
+    saturated = width - np.searchsorted(ascending,taus + cap,side='left')
+    partial_start = np.searchsorted(ascending,taus,side='right')
+    partial_end = width - saturated
+    totals = (
+        saturated * cap
+        + prefix[partial_end] - prefix[partial_start]
+        - (partial_end - partial_start) * taus
+    )
+
+    # totals fall from width * cap to zero; interpolate on the crossing segment
+    k = int(np.nonzero(totals >= 1.0)[0][-1])
+    drop = totals[k] - totals[k + 1]
+    tau = taus[k] + (totals[k] - 1.0) * (taus[k + 1] - taus[k]) / drop if drop > 0 else taus[k]
+    return np.clip(values - tau,0.0,cap)
+
+
+def _largest_eigenvalue(matrix: np.ndarray,iterations: int = 30) -> float:
+    """Power iteration; an upper-bound estimate of the step-size constant"""
+    vector = np.full(len(matrix),1.0 / np.sqrt(len(matrix)))
+    value = 0.0
+    for _ in range(iterations):
+        product = matrix @ vector
+        norm = np.linalg.norm(product)
+        if norm == 0.0:
+            return 0.0
+        vector = product / norm
+        value = norm
+    return value
+
+
+def _active_set(
+        hessian: np.ndarray,
+        mu: np.ndarray,
+        cap: float,
+        initial: np.ndarray,
+        max_iter: int = 30
+) -> Optional[np.ndarray]:
+    """
+    Primal-dual active set method for min 1/2 w'Hw - mu'w over the capped simplex
+    Each step fixes the names at zero or at the cap, solves the equality
+    constrained problem on the rest, and moves names whose weight left its
+    bounds or whose multiplier has the wrong sign. Starting from the
+    previous solution's bounds it usually stops after one or two solves.
+    Returns None if the sets cycle, so the caller can fall back.
+    """
+    width = len(mu)
+    scale = 1.0 / max(np.mean(np.diag(hessian)),1e-16)
+    lower = initial <= 1e-12
+    upper = (initial >= cap - 1e-12) & ~lower
+    for _ in range(max_iter):
+        free = ~(lower | upper)
+        if not free.any():
+            return None
+        weights = np.where(upper,cap,0.0)
+        fixed = hessian[np.ix_(free,upper)] @ np.full(upper.sum(),cap)
+        solved = np.linalg.solve(
+            hessian[np.ix_(free,free)],
+            np.column_stack([mu[free] - fixed,np.ones(free.sum())])
+        )
+        # Multiplier of the budget constraint
+        budget = (solved[:,0].sum() - (1.0 - cap * upper.sum())) / solved[:,1].sum()
+        weights[free] = solved[:,0] - budget * solved[:,1]
+        # Negative gradient of the Lagrangian: zero on free names
+        slack = mu - hessian @ weights - budget
+        slack[free] = 0.0
+
+        moved = weights + scale * slack
+        next_lower = moved < 0.0
+        next_upper = (moved > cap) & ~next_lower
+        if (next_lower == lower).all() and (next_upper == upper).all():
+            return np.clip(weights,0.0,cap)
+        lower,upper = next_lower,next_upper
+    return None
+
+
+def mean_variance(
+        cov: np.ndarray,
+        expected_returns: Optional[np.ndarray] = None,
+        risk_aversion: float = 1.0,
+        cap: Optional[float] = None,
+        initial: Optional[np.ndarray] = None,
+        max_iter: int = 5000,
+        tol: float = 1e-6
+) -> np.ndarray:
+    """
+    Long-only mean-variance weights
+    Minimizes risk_aversion / 2 * w'Cw - mu'w over the capped simplex with
+    an active set method warm started from initial, falling back to
+    accelerated projected gradient (FISTA with adaptive restart) if the
+    active sets cycle. Without expected returns this is the
+    minimum-variance portfolio.
+    """
+    width = len(cov)
+    mu = np.zeros(width) if expected_returns is None else np.nan_to_num(expected_returns)
+    cap = 1.0 if cap is None else min(cap,1.0)
+    if cap * width <= 1.0:
+        return np.full(width,cap)
+    hessian = risk_aversion * cov
+
+    start = np.full(width,1.0 / width) if initial is None else initial
+    weights = project_capped_simplex(np.asarray(start,dtype=np.float64),cap)
+    solved = _active_set(hessian,mu,cap,weights)
+    if solved is not None:
+        return solved / solved.sum()
+
+    # Lipschitz constant of the gradient, with headroom for the power iteration estimate
+    step = 1.0 / (1.1 * _largest_eigenvalue(hessian) + 1e-12)
+    threshold = tol / width
+    momentum = weights.copy()
+    t = 1.0
+    for _ in range(max_iter):
+        gradient = hessian @ momentum - mu
+        updated = project_capped_simplex(momentum - step * gradient,cap)
+        change = updated - weights
+        if np.abs(change).max() < threshold:
+            weights = updated
+            break
+        if gradient @ change > 0:
+            # Momentum is pointing uphill; restart acceleration (O'Donoghue & Candes)
+            momentum,t = updated,1.0
+        else:
+            t_next = 0.5 * (1.0 + np.sqrt(1.0 + 4.0 * t * t))
+            momentum = updated + ((t - 1.0) / t_next) * change
+            t = t_next
+        weights = updated
+    return weights
+
+
+def risk_parity(
+        cov: np.ndarray,
+        budgets: Optional[np.ndarray] = None,
+        cap: Optional[float] = None,
+        initial: Optional[np.ndarray] = None,
+        max_iter: int = 50,
+        tol: float = 1e-10
+) -> np.ndarray:
+    """
+    Risk budgeting weights (equal risk contribution by default)
+    Solves min 1/2 y'Cy - sum(b * log y) by damped Newton (Spinu, 2013),
+    so w = y / sum(y) has risk contributions proportional to b. A warm
+    start from initial usually converges in a few steps.
+    """
+    width = len(cov)
+    budgets = np.full(width,1.0 / width) if budgets is None else budgets / budgets.sum()
+    scale = np.sqrt(np.clip(np.diag(cov),1e-16,None))
+
+    if initial is not None and np.all(initial > 0):
+        y = np.asarray(initial,dtype=np.float64)
+    else:
+        y = budgets / scale
+    # Rescale onto y'Cy = sum(b), where the solution lies
+    y = y / np.sqrt(max(y @ cov @ y,1e-16))
+
+    for _ in range(max_iter):
+        gradient = cov @ y - budgets / y
+        hessian = cov + np.diag(budgets / (y * y))
+        step = np.linalg.solve(hessian,gradient)
+        decrement = np.sqrt(max(gradient @ step,0.0))
+        if decrement < tol:
+            break
+        # Damped step keeps y inside the positive orthant
+        y = y - step / (1.0 + decrement) if decrement > 0.25 else y - step
+        y = np.clip(y,1e-16,None)
+    return cap_weights(y / y.sum(),cap)
+
+
+def _single_linkage_order(distance: np.ndarray) -> np.ndarray:
+    """
+    Leaf order of a single-linkage dendrogram
+    Single linkage merges clusters along minimum spanning tree edges in
+    increasing length, so the tree comes from Prim's algorithm and each
+    merge concatenates the two clusters' leaf lists.
+    """
+    width = len(distance)
+    in_tree = np.zeros(width,dtype=bool)
+    in_tree[0] = True
+    best = distance[0].copy()
+    parent = np.zeros(width,dtype=np.int64)
+    edges = []
+    for _ in range(width - 1):
+        candidates = np.where(in_tree,np.inf,best)
+        node = int(np.argmin(candidates))
+        edges.append((candidates[node],int(parent[node]),node))
+        in_tree[node] = True
+        closer = distance[node] < best
+        best = np.where(closer,distance[node],best)
+        parent = np.where(closer,node,parent)
+
+    root = list(range(width))
+    leaves: List[List[int]] = [[i] for i in range(width)]
+
+    def find(node: int) -> int:
+        while root[node] != node:
+            root[node] = root[root[node]]
+            node = root[node]
+        return node
+
+    for _,a,b in sorted(edges):
+        a,b = find(a),find(b)
+        root[b] = a
+        leaves[a] = leaves[a] + leaves[b]
+        leaves[b] = []
+    return np.array(leaves[find(0)])
+
+
+def _cluster_variance(cov: np.ndarray,members: np.ndarray) -> float:
+    """Variance of the inverse-variance portfolio of a cluster"""
+    sub = cov[np.ix_(members,members)]
+    inverse = 1.0 / np.clip(np.diag(sub),1e-16,None)
+    weights = inverse / inverse.sum()
+    return float(weights @ sub @ weights)
+
+
+def hierarchical(cov: np.ndarray,cap: Optional[float] = None) -> np.ndarray:
+    """
+    Hierarchical risk parity (Lopez de Prado, 2016)
+    Orders assets by single-linkage clustering of correlation distance,
+    then splits the order recursively, allocating between halves in
+    inverse proportion to their variance. Closed form, so no warm start.
+    """
+    width = len(cov)
+    std = np.sqrt(np.clip(np.diag(cov),1e-16,None))
+    correlation = np.clip(cov / np.outer(std,std),-1.0,1.0)
+    distance = np.sqrt(0.5 * (1.0 - correlation))
+    order = _single_linkage_order(distance)
+
+    weights = np.ones(width)
+    clusters = [order]
+    while clusters:
+        next_clusters = []
+        for cluster in clusters:
+            if len(cluster) < 2:
+                continue
+            half = len(cluster) // 2
+            left,right = cluster[:half],cluster[half:]
+            left_variance = _cluster_variance(cov,left)
+            right_variance = _cluster_variance(cov,right)
+            alpha = 1.0 - left_variance / (left_variance + right_variance)
+            weights[left] *= alpha
+            weights[right] *= 1.0 - alpha
+            next_clusters.extend([left,right])
+        clusters = next_clusters
+    return cap_weights(weights,cap)
+
+
+OPTIMIZERS = {
+    'mean_variance': mean_variance,
+    'risk_parity': risk_parity,
+    'hierarchical': hierarchical,
+}
@@ -0,0 +1,67 @@
+from pydantic import BaseModel,Field
+from typing import Dict,List,Optional
+from datetime import datetime
+
+
+class Order:
+    """
+    Paper order and its fill, slotted like Quote
+
+    quantity is signed: positive buys, negative sells. status moves from
+    new to open (resting limit order), filled, cancelled or rejected.
+    """
+
+    FIELDS = (
+        'id','symbol','quantity','order_type','limit_price','status',
+        'fill_price','commission','reason','created_at','filled_at',
+    )
+    __slots__ = FIELDS + ('submitted','done')
+
+    def __init__(
+            self,
+            id: int,
+            symbol: str,
+            quantity: float,
+            order_type: str = "market",
+            limit_price: Optional[float] = None
+    ):
+        self.id = id
+        self.symbol = symbol
+        self.quantity = quantity
+        self.order_type = order_type
+        self.limit_price = limit_price
+        self.status = "new"
+        self.fill_price: Optional[float] = None
+        self.commission = 0.0
+        self.reason: Optional[str] = None
+        self.created_at = datetime.now()
+        self.filled_at: Optional[datetime] = None
+        # Monotonic submit time, for fill latency
+        self.submitted = 0.0
+        # Resolved once the order leaves the queue (filled, open or rejected)
+        self.done = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("new","open")
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self,field) for field in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"Order({self.id}, {self.symbol!r}, {self.quantity!r}, status={self.status!r})"
+
+
+class OrderRequest(BaseModel):
+    """Order submitted through the API"""
+
+    symbol: str
+    quantity: float = Field(...,description="Signed quantity: positive buys, negative sells")
+    order_type: Optional[str] = Field(None,description="market or limit (default from config)")
+    limit_price: Optional[float] = None
+
+
+class OrderBatchRequest(BaseModel):
+    """Orders submitted together, e.g. by a rebalance"""
+
+    orders: List[OrderRequest]
@@ -0,0 +1,175 @@
+import numpy as np
+from typing import Any,Dict,Iterator,List,Optional,Sequence,Tuple
+from datetime import datetime
+from app.utils.json_encoding import dumps
+
+
+class Quote:
+    """
+    Standardized quote record shared by all providers
+
+    Slotted to keep per-quote memory and allocation small. Supports the
+    read/write mapping access (quote['price'], quote.get('price')) used by
+    code written against the earlier dict quotes.
+    """
+
+    FIELDS = (
+        'symbol','price','change','change_percent','volume','timestamp',
+        'bid','ask','open','high','low','close','prev_close',
+        'provider','stale','as_of',
+    )
+    __slots__ = FIELDS
+
+    def __init__(
+            self,
+            symbol: str,
+            price: float = 0.0,
+            change: float = 0.0,
+            change_percent: float = 0.0,
+            volume: int = 0,
+            timestamp: Optional[datetime] = None,
+            bid: float = 0.0,
+            ask: float = 0.0,
+            open: float = 0.0,
+            high: float = 0.0,
+            low: float = 0.0,
+            close: float = 0.0,
+            prev_close: float = 0.0,
+            provider: Optional[str] = None,
+            stale: bool = False,
+            as_of: Optional[datetime] = None
+    ):
+        self.symbol = symbol
+        self.price = price
+        self.change = change
+        self.change_percent = change_percent
+        self.volume = volume
+        self.timestamp = timestamp if timestamp is not None else datetime.now()
+        self.bid = bid
+        self.ask = ask
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.prev_close = prev_close
+        self.provider = provider
+        self.stale = stale
+        self.as_of = as_of
+
+    @classmethod
+    def empty(cls,symbol: str) -> "Quote":
+        """Placeholder quote for a symbol no provider could price"""
+        return cls(symbol,provider='none')
+
+    @classmethod
+    def from_dict(cls,data: Dict) -> "Quote":
+        return cls(**{key: value for key,value in data.items() if key in cls.FIELDS})
+
+    def copy(self) -> "Quote":
+        quote = Quote.__new__(Quote)
+        for field in self.FIELDS:
+            setattr(quote,field,getattr(self,field))
+        return quote
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self,field) for field in self.FIELDS}
+
+    # Mapping-style access
+
+    def __getitem__(self,key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self,key)
+
+    def __setitem__(self,key: str,value: Any):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self,key,value)
+
+    def __contains__(self,key: str) -> bool:
+        return key in self.FIELDS
+
+    def get(self,key: str,default: Any = None) -> Any:
+        if key not in self.FIELDS:
+            return default
+        return getattr(self,key)
+
+    def keys(self) -> Tuple[str,...]:
+        return self.FIELDS
+
+    def items(self) -> Iterator[Tuple[str,Any]]:
+        return ((field,getattr(self,field)) for field in self.FIELDS)
+
+    def __eq__(self,other) -> bool:
+        if not isinstance(other,Quote):
+            return NotImplemented
+        return all(getattr(self,f) == getattr(other,f) for f in self.FIELDS)
+
+    def __repr__(self) -> str:
+        return f"Quote({self.symbol!r}, price={self.price!r}, provider={self.provider!r})"
+
+
+class QuoteBatch:
+    """
+    Columnar batch of quotes with one array per field
+
+    Numeric fields are NumPy arrays, so a batch serializes straight to JSON
+    bytes without building a dict per quote (orient='columns'), while
+    orient='records' keeps the row-per-quote layout the dashboard reads.
+    """
+
+    FLOAT_FIELDS = (
+        'price','change','change_percent','bid','ask',
+        'open','high','low','close','prev_close',
+    )
+    OBJECT_FIELDS = ('symbol','timestamp','provider','as_of')
+
+    def __init__(self,columns: Dict[str,Any]):
+        self.columns = columns
+
+    @classmethod
+    def from_quotes(cls,quotes: Sequence[Quote]) -> "QuoteBatch":
+        count = len(quotes)
+        columns: Dict[str,Any] = {}
+        for field in cls.FLOAT_FIELDS:
+            columns[field] = np.fromiter(
+                (getattr(quote,field) for quote in quotes),dtype=np.float64,count=count
+            )
+        columns['volume'] = np.fromiter(
+            (getattr(quote,'volume') for quote in quotes),dtype=np.int64,count=count
+        )
+        columns['stale'] = np.fromiter(
+            (getattr(quote,'stale') for quote in quotes),dtype=bool,count=count
+        )
+        for field in cls.OBJECT_FIELDS:
+            columns[field] = [getattr(quote,field) for quote in quotes]
+        return cls(columns)
+
+    def __len__(self) -> int:
+        return len(self.columns['symbol'])
+
+    def to_records(self) -> List[Dict]:
+        """Row-per-quote dicts in Quote.FIELDS order"""
+        fields = Quote.FIELDS
+        lists = [
+            column.tolist() if isinstance(column,np.ndarray) else column
+            for column in (self.columns[field] for field in fields)
+        ]
+        return [dict(zip(fields,row)) for row in zip(*lists)]
+
+    def to_json(self,orient: str = "records",**envelope) -> bytes:
+        """
+        Serialize as {**envelope, 'count': n, 'quotes': ...} JSON bytes
+        orient='columns' emits quotes as {field: [values...]}
+        """
+        if orient == "columns":
+            quotes = {field: self.columns[field] for field in Quote.FIELDS}
+        elif orient == "records":
+            quotes = self.to_records()
+        else:
+            raise ValueError(f"Unknown orient: {orient}")
+
+        payload = dict(envelope)
+        payload['count'] = len(self)
+        payload['quotes'] = quotes
+        return dumps(payload)
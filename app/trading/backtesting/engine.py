@@ -0,0 +1,275 @@
+import numpy as np
+from typing import TYPE_CHECKING,Callable,Dict,List,Optional
+from app.data.processors.features import PricePanel
+from app.data.processors.indicators import ffill
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def rebalance_mask(index,frequency: str = "daily") -> np.ndarray:
+    """
+    Bars on which a portfolio rebalances: every bar ('daily') or the first
+    bar of each week or month of a DatetimeIndex
+    """
+    import pandas as pd
+
+    count = len(index)
+    if frequency == "daily" or count == 0:
+        return np.ones(count,dtype=bool)
+
+    index = pd.DatetimeIndex(index)
+    if frequency == "weekly":
+        periods = index.year.to_numpy() * 100 + index.isocalendar().week.to_numpy()
+    elif frequency == "monthly":
+        periods = index.year.to_numpy() * 12 + index.month.to_numpy()
+    else:
+        raise ValueError(f"Unknown rebalance frequency: {frequency}")
+
+    mask = np.ones(count,dtype=bool)
+    mask[1:] = periods[1:] != periods[:-1]
+    return mask
+
+
+class BacktestResult:
+    """Equity curve, per-bar portfolio state and trade ledger of a backtest"""
+
+    def __init__(
+            self,
+            index,
+            symbols: List[str],
+            equity: np.ndarray,
+            returns: np.ndarray,
+            weights: np.ndarray,
+            turnover: np.ndarray,
+            costs: np.ndarray,
+            trades: Dict[str,np.ndarray],
+            initial_capital: float,
+            periods_per_year: int = 252
+    ):
+        self.index = index
+        self.symbols = symbols
+        self.equity = equity
+        self.returns = returns
+        self.weights = weights
+        self.turnover = turnover
+        self.costs = costs
+        self.trades = trades
+        self.initial_capital = initial_capital
+        self.periods_per_year = periods_per_year
+
+    def stats(self) -> Dict[str,float]:
+        """Summary performance statistics"""
+        count = len(self.equity)
+        if count == 0:
+            return {}
+
+        final = self.equity[-1]
+        total_return = final / self.initial_capital - 1.0
+        years = count / self.periods_per_year
+        std = self.returns.std(ddof=1) if count > 1 else 0.0
+        peaks = np.maximum.accumulate(np.concatenate([[self.initial_capital],self.equity]))[1:]
+        drawdown = self.equity / peaks - 1.0
+
+        return {
+            'final_equity': float(final),
+            'total_return': float(total_return),
+            'cagr': float((final / self.initial_capital) ** (1.0 / years) - 1.0) if final > 0 else -1.0,
+            'volatility': float(std * np.sqrt(self.periods_per_year)),
+            'sharpe': float(self.returns.mean() / std * np.sqrt(self.periods_per_year)) if std > 0 else 0.0,
+            'max_drawdown': float(drawdown.min()),
+            'annual_turnover': float(self.turnover.sum() / years),
+            'total_costs': float(self.trades['commission'].sum() + self.trades['slippage'].sum()),
+            'trades': int(len(self.trades['bar'])),
+        }
+
+    def equity_frame(self) -> "pd.DataFrame":
+        """Equity, returns, turnover and costs per bar as a DataFrame"""
+        import pandas as pd
+
+        return pd.DataFrame({
+            'equity': self.equity,
+            'returns': self.returns,
+            'turnover': self.turnover,
+            'costs': self.costs,
+        },index=self.index)
+
+    def trades_frame(self) -> "pd.DataFrame":
+        """Trade ledger as a DataFrame, one row per fill"""
+        import pandas as pd
+
+        trades = dict(self.trades)
+        bars = trades.pop('bar')
+        symbols = np.asarray(self.symbols,dtype=object)[trades.pop('symbol')]
+        frame = pd.DataFrame(trades)
+        frame.insert(0,'symbol',symbols)
+        frame.insert(0,'timestamp',np.asarray(self.index)[bars] if self.index is not None else bars)
+        return frame
+
+
+class Backtester:
+    """
+    Vectorized target-weight portfolio backtester
+
+    A strategy supplies target weights for every bar (T x N, fractions of
+    equity, negative for shorts; the remainder is cash). On rebalance bars
+    the portfolio trades to its targets at the close; between rebalances
+    holdings drift with prices. The whole run is array operations over the
+    panel: holdings drift from the last rebalance anchor, portfolio returns
+    and turnover come from the drifted weights, and commission plus
+    slippage are charged on traded notional.
+
+    Weights chosen at bar t must only use data up to t; use delay to
+    execute them a number of bars later.
+    """
+
+    def __init__(
+            self,
+            initial_capital: float = 100000,
+            commission: float = 0.001,
+            slippage: float = 0.001,
+            max_position_size: Optional[float] = None,
+            periods_per_year: int = 252
+    ):
+        self.initial_capital = initial_capital
+        self.commission = commission
+        self.slippage = slippage
+        self.max_position_size = max_position_size
+        self.periods_per_year = periods_per_year
+
+    @classmethod
+    def from_config(cls,config_manager=None) -> "Backtester":
+        """Backtester using initial_capital, commission, slippage and position limits from config"""
+        if config_manager is None:
+            from app.core.config import config_manager
+        trading_config = config_manager.get_trading_config()
+        return cls(
+            initial_capital=config_manager.settings.initial_capital,
+            commission=config_manager.settings.commission,
+            slippage=trading_config.get('execution',{}).get('slippage',0.001),
+            max_position_size=trading_config.get('risk_management',{}).get('max_position_size')
+        )
+
+    def run_strategy(
+            self,
+            panel: PricePanel,
+            strategy: Callable[..., np.ndarray],
+            rebalance: str = "daily",
+            delay: int = 0,
+            **params
+    ) -> BacktestResult:
+        """Backtest strategy(panel.close, **params) -> T x N target weights"""
+        weights = strategy(panel.close,**params)
+        return self.run(
+            panel.close,
+            weights,
+            rebalance=rebalance_mask(panel.index,rebalance) if panel.index is not None else None,
+            index=panel.index,
+            symbols=panel.symbols,
+            delay=delay
+        )
+
+    def run(
+            self,
+            prices: np.ndarray,
+            weights: np.ndarray,
+            rebalance: Optional[np.ndarray] = None,
+            index=None,
+            symbols: Optional[List[str]] = None,
+            delay: int = 0
+    ) -> BacktestResult:
+        """
+        Backtest target weights against a T x N close price panel
+        rebalance is a boolean mask of trading bars (default: every bar)
+        """
+        count,width = prices.shape
+        prices = ffill(np.asarray(prices,dtype=np.float64))
+        tradable = ~np.isnan(prices)
+
+        weights = np.nan_to_num(np.asarray(weights,dtype=np.float64))
+        if delay:
+            weights = np.vstack([np.zeros((delay,width)),weights[:-delay]])
+        if self.max_position_size is not None:
+            weights = np.clip(weights,-self.max_position_size,self.max_position_size)
+        # Nothing can be held before a symbol has a price
+        weights = np.where(tradable,weights,0.0)
+
+        if rebalance is None:
+            rebalance = np.ones(count,dtype=bool)
+        rebalance = np.asarray(rebalance,dtype=bool)
+
+        # Holdings drift from the targets set on the latest rebalance bar
+        anchor = np.where(rebalance,np.arange(count),-1)
+        np.maximum.accumulate(anchor,out=anchor)
+        invested = anchor >= 0
+        anchor = np.maximum(anchor,0)
+        targets = weights[anchor]
+        with np.errstate(invalid='ignore',divide='ignore'):
+            growth = np.nan_to_num(prices / prices[anchor],nan=1.0,posinf=1.0)
+            grown = targets * growth
+            value = 1.0 - targets.sum(axis=1) + grown.sum(axis=1)
+            held = np.where(invested[:,None],grown / value[:,None],0.0)
+
+        asset_returns = np.zeros_like(prices)
+        with np.errstate(invalid='ignore',divide='ignore'):
+            asset_returns[1:] = np.nan_to_num(prices[1:] / prices[:-1] - 1.0)
+        held_before = np.zeros_like(held)
+        held_before[1:] = held[:-1]
+        gross = (held_before * asset_returns).sum(axis=1)
+
+        # Pre-trade weights: yesterday's holdings after today's price moves
+        with np.errstate(invalid='ignore',divide='ignore'):
+            drifted = held_before * (1.0 + asset_returns) / (1.0 + gross)[:,None]
+        trade = np.where(rebalance[:,None],held - drifted,0.0)
+        turnover = np.abs(trade).sum(axis=1)
+        cost_rate = turnover * (self.commission + self.slippage)
+
+        equity = self.initial_capital * np.cumprod((1.0 + gross) * (1.0 - cost_rate))
+        equity_before = np.empty(count)
+        equity_before[0] = self.initial_capital
+        equity_before[1:] = equity[:-1]
+        pre_trade_equity = equity_before * (1.0 + gross)
+        returns = equity / equity_before - 1.0
+
+        return BacktestResult(
+            index=index,
+            symbols=list(symbols) if symbols is not None else [str(i) for i in range(width)],
+            equity=equity,
+            returns=returns,
+            weights=held,
+            turnover=turnover,
+            costs=cost_rate * pre_trade_equity,
+            trades=self._ledger(rebalance,held,drifted,prices,equity,pre_trade_equity),
+            initial_capital=self.initial_capital,
+            periods_per_year=self.periods_per_year
+        )
+
+    def _ledger(
+            self,
+            rebalance: np.ndarray,
+            held: np.ndarray,
+            drifted: np.ndarray,
+            prices: np.ndarray,
+            equity: np.ndarray,
+            pre_trade_equity: np.ndarray
+    ) -> Dict[str,np.ndarray]:
+        """
+        One fill per (bar, symbol) whose holding changed on a rebalance
+        Notional is the change in position value, so fills add up to positions
+        """
+        change = held * equity[:,None] - drifted * pre_trade_equity[:,None]
+        change = np.where(rebalance[:,None],change,0.0)
+        bars,columns = np.nonzero(np.abs(change) > 1e-9 * np.abs(equity)[:,None])
+        notional = change[bars,columns]
+        price = prices[bars,columns]
+        side = np.sign(notional)
+        return {
+            'bar': bars,
+            'symbol': columns,
+            'side': np.where(side > 0,'buy','sell'),
+            'quantity': notional / price,
+            'price': price * (1.0 + side * self.slippage),
+            'notional': notional,
+            'commission': np.abs(notional) * self.commission,
+            'slippage': np.abs(notional) * self.slippage,
+        }
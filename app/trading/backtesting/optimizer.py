@@ -0,0 +1,279 @@
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any,Callable,Dict,List,Optional,Sequence
+import numpy as np
+from app.data.processors.features import PricePanel
+from app.trading.backtesting.engine import Backtester,rebalance_mask
+from app.trading.backtesting.shared import SharedPanel,fingerprint_panel,index_to_ns
+
+# Panel mapped by each worker process once, in the pool initializer
+_worker_panel: Optional[SharedPanel] = None
+_worker_masks: Dict[str,np.ndarray] = {}
+
+
+def _init_worker(handle: Dict):
+    global _worker_panel
+    _worker_panel = SharedPanel.attach(handle)
+
+
+def _run_cell(cell: Dict) -> Dict:
+    """Evaluate one cell against the worker's shared panel"""
+    panel = _worker_panel
+    rebalance = cell['rebalance']
+    if rebalance not in _worker_masks:
+        _worker_masks[rebalance] = rebalance_mask(panel.index,rebalance)
+    return evaluate_cell(panel.close,_worker_masks[rebalance],cell)
+
+
+def evaluate_cell(close: np.ndarray,rebalance: np.ndarray,cell: Dict) -> Dict:
+    """
+    Backtest one parameter set over bars [start, end)
+    Weights are computed from the start of the panel so indicators are
+    warmed up by the bars before start
+    """
+    start,end = cell['start'],cell['end']
+    weights = cell['strategy'](close[:end],**cell['params'])[start:]
+    result = cell['backtester'].run(close[start:end],weights,rebalance=rebalance[start:end])
+    return result.stats()
+
+
+def expand_grid(grid: Dict[str,Sequence]) -> List[Dict[str,Any]]:
+    """All parameter combinations of a {name: [values]} grid"""
+    names = sorted(grid)
+    return [dict(zip(names,values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+class ResultCache:
+    """
+    Backtest results on disk, one JSON file per cell
+    Keyed by panel fingerprint plus strategy, parameters, bar range,
+    rebalance frequency and backtester settings
+    """
+
+    def __init__(self,root: str = "data/backtests"):
+        self.root = Path(root)
+
+    def key(self,fingerprint: str,cell: Dict) -> str:
+        strategy = cell['strategy']
+        description = {
+            'strategy': f"{strategy.__module__}.{strategy.__qualname__}",
+            'params': cell['params'],
+            'start': cell['start'],
+            'end': cell['end'],
+            'rebalance': cell['rebalance'],
+            'backtester': vars(cell['backtester']),
+        }
+        encoded = json.dumps(description,sort_keys=True,default=str).encode()
+        return hashlib.blake2b(encoded,digest_size=16).hexdigest()
+
+    def _path(self,fingerprint: str,key: str) -> Path:
+        return self.root / fingerprint / f"{key}.json"
+
+    def get(self,fingerprint: str,key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(fingerprint,key),'r') as f:
+                return json.load(f)
+        except (FileNotFoundError,json.JSONDecodeError):
+            return None
+
+    def put(self,fingerprint: str,key: str,stats: Dict):
+        path = self._path(fingerprint,key)
+        path.parent.mkdir(parents=True,exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path,'w') as f:
+            json.dump(stats,f)
+        os.replace(tmp_path,path)
+
+
+class Optimizer:
+    """
+    Parameter sweeps and walk-forward analysis over a process pool
+
+    The panel is copied into shared memory once and every worker maps it
+    in its initializer, so tasks only carry parameters. Results are cached
+    by data fingerprint plus parameters, so re-runs only evaluate new cells.
+    processes=1 runs in-process without a pool.
+
+        with Optimizer(Backtester.from_config(),panel) as optimizer:
+            results = optimizer.sweep(momentum,{'lookback': [63,126,252],'top_n': [10,20]})
+    """
+
+    def __init__(
+            self,
+            backtester: Backtester,
+            panel: PricePanel,
+            processes: Optional[int] = None,
+            cache_dir: Optional[str] = "data/backtests"
+    ):
+        self.backtester = backtester
+        self.panel = panel
+        self.processes = processes or os.cpu_count() or 1
+        self.cache = ResultCache(cache_dir) if cache_dir else None
+        self.cache_hits = 0
+        self.evaluated = 0
+        self._shared: Optional[SharedPanel] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._masks: Dict[str,np.ndarray] = {}
+        self.fingerprint = self._fingerprint()
+
+    def _fingerprint(self) -> str:
+        index_ns = index_to_ns(self.panel.index)
+        return fingerprint_panel(self.panel.close,index_ns,self.panel.symbols)
+
+    def __enter__(self) -> "Optimizer":
+        return self
+
+    def __exit__(self,*exc):
+        self.close()
+
+    def close(self):
+        """Stop the worker pool and free the shared panel"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._shared is not None:
+            self._shared.release()
+            self._shared = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._shared = SharedPanel.create(self.panel)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                initializer=_init_worker,
+                initargs=(self._shared.handle(),)
+            )
+        return self._executor
+
+    def _cell(self,strategy: Callable,params: Dict,start: int,end: int,rebalance: str) -> Dict:
+        return {
+            'strategy': strategy,
+            'params': params,
+            'start': start,
+            'end': end,
+            'rebalance': rebalance,
+            'backtester': self.backtester,
+        }
+
+    def evaluate(self,cells: List[Dict]) -> List[Dict]:
+        """Stats for each cell, from the cache or the worker pool"""
+        results: List[Optional[Dict]] = [None] * len(cells)
+        keys = [None] * len(cells)
+        misses = []
+        for position,cell in enumerate(cells):
+            if self.cache is not None:
+                keys[position] = self.cache.key(self.fingerprint,cell)
+                cached = self.cache.get(self.fingerprint,keys[position])
+                if cached is not None:
+                    results[position] = cached
+                    self.cache_hits += 1
+                    continue
+            misses.append(position)
+
+        if misses:
+            pending = [cells[position] for position in misses]
+            if self.processes == 1:
+                computed = [self._evaluate_local(cell) for cell in pending]
+            else:
+                chunksize = max(1,len(pending) // (self.processes * 4))
+                computed = list(self._get_executor().map(_run_cell,pending,chunksize=chunksize))
+
+            for position,stats in zip(misses,computed):
+                results[position] = stats
+                if self.cache is not None:
+                    self.cache.put(self.fingerprint,keys[position],stats)
+            self.evaluated += len(misses)
+
+        return results
+
+    def _evaluate_local(self,cell: Dict) -> Dict:
+        rebalance = cell['rebalance']
+        if rebalance not in self._masks:
+            self._masks[rebalance] = rebalance_mask(self.panel.index,rebalance)
+        return evaluate_cell(self.panel.close,self._masks[rebalance],cell)
+
+    def sweep(
+            self,
+            strategy: Callable,
+            grid: Dict[str,Sequence],
+            rebalance: str = "daily",
+            start: int = 0,
+            end: Optional[int] = None
+    ) -> List[Dict]:
+        """Backtest every parameter combination over bars [start, end)"""
+        end = len(self.panel) if end is None else end
+        combinations = expand_grid(grid)
+        cells = [self._cell(strategy,params,start,end,rebalance) for params in combinations]
+        return [
+            {'params': params,'stats': stats}
+            for params,stats in zip(combinations,self.evaluate(cells))
+        ]
+
+    def walk_forward(
+            self,
+            strategy: Callable,
+            grid: Dict[str,Sequence],
+            train_bars: int,
+            test_bars: int,
+            step: Optional[int] = None,
+            metric: str = "sharpe",
+            rebalance: str = "daily"
+    ) -> Dict:
+        """
+        Rolling walk-forward analysis
+        Each fold picks the best parameters by metric on its training window
+        and reports their performance on the following test window
+        """
+        step = step or test_bars
+        folds = []
+        start = 0
+        while start + train_bars + test_bars <= len(self.panel):
+            folds.append((start,start + train_bars,start + train_bars + test_bars))
+            start += step
+        if not folds:
+            raise ValueError("Panel is shorter than one train plus test window")
+
+        combinations = expand_grid(grid)
+        # All training cells of all folds go to the pool as one batch
+        train_cells = [
+            self._cell(strategy,params,train_start,train_end,rebalance)
+            for train_start,train_end,_ in folds
+            for params in combinations
+        ]
+        train_stats = self.evaluate(train_cells)
+
+        best = []
+        for fold in range(len(folds)):
+            scores = train_stats[fold * len(combinations):(fold + 1) * len(combinations)]
+            choice = int(np.nanargmax([s.get(metric,np.nan) for s in scores]))
+            best.append((combinations[choice],scores[choice]))
+
+        test_cells = [
+            self._cell(strategy,params,train_end,test_end,rebalance)
+            for (params,_),(_,train_end,test_end) in zip(best,folds)
+        ]
+        test_stats = self.evaluate(test_cells)
+
+        index = self.panel.index
+        results = []
+        for (train_start,train_end,test_end),(params,train),test in zip(folds,best,test_stats):
+            results.append({
+                'train_start': str(index[train_start]),
+                'test_start': str(index[train_end]),
+                'test_end': str(index[test_end - 1]),
+                'params': params,
+                'train': train,
+                'test': test,
+            })
+
+        test_returns = np.array([fold['test']['total_return'] for fold in results])
+        return {
+            'folds': results,
+            'metric': metric,
+            'out_of_sample_return': float(np.prod(1.0 + test_returns) - 1.0),
+            'mean_test_metric': float(np.nanmean([fold['test'].get(metric,np.nan) for fold in results])),
+        }
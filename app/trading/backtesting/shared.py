@@ -0,0 +1,132 @@
+import hashlib
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict,List,Optional
+from app.data.processors.features import PricePanel
+
+
+class SharedPanel:
+    """
+    Close price panel placed once in shared memory for worker processes
+
+    The parent copies the panel in with create(); workers map the same
+    block with attach(handle) instead of each unpickling a copy. Layout:
+    T x N float64 closes followed by T int64 bar timestamps (ns).
+    """
+
+    def __init__(
+            self,
+            memory: shared_memory.SharedMemory,
+            shape,
+            symbols: List[str],
+            fingerprint: str,
+            owner: bool,
+            tz: Optional[str] = None
+    ):
+        self._memory = memory
+        self.shape = tuple(shape)
+        self.symbols = symbols
+        self.fingerprint = fingerprint
+        self.tz = tz
+        self._owner = owner
+
+        count,width = self.shape
+        self.close = np.ndarray(self.shape,dtype=np.float64,buffer=memory.buf)
+        self.index_ns = np.ndarray(
+            (count,),dtype=np.int64,buffer=memory.buf,offset=count * width * 8
+        )
+
+    @classmethod
+    def create(cls,panel: PricePanel) -> "SharedPanel":
+        """Copy a panel into a new shared memory block"""
+        import pandas as pd
+
+        close = np.ascontiguousarray(panel.close,dtype=np.float64)
+        index = pd.DatetimeIndex(panel.index)
+        index_ns = index_to_ns(index)
+        size = max(close.nbytes + index_ns.nbytes,1)
+
+        memory = shared_memory.SharedMemory(create=True,size=size)
+        shared = cls(
+            memory,
+            close.shape,
+            list(panel.symbols),
+            fingerprint_panel(close,index_ns,panel.symbols),
+            owner=True,
+            tz=str(index.tz) if index.tz is not None else None
+        )
+        shared.close[...] = close
+        shared.index_ns[...] = index_ns
+        return shared
+
+    def handle(self) -> Dict:
+        """Picklable description workers attach with"""
+        return {
+            'name': self._memory.name,
+            'shape': self.shape,
+            'symbols': self.symbols,
+            'fingerprint': self.fingerprint,
+            'tz': self.tz,
+        }
+
+    @classmethod
+    def attach(cls,handle: Dict) -> "SharedPanel":
+        """Map an existing block created by another process"""
+        try:
+            # Only the creating process should track (and unlink) the block
+            memory = shared_memory.SharedMemory(name=handle['name'],track=False)
+        except TypeError:
+            memory = shared_memory.SharedMemory(name=handle['name'])
+        return cls(
+            memory,
+            handle['shape'],
+            handle['symbols'],
+            handle['fingerprint'],
+            owner=False,
+            tz=handle['tz']
+        )
+
+    @property
+    def index(self):
+        """Bar timestamps as a DatetimeIndex in the panel's timezone"""
+        import pandas as pd
+
+        index = pd.DatetimeIndex(self.index_ns.view('datetime64[ns]'))
+        if self.tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+        return index
+
+    def release(self):
+        """Detach, and free the block if this process created it"""
+        # Drop the array views first so the buffer can be closed
+        self.close = None
+        self.index_ns = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+    def __enter__(self) -> "SharedPanel":
+        return self
+
+    def __exit__(self,*exc):
+        self.release()
+
+
+def index_to_ns(index) -> np.ndarray:
+    """UTC nanoseconds of a DatetimeIndex, whatever its stored resolution"""
+    import pandas as pd
+
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.values.astype('datetime64[ns]').view('int64')
+
+
+def fingerprint_panel(close: np.ndarray,index_ns: np.ndarray,symbols: List[str]) -> str:
+    """Content hash identifying a panel for result caching"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(close.shape,dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(close).tobytes())
+    digest.update(np.ascontiguousarray(index_ns).tobytes())
+    digest.update('\0'.join(symbols).encode())
+    return digest.hexdigest()
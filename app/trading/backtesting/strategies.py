@@ -0,0 +1,96 @@
+import numpy as np
+from typing import Optional
+from app.data.processors.indicators import ffill,first_valid,mean_std,rolling_sums
+from app.portfolio.optimizer import PortfolioOptimizer
+
+
+def _sma(close: np.ndarray,window: int) -> np.ndarray:
+    zero = np.zeros(close.shape[1])
+    sums,_,counts = rolling_sums(close,window,zero)
+    return np.where(counts >= window,sums / window,np.nan)
+
+
+def _equal_weight(selected: np.ndarray) -> np.ndarray:
+    """Equal weights across the selected symbols of each bar"""
+    count = selected.sum(axis=1,keepdims=True)
+    with np.errstate(invalid='ignore',divide='ignore'):
+        return np.where(count > 0,selected / count,0.0)
+
+
+def moving_average_crossover(close: np.ndarray,fast: int = 20,slow: int = 50) -> np.ndarray:
+    """Equal-weight long the symbols whose fast SMA is above their slow SMA"""
+    close = ffill(close)
+    with np.errstate(invalid='ignore'):
+        selected = _sma(close,fast) > _sma(close,slow)
+    return _equal_weight(selected)
+
+
+def momentum(close: np.ndarray,lookback: int = 126,top_n: int = 20) -> np.ndarray:
+    """Equal-weight long the top_n symbols by trailing lookback return"""
+    close = ffill(close)
+    trailing = np.full_like(close,np.nan)
+    trailing[lookback:] = close[lookback:] / close[:-lookback] - 1.0
+    scores = np.where(np.isnan(trailing),-np.inf,trailing)
+
+    top_n = min(top_n,close.shape[1])
+    # Rank within each bar without sorting whole rows
+    top = np.argpartition(-scores,top_n - 1,axis=1)[:,:top_n]
+    selected = np.zeros(close.shape,dtype=bool)
+    np.put_along_axis(selected,top,True,axis=1)
+    selected &= np.isfinite(scores)
+    return _equal_weight(selected)
+
+
+def mean_reversion(close: np.ndarray,window: int = 20,entry: float = 1.0) -> np.ndarray:
+    """Equal-weight long the symbols trading more than entry std below their SMA"""
+    close = ffill(close)
+    shift = first_valid(close)
+    sums,squares,counts = rolling_sums(close,window,shift)
+    mean,std = mean_std(sums,squares,counts,window,shift)
+    with np.errstate(invalid='ignore',divide='ignore'):
+        selected = (close - mean) / std < -entry
+    return _equal_weight(selected)
+
+
+def optimized(
+        close: np.ndarray,
+        method: str = "risk_parity",
+        window: int = 252,
+        every: int = 21,
+        max_position_size: Optional[float] = None,
+        risk_aversion: float = 1.0
+) -> np.ndarray:
+    """
+    Portfolio optimizer weights, re-solved every `every` bars and held between
+    The covariance window advances incrementally between solves and each
+    solve is warm started from the previous one
+    """
+    close = ffill(close)
+    count,width = close.shape
+    returns = np.full(close.shape,np.nan)
+    with np.errstate(invalid='ignore',divide='ignore'):
+        returns[1:] = close[1:] / close[:-1] - 1.0
+
+    optimizer = PortfolioOptimizer(
+        [str(i) for i in range(width)],
+        method=method,
+        window=window,
+        max_position_size=max_position_size,
+        risk_aversion=risk_aversion
+    )
+    weights = np.zeros(close.shape)
+    # Bar 0 has no return
+    fed = 1
+    for bar in range(window,count,every):
+        optimizer.extend(returns[fed:bar + 1])
+        fed = bar + 1
+        weights[bar:bar + every] = optimizer.optimize()
+    return weights
+
+
+STRATEGIES = {
+    'moving_average_crossover': moving_average_crossover,
+    'momentum': momentum,
+    'mean_reversion': mean_reversion,
+    'optimized': optimized,
+}
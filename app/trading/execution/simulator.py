@@ -0,0 +1,322 @@
+import asyncio
+import itertools
+import time
+import numpy as np
+from collections import deque
+from datetime import datetime
+from typing import Callable,Dict,List,Optional
+from app.schemas.order import Order
+from app.utils.file_lock import try_lock_file
+
+
+class ExecutionSimulator:
+    """
+    Paper-trading order management and fill simulation
+
+    Orders are queued and matched by a background task against the bid and
+    ask of the latest snapshot quotes: buys fill at the ask and sells at the
+    bid, moved against the order by slippage, with commission charged on
+    the notional. Limit orders that are not marketable rest on the book
+    and are re-checked only when their symbol's quote changes. Fills are
+    posted to the risk engine, which keeps positions and cash. With
+    enforce_limits, risk limits and cash are checked at submission and
+    again before a resting order fills, since other fills may have used
+    the room it had.
+
+    The matcher drains the queue in batches of max_batch orders and yields
+    to the event loop between batches, so a rebalance burst across hundreds
+    of symbols never holds the loop that serves the API.
+
+    The book, order ids and the risk engine's positions live in this
+    process. With several server workers only the process holding
+    lock_file runs the simulator; the others stay stopped with
+    locked_out set, so orders never split across diverging books.
+    """
+
+    def __init__(
+            self,
+            snapshot_service,
+            risk_engine,
+            order_type: str = "market",
+            slippage: float = 0.001,
+            commission: float = 0.001,
+            enforce_limits: bool = True,
+            max_batch: int = 256,
+            max_history: int = 10000,
+            lock_file: Optional[str] = "data/paper_trading.lock"
+    ):
+        self.snapshot_service = snapshot_service
+        self.risk_engine = risk_engine
+        self.order_type = order_type
+        self.slippage = slippage
+        self.commission = commission
+        self.enforce_limits = enforce_limits
+        self.max_batch = max_batch
+        self.lock_file = lock_file
+        self.locked_out = False
+        self._lock_handle = None
+
+        self.orders: Dict[int,Order] = {}
+        self._history = deque(maxlen=max_history)
+        self._resting: Dict[str,Dict[int,Order]] = {}
+        self._ids = itertools.count(1)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Order],None]] = []
+
+        self.submitted = 0
+        self.filled = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.notional = 0.0
+        self.commissions = 0.0
+        # Submit-to-fill latencies and fill times for the throughput window
+        self._latencies = deque(maxlen=10000)
+        self._fill_times = deque(maxlen=100000)
+
+    @classmethod
+    def from_config(cls,snapshot_service,risk_engine,config_manager=None) -> "ExecutionSimulator":
+        """Simulator using trading.execution order_type, slippage, commission and lock_file from config"""
+        if config_manager is None:
+            from app.core.config import config_manager
+        execution_config = config_manager.get_trading_config().get('execution',{}) or {}
+        return cls(
+            snapshot_service,
+            risk_engine,
+            order_type=execution_config.get('order_type','market'),
+            slippage=execution_config.get('slippage',0.001),
+            commission=execution_config.get('commission',0.001),
+            lock_file=execution_config.get('lock_file',"data/paper_trading.lock")
+        )
+
+    def add_listener(self,listener: Callable[[Order],None]):
+        """Register a callback receiving each order when it opens, fills, is rejected or cancelled"""
+        self._listeners.append(listener)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        if self.lock_file and self._lock_handle is None:
+            self._lock_handle = try_lock_file(self.lock_file)
+            if self._lock_handle is None:
+                self.locked_out = True
+                print(f"Paper trading runs in another worker process ({self.lock_file} is held); "
+                      f"order and risk routes of this worker answer 503")
+                return
+        self.locked_out = False
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lock_handle is not None:
+            self._lock_handle.close()
+            self._lock_handle = None
+
+    # Submission
+
+    def submit(
+            self,
+            symbol: str,
+            quantity: float,
+            order_type: Optional[str] = None,
+            limit_price: Optional[float] = None
+    ) -> Order:
+        """Queue an order; await order.done for its first outcome"""
+        if not self.running:
+            raise RuntimeError("Execution simulator is not running")
+        order = Order(next(self._ids),symbol.upper(),quantity,order_type or self.order_type,limit_price)
+        order.submitted = time.perf_counter()
+        order.done = asyncio.get_running_loop().create_future()
+        self._remember(order)
+        self.submitted += 1
+
+        if order.order_type not in ("market","limit"):
+            self._reject(order,f"unsupported order type {order.order_type}")
+        elif order.order_type == "limit" and not order.limit_price:
+            self._reject(order,"limit order without limit_price")
+        elif quantity == 0:
+            self._reject(order,"zero quantity")
+        else:
+            self._queue.put_nowait(order)
+        return order
+
+    async def submit_many(self,orders: List[Dict]) -> List[Order]:
+        """Submit a batch (e.g. a rebalance) and wait until every order is processed"""
+        submitted = [self.submit(**order) for order in orders]
+        await asyncio.gather(*(order.done for order in submitted))
+        return submitted
+
+    def cancel(self,order_id: int) -> Optional[Order]:
+        order = self.orders.get(order_id)
+        if order is None or not order.active:
+            return order
+        self._resting.get(order.symbol,{}).pop(order.id,None)
+        order.status = "cancelled"
+        self.cancelled += 1
+        self._resolve(order)
+        return order
+
+    def _remember(self,order: Order):
+        if len(self._history) == self._history.maxlen:
+            # The oldest order leaves the lookup unless it is still working
+            oldest = self._history.popleft()
+            if not self.orders[oldest].active:
+                del self.orders[oldest]
+        self._history.append(order.id)
+        self.orders[order.id] = order
+
+    # Matching
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            for order in batch:
+                if order.status != "new":
+                    continue
+                try:
+                    self._match(order)
+                except Exception as e:
+                    self._reject(order,str(e))
+            # Let request handlers run between batches of a burst
+            await asyncio.sleep(0)
+
+    def _match(self,order: Order):
+        quote = self.snapshot_service.quotes.get(order.symbol)
+        if quote is None or quote.price <= 0:
+            self._reject(order,"no quote")
+            return
+
+        if self.enforce_limits:
+            violations = self._violations(order,quote.price)
+            if violations:
+                self._reject(order,"risk limit: " + ", ".join(violations))
+                return
+
+        price = self._fill_price(order,quote)
+        if price is None:
+            order.status = "open"
+            self._resting.setdefault(order.symbol,{})[order.id] = order
+            self._resolve(order)
+            return
+        self._fill(order,price)
+
+    def _violations(self,order: Order,price: float) -> List[str]:
+        """Risk limits and cash a fill of the order at price would breach"""
+        violations = self.risk_engine.check_order(order.symbol,order.quantity,price)
+        cost = order.quantity * price + abs(order.quantity) * price * self.commission
+        if cost > 0 and cost > self.risk_engine.cash:
+            violations.append('cash')
+        return violations
+
+    def _fill_price(self,order: Order,quote) -> Optional[float]:
+        """Executable price for the order against a quote, None if not marketable"""
+        buying = order.quantity > 0
+        touch = quote.ask if buying else quote.bid
+        if touch is None or touch <= 0:
+            touch = quote.price
+        price = touch * (1.0 + self.slippage) if buying else touch * (1.0 - self.slippage)
+        if order.order_type == "limit":
+            if buying and touch > order.limit_price or not buying and touch < order.limit_price:
+                return None
+            # Slippage never takes a limit order through its limit
+            price = min(price,order.limit_price) if buying else max(price,order.limit_price)
+        return price
+
+    def _fill(self,order: Order,price: float):
+        notional = abs(order.quantity) * price
+        order.fill_price = price
+        order.commission = notional * self.commission
+        order.status = "filled"
+        order.filled_at = datetime.now()
+        self.risk_engine.on_fill(order.symbol,order.quantity,price,order.commission)
+
+        self.filled += 1
+        self.notional += notional
+        self.commissions += order.commission
+        now = time.perf_counter()
+        self._latencies.append(now - order.submitted)
+        self._fill_times.append(now)
+        self._resolve(order)
+
+    def _reject(self,order: Order,reason: str):
+        order.status = "rejected"
+        order.reason = reason
+        self.rejected += 1
+        self._resolve(order)
+
+    def _resolve(self,order: Order):
+        if order.done is not None and not order.done.done():
+            order.done.set_result(order)
+        for listener in self._listeners:
+            try:
+                listener(order)
+            except Exception as e:
+                print(f"Order listener failed: {e}")
+
+    def on_refresh(self,deltas: Dict[str,Dict]):
+        """Snapshot listener re-checking resting limit orders of changed symbols"""
+        for symbol in deltas:
+            resting = self._resting.get(symbol)
+            if not resting:
+                continue
+            quote = self.snapshot_service.quotes.get(symbol)
+            if quote is None:
+                continue
+            for order in list(resting.values()):
+                price = self._fill_price(order,quote)
+                if price is None:
+                    continue
+                del resting[order.id]
+                violations = self._violations(order,price) if self.enforce_limits else []
+                if violations:
+                    self._reject(order,"risk limit: " + ", ".join(violations))
+                else:
+                    self._fill(order,price)
+
+    # Reporting
+
+    def list_orders(self,status: Optional[str] = None,limit: int = 100) -> List[Dict]:
+        orders = (self.orders[i] for i in reversed(self._history) if i in self.orders)
+        if status is not None:
+            orders = (order for order in orders if order.status == status)
+        return [order.to_dict() for order in itertools.islice(orders,limit)]
+
+    def metrics(self,window: float = 60.0) -> Dict:
+        """Counts, fill latency percentiles and fills per second over the last window seconds"""
+        now = time.perf_counter()
+        recent = [t for t in self._fill_times if now - t <= window]
+        if len(recent) > 1:
+            span = max(recent[-1] - recent[0],1e-9)
+            throughput = (len(recent) - 1) / span
+        else:
+            throughput = 0.0
+        latencies = np.array(self._latencies) * 1000
+        return {
+            'submitted': self.submitted,
+            'filled': self.filled,
+            'rejected': self.rejected,
+            'cancelled': self.cancelled,
+            'open': sum(len(resting) for resting in self._resting.values()),
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'notional': self.notional,
+            'commissions': self.commissions,
+            'fills_per_second': throughput,
+            'latency_ms': {
+                'p50': float(np.percentile(latencies,50)) if len(latencies) else None,
+                'p99': float(np.percentile(latencies,99)) if len(latencies) else None,
+                'max': float(latencies.max()) if len(latencies) else None,
+            },
+        }
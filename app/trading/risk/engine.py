@@ -0,0 +1,385 @@
+import numpy as np
+from collections import deque
+from datetime import datetime
+from typing import Callable,Dict,List,Optional
+
+RESUM_EVERY = 1000
+
+
+class RiskEngine:
+    """
+    Tick-driven positions, P&L, exposure and risk_management limits
+
+    Positions live in arrays indexed by slot. Each slot's contribution to
+    the portfolio totals (market value, gross exposure, unrealized P&L and
+    loss to stop) is stored, so a quote moves the totals by the difference
+    in its slots' contributions: O(1) per changed symbol. Stop loss and
+    take profit levels are only checked for the symbols that moved.
+
+    check_limits() then evaluates max_position_size for every position and
+    max_portfolio_risk (total loss if every stop is hit, over equity) in
+    one vectorized pass. Limits are reported as events when they are first
+    breached and when they clear, stops and take profits once per position.
+    """
+
+    def __init__(
+            self,
+            cash: float = 100000,
+            max_position_size: Optional[float] = 0.1,
+            max_portfolio_risk: Optional[float] = 0.2,
+            stop_loss_pct: Optional[float] = 0.02,
+            take_profit_pct: Optional[float] = 0.05,
+            risk_per_trade: float = 0.02,
+            capacity: int = 256,
+            max_events: int = 100
+    ):
+        self.cash = cash
+        self.max_position_size = max_position_size
+        self.max_portfolio_risk = max_portfolio_risk
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+        self.risk_per_trade = risk_per_trade
+        self.realized_pnl = 0.0
+
+        self.symbols: List[str] = []
+        self.slots: Dict[str,int] = {}
+        self.quantity = np.zeros(capacity)
+        self.cost = np.zeros(capacity)
+        self.price = np.zeros(capacity)
+        self.stop = np.full(capacity,np.nan)
+        self.take_profit = np.full(capacity,np.nan)
+        self.triggered = np.zeros(capacity,dtype=bool)
+        self.position_breached = np.zeros(capacity,dtype=bool)
+        # Per-slot contributions to the totals
+        self.market_value = np.zeros(capacity)
+        self.gross_value = np.zeros(capacity)
+        self.unrealized = np.zeros(capacity)
+        self.stop_risk = np.zeros(capacity)
+
+        self.net_exposure = 0.0
+        self.gross_exposure = 0.0
+        self.unrealized_pnl = 0.0
+        self.risk_to_stops = 0.0
+        self.portfolio_breached = False
+        self.updates = 0
+
+        self.events = deque(maxlen=max_events)
+        self._listeners: List[Callable[[List[Dict]],None]] = []
+
+    @classmethod
+    def from_config(cls,config_manager=None) -> "RiskEngine":
+        """Engine using initial_capital, default_risk_per_trade and risk_management from config"""
+        if config_manager is None:
+            from app.core.config import config_manager
+        risk_config = config_manager.get_trading_config().get('risk_management',{}) or {}
+        return cls(
+            cash=config_manager.settings.initial_capital,
+            max_position_size=risk_config.get('max_position_size'),
+            max_portfolio_risk=risk_config.get('max_portfolio_risk'),
+            stop_loss_pct=risk_config.get('stop_loss_pct'),
+            take_profit_pct=risk_config.get('take_profit_pct'),
+            risk_per_trade=config_manager.settings.default_risk_per_trade
+        )
+
+    def add_listener(self,listener: Callable[[List[Dict]],None]):
+        """Register a callback receiving the list of risk events of each pass"""
+        self._listeners.append(listener)
+
+    @property
+    def equity(self) -> float:
+        return self.cash + self.net_exposure
+
+    # Positions
+
+    def _slot(self,symbol: str) -> int:
+        slot = self.slots.get(symbol)
+        if slot is None:
+            slot = len(self.symbols)
+            if slot == len(self.quantity):
+                self._grow()
+            self.slots[symbol] = slot
+            self.symbols.append(symbol)
+        return slot
+
+    def _grow(self):
+        capacity = len(self.quantity) * 2
+        for name in (
+                'quantity','cost','price','market_value','gross_value','unrealized','stop_risk'
+        ):
+            setattr(self,name,np.resize(getattr(self,name),capacity))
+            getattr(self,name)[capacity // 2:] = 0.0
+        for name in ('stop','take_profit'):
+            setattr(self,name,np.concatenate([getattr(self,name),np.full(capacity // 2,np.nan)]))
+        for name in ('triggered','position_breached'):
+            setattr(self,name,np.concatenate([getattr(self,name),np.zeros(capacity // 2,dtype=bool)]))
+
+    def set_position(
+            self,
+            symbol: str,
+            quantity: float,
+            cost: float,
+            price: Optional[float] = None,
+            stop: Optional[float] = None,
+            take_profit: Optional[float] = None
+    ):
+        """
+        Set a position outright (e.g. from a broker sync)
+        Stop and take profit default to stop_loss_pct and take_profit_pct
+        away from cost, on the losing and winning side respectively
+        """
+        slot = self._slot(symbol)
+        self.quantity[slot] = quantity
+        self.cost[slot] = cost
+        if price is not None or self.price[slot] <= 0:
+            self.price[slot] = cost if price is None else price
+        side = np.sign(quantity)
+        if stop is None and self.stop_loss_pct is not None:
+            stop = cost * (1.0 - side * self.stop_loss_pct)
+        if take_profit is None and self.take_profit_pct is not None:
+            take_profit = cost * (1.0 + side * self.take_profit_pct)
+        self.stop[slot] = np.nan if stop is None or quantity == 0 else stop
+        self.take_profit[slot] = np.nan if take_profit is None or quantity == 0 else take_profit
+        self.triggered[slot] = False
+        self._revalue(np.array([slot]))
+
+    def on_fill(self,symbol: str,quantity: float,price: float,fees: float = 0.0):
+        """
+        Apply an execution: signed quantity at price
+        Cash moves by the traded notional and fees; reducing a position
+        realizes P&L against its average cost
+        """
+        slot = self._slot(symbol)
+        held = self.quantity[slot]
+        cost = self.cost[slot]
+        updated = held + quantity
+        self.cash -= quantity * price + fees
+        self.realized_pnl -= fees
+
+        if held != 0 and np.sign(quantity) != np.sign(held):
+            closed = min(abs(quantity),abs(held))
+            self.realized_pnl += closed * np.sign(held) * (price - cost)
+        if updated == 0:
+            cost = 0.0
+        elif held == 0 or np.sign(updated) != np.sign(held):
+            # Opened, or flipped through zero: the remainder is at the fill price
+            cost = price
+        elif abs(updated) > abs(held):
+            cost = (held * cost + quantity * price) / updated
+
+        keep_levels = held != 0 and np.sign(updated) == np.sign(held) and cost == self.cost[slot]
+        self.set_position(
+            symbol,updated,cost,price=price,
+            stop=self.stop[slot] if keep_levels else None,
+            take_profit=self.take_profit[slot] if keep_levels else None
+        )
+
+    def _revalue(self,slots: np.ndarray) -> np.ndarray:
+        """Recompute the contributions of slots and move the totals by the change"""
+        quantity = self.quantity[slots]
+        price = self.price[slots]
+        market_value = quantity * price
+        gross_value = np.abs(market_value)
+        unrealized = quantity * (price - self.cost[slots])
+        # Loss still to come if the stop is hit (zero once price is through it)
+        stop_risk = np.where(
+            np.isnan(self.stop[slots]),0.0,np.maximum(quantity * (price - self.stop[slots]),0.0)
+        )
+
+        self.net_exposure += float((market_value - self.market_value[slots]).sum())
+        self.gross_exposure += float((gross_value - self.gross_value[slots]).sum())
+        self.unrealized_pnl += float((unrealized - self.unrealized[slots]).sum())
+        self.risk_to_stops += float((stop_risk - self.stop_risk[slots]).sum())
+        self.market_value[slots] = market_value
+        self.gross_value[slots] = gross_value
+        self.unrealized[slots] = unrealized
+        self.stop_risk[slots] = stop_risk
+
+        self.updates += len(slots)
+        if self.updates >= RESUM_EVERY:
+            self._resum()
+        return slots
+
+    def _resum(self):
+        """Rebuild the totals from the slots so rounding does not accumulate"""
+        count = len(self.symbols)
+        self.net_exposure = float(self.market_value[:count].sum())
+        self.gross_exposure = float(self.gross_value[:count].sum())
+        self.unrealized_pnl = float(self.unrealized[:count].sum())
+        self.risk_to_stops = float(self.stop_risk[:count].sum())
+        self.updates = 0
+
+    # Quotes
+
+    def update_prices(self,prices: Dict[str,float]) -> List[Dict]:
+        """
+        Apply new prices for held symbols and return stop loss and take
+        profit events for positions whose level was crossed
+        """
+        pairs = [
+            (self.slots[symbol],price) for symbol,price in prices.items()
+            if symbol in self.slots and price is not None and price > 0
+        ]
+        if not pairs:
+            return []
+        slots = np.fromiter((slot for slot,_ in pairs),dtype=np.int64,count=len(pairs))
+        self.price[slots] = np.fromiter((price for _,price in pairs),dtype=np.float64,count=len(pairs))
+        self._revalue(slots)
+
+        side = np.sign(self.quantity[slots])
+        price = self.price[slots]
+        with np.errstate(invalid='ignore'):
+            stopped = side * (price - self.stop[slots]) <= 0
+            target = side * (price - self.take_profit[slots]) >= 0
+        fired = (stopped | target) & (side != 0) & ~self.triggered[slots]
+        self.triggered[slots[fired]] = True
+
+        now = datetime.now().isoformat()
+        return [
+            {
+                'type': 'stop_loss' if stop_hit else 'take_profit',
+                'symbol': self.symbols[slot],
+                'price': float(self.price[slot]),
+                'level': float(self.stop[slot] if stop_hit else self.take_profit[slot]),
+                'timestamp': now,
+            }
+            for slot,stop_hit in zip(slots[fired],stopped[fired])
+        ]
+
+    def check_limits(self) -> List[Dict]:
+        """One vectorized pass over every limit; events for breaches that started or cleared"""
+        events = []
+        equity = self.equity
+        now = datetime.now().isoformat()
+        count = len(self.symbols)
+
+        if self.max_position_size is not None and count:
+            with np.errstate(invalid='ignore',divide='ignore'):
+                weight = self.gross_value[:count] / equity if equity > 0 else np.full(count,np.inf)
+            breached = (weight > self.max_position_size) & (self.quantity[:count] != 0)
+            changed = np.nonzero(breached != self.position_breached[:count])[0]
+            for slot in changed:
+                events.append({
+                    'type': 'breach' if breached[slot] else 'cleared',
+                    'limit': 'max_position_size',
+                    'symbol': self.symbols[slot],
+                    'value': float(weight[slot]),
+                    'threshold': self.max_position_size,
+                    'timestamp': now,
+                })
+            self.position_breached[:count] = breached
+
+        if self.max_portfolio_risk is not None:
+            risk = self.risk_to_stops / equity if equity > 0 else np.inf
+            breached = bool(risk > self.max_portfolio_risk)
+            if breached != self.portfolio_breached:
+                events.append({
+                    'type': 'breach' if breached else 'cleared',
+                    'limit': 'max_portfolio_risk',
+                    'symbol': None,
+                    'value': float(risk),
+                    'threshold': self.max_portfolio_risk,
+                    'timestamp': now,
+                })
+            self.portfolio_breached = breached
+
+        return events
+
+    def on_quotes(self,prices: Dict[str,float]) -> List[Dict]:
+        """Apply prices, check every limit and publish the resulting events"""
+        events = self.update_prices(prices)
+        events.extend(self.check_limits())
+        self._publish(events)
+        return events
+
+    def on_refresh(self,deltas: Dict[str,Dict]):
+        """Snapshot listener feeding changed prices into the engine"""
+        prices = {symbol: delta['price'] for symbol,delta in deltas.items() if 'price' in delta}
+        if prices:
+            self.on_quotes(prices)
+
+    def _publish(self,events: List[Dict]):
+        if not events:
+            return
+        self.events.extend(events)
+        for listener in self._listeners:
+            try:
+                listener(events)
+            except Exception as e:
+                print(f"Risk listener failed: {e}")
+
+    # Pre-trade
+
+    def position_size(self,price: float,stop: Optional[float] = None) -> float:
+        """
+        Quantity risking risk_per_trade of equity between price and stop
+        (stop_loss_pct below price by default), capped at max_position_size
+        """
+        stop = price * (1.0 - (self.stop_loss_pct or 0.0)) if stop is None else stop
+        per_share = abs(price - stop)
+        equity = self.equity
+        quantity = equity * self.risk_per_trade / per_share if per_share > 0 else 0.0
+        if self.max_position_size is not None:
+            quantity = min(quantity,equity * self.max_position_size / price)
+        return max(quantity,0.0)
+
+    def check_order(self,symbol: str,quantity: float,price: float) -> List[str]:
+        """Limits an order would breach if filled at price (empty if none)"""
+        violations = []
+        slot = self.slots.get(symbol)
+        held = self.quantity[slot] if slot is not None else 0.0
+        equity = self.equity
+        if equity <= 0:
+            return ['equity']
+
+        if self.max_position_size is not None:
+            weight = abs((held + quantity) * price) / equity
+            if weight > self.max_position_size and abs(held + quantity) > abs(held):
+                violations.append('max_position_size')
+
+        if self.max_portfolio_risk is not None and self.stop_loss_pct is not None:
+            added = max(abs(held + quantity) - abs(held),0.0) * price * self.stop_loss_pct
+            if (self.risk_to_stops + added) / equity > self.max_portfolio_risk and added > 0:
+                violations.append('max_portfolio_risk')
+        return violations
+
+    # Reporting
+
+    def _position(self,slot: int) -> Dict:
+        return {
+            'quantity': float(self.quantity[slot]),
+            'cost': float(self.cost[slot]),
+            'price': float(self.price[slot]),
+            'market_value': float(self.market_value[slot]),
+            'unrealized_pnl': float(self.unrealized[slot]),
+            'stop': None if np.isnan(self.stop[slot]) else float(self.stop[slot]),
+            'take_profit': None if np.isnan(self.take_profit[slot]) else float(self.take_profit[slot]),
+        }
+
+    def position(self,symbol: str) -> Optional[Dict]:
+        slot = self.slots.get(symbol)
+        return None if slot is None else self._position(slot)
+
+    def positions(self) -> Dict[str,Dict]:
+        count = len(self.symbols)
+        held = np.nonzero(self.quantity[:count])[0]
+        return {self.symbols[slot]: self._position(slot) for slot in held}
+
+    def status(self) -> Dict:
+        equity = self.equity
+        return {
+            'equity': equity,
+            'cash': self.cash,
+            'positions': int(np.count_nonzero(self.quantity[:len(self.symbols)])),
+            'net_exposure': self.net_exposure,
+            'gross_exposure': self.gross_exposure,
+            'unrealized_pnl': self.unrealized_pnl,
+            'realized_pnl': self.realized_pnl,
+            'portfolio_risk': self.risk_to_stops / equity if equity > 0 else None,
+            'breaches': {
+                'max_position_size': [
+                    self.symbols[slot]
+                    for slot in np.nonzero(self.position_breached[:len(self.symbols)])[0]
+                ],
+                'max_portfolio_risk': self.portfolio_breached,
+            },
+        }
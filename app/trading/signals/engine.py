@@ -0,0 +1,152 @@
+import time
+import numpy as np
+from typing import Any,Callable,Dict,Hashable,List,Optional
+from app.data.processors.indicators import ffill
+from app.trading.signals.graph import OPS,SOURCES,Node,SignalGraph
+
+
+class SignalEngine:
+    """
+    Evaluates many strategies over one shared indicator graph
+
+    Each strategy is a function building its signal from the engine's
+    SignalGraph, e.g.
+
+        def crossover(graph,fast=20,slow=50):
+            return graph.sma(graph.close,fast) > graph.sma(graph.close,slow)
+
+        engine.add_strategy('crossover_20_50',crossover,fast=20,slow=50)
+
+    Nodes are interned, so an indicator used by several strategies exists
+    once. evaluate() walks the graph in dependency order and computes each
+    node once, vectorized over the T x N panel; results are memoized per
+    bar, so several consumers evaluating the same bar share one pass.
+    """
+
+    def __init__(self):
+        self.graph = SignalGraph()
+        self.strategies: Dict[str,Node] = {}
+        self._order: Optional[List[Node]] = None
+        self._bar: Optional[Hashable] = None
+        self._values: Dict[tuple,Any] = {}
+        self.computed = 0
+        self.declared = 0
+        self.last_evaluation_ms = 0.0
+
+    def add_strategy(self,name: str,strategy: Callable[...,Node],**params) -> Node:
+        """Build a strategy's signal node in the shared graph"""
+        node = self.graph.wrap(strategy(self.graph,**params))
+        self.strategies[name] = node
+        self._order = None
+        self._bar = None
+        return node
+
+    def remove_strategy(self,name: str):
+        self.strategies.pop(name,None)
+        self._order = None
+        self._bar = None
+
+    def order(self) -> List[Node]:
+        """Nodes reachable from the strategies, each after its inputs"""
+        if self._order is None:
+            order = []
+            seen = set()
+            for root in self.strategies.values():
+                # Iterative post-order walk; graphs can be deeper than the recursion limit
+                stack = [(root,False)]
+                while stack:
+                    node,expanded = stack.pop()
+                    if node in seen:
+                        continue
+                    if expanded:
+                        seen.add(node)
+                        order.append(node)
+                        continue
+                    stack.append((node,True))
+                    stack.extend((child,False) for child in node.inputs if child not in seen)
+            self._order = order
+        return self._order
+
+    def _references(self) -> int:
+        """Nodes the strategies would compute if each ran its own indicators"""
+        total = 0
+        for root in self.strategies.values():
+            seen = set()
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                if node not in seen:
+                    seen.add(node)
+                    stack.extend(node.inputs)
+            total += len(seen)
+        return total
+
+    def evaluate(
+            self,
+            close: np.ndarray,
+            high: Optional[np.ndarray] = None,
+            low: Optional[np.ndarray] = None,
+            volume: Optional[np.ndarray] = None,
+            bar: Optional[Hashable] = None
+    ) -> Dict[str,np.ndarray]:
+        """
+        T x N signal of every strategy over a price panel
+        Prices are forward-filled; high and low default to close. Passing
+        a bar identifier (e.g. its timestamp) returns the memoized result
+        when the same bar is evaluated again.
+        """
+        if bar is not None and bar == self._bar:
+            return self._signals()
+
+        started = time.perf_counter()
+        close = ffill(np.asarray(close,dtype=np.float64))
+        sources = {
+            'close': close,
+            'high': close if high is None else ffill(np.asarray(high,dtype=np.float64)),
+            'low': close if low is None else ffill(np.asarray(low,dtype=np.float64)),
+            'volume': None if volume is None else np.asarray(volume,dtype=np.float64),
+        }
+
+        values: Dict[tuple,Any] = {}
+        for node in self.order():
+            if node.op == 'source':
+                name = node.params[0]
+                if name not in SOURCES or sources[name] is None:
+                    raise ValueError(f"No {name} data for signal {node!r}")
+                values[node.key] = sources[name]
+            else:
+                values[node.key] = OPS[node.op](*(values[child.key] for child in node.inputs),*node.params)
+
+        self._values = values
+        self._bar = bar
+        self.computed = len(values)
+        self.declared = self._references()
+        self.last_evaluation_ms = (time.perf_counter() - started) * 1000
+        return self._signals()
+
+    def _signals(self) -> Dict[str,np.ndarray]:
+        return {name: self._values[node.key] for name,node in self.strategies.items()}
+
+    def value(self,node: Node) -> Optional[np.ndarray]:
+        """A node's value from the last evaluation (None if it was not needed)"""
+        return self._values.get(node.key)
+
+    def latest(self,symbols: List[str]) -> Dict[str,Dict[str,Optional[float]]]:
+        """Last bar of every strategy's signal as {strategy: {symbol: value}}"""
+        latest = {}
+        for name,signal in self._signals().items():
+            row = np.asarray(signal,dtype=np.float64)[-1]
+            latest[name] = {
+                symbol: None if np.isnan(value) else float(value)
+                for symbol,value in zip(symbols,row)
+            }
+        return latest
+
+    def stats(self) -> Dict:
+        return {
+            'strategies': len(self.strategies),
+            'nodes': len(self.order()),
+            'computed': self.computed,
+            'without_sharing': self.declared,
+            'last_evaluation_ms': self.last_evaluation_ms,
+        }
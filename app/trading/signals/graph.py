@@ -0,0 +1,265 @@
+import numpy as np
+from typing import Callable,Dict,Tuple,Union
+from app.data.processors.indicators import ewm,first_valid,mean_std,rsi_from_averages
+
+SOURCES = ('close','high','low','volume')
+
+
+class Node:
+    """
+    One indicator or expression in a signal graph
+
+    Nodes are interned by key (operation, input keys, parameters) in their
+    SignalGraph, so the same indicator declared by several strategies is a
+    single node and is computed once. Arithmetic and comparison operators
+    build new nodes, each evaluating to a T x N array.
+    """
+
+    __slots__ = ('graph','op','inputs','params','key')
+
+    def __init__(self,graph: "SignalGraph",op: str,inputs: Tuple["Node",...],params: Tuple):
+        self.graph = graph
+        self.op = op
+        self.inputs = inputs
+        self.params = params
+        self.key = (op,tuple(node.key for node in inputs),params)
+
+    def __repr__(self) -> str:
+        args = [repr(node) for node in self.inputs] + [repr(param) for param in self.params]
+        return f"{self.op}({', '.join(args)})"
+
+    # Same-key nodes are the same object, so identity hashing is enough
+    __hash__ = object.__hash__
+
+    def _binary(self,op: str,other,reverse: bool = False) -> "Node":
+        other = self.graph.wrap(other)
+        inputs = (other,self) if reverse else (self,other)
+        return self.graph.node(op,inputs)
+
+    def __add__(self,other):
+        return self._binary('add',other)
+
+    def __radd__(self,other):
+        return self._binary('add',other,True)
+
+    def __sub__(self,other):
+        return self._binary('sub',other)
+
+    def __rsub__(self,other):
+        return self._binary('sub',other,True)
+
+    def __mul__(self,other):
+        return self._binary('mul',other)
+
+    def __rmul__(self,other):
+        return self._binary('mul',other,True)
+
+    def __truediv__(self,other):
+        return self._binary('div',other)
+
+    def __rtruediv__(self,other):
+        return self._binary('div',other,True)
+
+    def __gt__(self,other):
+        return self._binary('gt',other)
+
+    def __lt__(self,other):
+        return self._binary('lt',other)
+
+    def __ge__(self,other):
+        return self._binary('ge',other)
+
+    def __le__(self,other):
+        return self._binary('le',other)
+
+    def __and__(self,other):
+        return self._binary('and',other)
+
+    def __or__(self,other):
+        return self._binary('or',other)
+
+    def __neg__(self):
+        return self.graph.node('neg',(self,))
+
+    def __invert__(self):
+        return self.graph.node('not',(self,))
+
+
+def _prefix(values: np.ndarray):
+    """
+    Cumulative sums, sums of squares and counts of (values - first valid value)
+    Window independent, so every rolling window over a source shares them
+    """
+    shift = first_valid(values)
+    valid = ~np.isnan(values)
+    centered = np.where(valid,values - shift,0.0)
+    return (
+        shift,
+        np.cumsum(centered,axis=0),
+        np.cumsum(centered * centered,axis=0),
+        np.cumsum(valid,axis=0),
+    )
+
+
+def _moments(prefix,window: int):
+    """Rolling mean and sample std over window rows from shared prefix sums"""
+    shift,*totals = prefix
+    sums,squares,counts = (total.copy() for total in totals)
+    if window < len(sums):
+        for rolled,total in zip((sums,squares,counts),totals):
+            rolled[window:] -= total[:-window]
+    return mean_std(sums,squares,counts,window,shift)
+
+
+def _ema(values: np.ndarray,alpha: float) -> np.ndarray:
+    return ewm(values,alpha)[0]
+
+
+def _shift(values: np.ndarray,periods: int) -> np.ndarray:
+    shifted = np.full(values.shape,np.nan)
+    if periods < len(values):
+        shifted[periods:] = values[:len(values) - periods]
+    return shifted
+
+
+def _rsi(values: np.ndarray,period: int) -> np.ndarray:
+    diff = values - _shift(values,1)
+    avg_gain = _ema(np.maximum(diff,0.0),1.0 / period)
+    avg_loss = _ema(np.maximum(-diff,0.0),1.0 / period)
+    counts = np.cumsum(~np.isnan(values),axis=0)
+    return np.where(counts > period,rsi_from_averages(avg_gain,avg_loss),np.nan)
+
+
+def _top(scores: np.ndarray,count: int) -> np.ndarray:
+    """Mask of the count highest finite scores in each row"""
+    count = min(count,scores.shape[1])
+    ranked = np.where(np.isnan(scores),-np.inf,scores)
+    top = np.argpartition(-ranked,count - 1,axis=1)[:,:count]
+    selected = np.zeros(scores.shape,dtype=bool)
+    np.put_along_axis(selected,top,True,axis=1)
+    return selected & np.isfinite(ranked)
+
+
+def _rank(scores: np.ndarray) -> np.ndarray:
+    """Cross-sectional rank in [0, 1] of each row; NaN stays NaN"""
+    ranked = np.where(np.isnan(scores),np.inf,scores).argsort(axis=1).argsort(axis=1).astype(np.float64)
+    valid = (~np.isnan(scores)).sum(axis=1,keepdims=True)
+    with np.errstate(invalid='ignore',divide='ignore'):
+        ranked = ranked / (valid - 1)
+    return np.where(np.isnan(scores),np.nan,ranked)
+
+
+def _equal_weight(selected: np.ndarray) -> np.ndarray:
+    if selected.dtype != bool:
+        selected = np.nan_to_num(selected) > 0
+    count = selected.sum(axis=1,keepdims=True)
+    with np.errstate(invalid='ignore',divide='ignore'):
+        return np.where(count > 0,selected / count,0.0)
+
+
+def _compare(function: Callable) -> Callable:
+    def compare(left,right):
+        with np.errstate(invalid='ignore'):
+            return function(left,right)
+    return compare
+
+
+def _divide(left,right):
+    with np.errstate(invalid='ignore',divide='ignore'):
+        return left / right
+
+
+# op -> function of (input values..., params...)
+OPS: Dict[str,Callable] = {
+    'const': lambda value: value,
+    'prefix': _prefix,
+    'moments': _moments,
+    'sma': lambda moments: moments[0],
+    'std': lambda moments: moments[1],
+    'ema': _ema,
+    'shift': _shift,
+    'rsi': _rsi,
+    'top': _top,
+    'rank': _rank,
+    'equal_weight': _equal_weight,
+    'add': np.add,
+    'sub': np.subtract,
+    'mul': np.multiply,
+    'div': _divide,
+    'neg': np.negative,
+    'gt': _compare(np.greater),
+    'lt': _compare(np.less),
+    'ge': _compare(np.greater_equal),
+    'le': _compare(np.less_equal),
+    'and': np.logical_and,
+    'or': np.logical_or,
+    'not': np.logical_not,
+}
+
+
+class SignalGraph:
+    """
+    Interning builder for indicator nodes
+
+    Strategies describe their signals with these builders; composite
+    indicators are built from shared primitives (zscore reuses the same
+    rolling moments as sma and std of that window, and every window over a
+    source differences the same prefix sums), so overlap between
+    strategies is found at the finest level.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[tuple,Node] = {}
+        self.close = self.node('source',(),('close',))
+        self.high = self.node('source',(),('high',))
+        self.low = self.node('source',(),('low',))
+        self.volume = self.node('source',(),('volume',))
+
+    def node(self,op: str,inputs: Tuple[Node,...] = (),params: Tuple = ()) -> Node:
+        """The node for op over inputs with params, created once"""
+        candidate = Node(self,op,inputs,params)
+        return self.nodes.setdefault(candidate.key,candidate)
+
+    def wrap(self,value: Union[Node,float]) -> Node:
+        if isinstance(value,Node):
+            return value
+        return self.node('const',(),(float(value),))
+
+    def _moments(self,source: Node,window: int) -> Node:
+        return self.node('moments',(self.node('prefix',(source,)),),(window,))
+
+    def sma(self,source: Node,window: int) -> Node:
+        return self.node('sma',(self._moments(source,window),))
+
+    def std(self,source: Node,window: int) -> Node:
+        return self.node('std',(self._moments(source,window),))
+
+    def zscore(self,source: Node,window: int) -> Node:
+        return (source - self.sma(source,window)) / self.std(source,window)
+
+    def ema(self,source: Node,span: int) -> Node:
+        return self.node('ema',(source,),(2.0 / (span + 1),))
+
+    def shift(self,source: Node,periods: int = 1) -> Node:
+        return self.node('shift',(source,),(periods,))
+
+    def returns(self,source: Node,periods: int = 1) -> Node:
+        return source / self.shift(source,periods) - 1.0
+
+    def rsi(self,source: Node,period: int = 14) -> Node:
+        return self.node('rsi',(source,),(period,))
+
+    def macd(self,source: Node,fast: int = 12,slow: int = 26) -> Node:
+        return self.ema(source,fast) - self.ema(source,slow)
+
+    def top(self,scores: Node,count: int) -> Node:
+        """Mask of the count highest scores of each bar"""
+        return self.node('top',(scores,),(count,))
+
+    def rank(self,scores: Node) -> Node:
+        """Cross-sectional rank of each bar, 0 (lowest) to 1 (highest)"""
+        return self.node('rank',(scores,))
+
+    def equal_weight(self,selected: Node) -> Node:
+        """Equal weights across the selected symbols of each bar"""
+        return self.node('equal_weight',(selected,))
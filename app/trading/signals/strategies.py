@@ -0,0 +1,37 @@
+from app.trading.signals.graph import Node,SignalGraph
+
+
+def moving_average_crossover(graph: SignalGraph,fast: int = 20,slow: int = 50) -> Node:
+    """Equal-weight long the symbols whose fast SMA is above their slow SMA"""
+    return graph.equal_weight(graph.sma(graph.close,fast) > graph.sma(graph.close,slow))
+
+
+def momentum(graph: SignalGraph,lookback: int = 126,top_n: int = 20) -> Node:
+    """Equal-weight long the top_n symbols by trailing lookback return"""
+    return graph.equal_weight(graph.top(graph.returns(graph.close,lookback),top_n))
+
+
+def mean_reversion(graph: SignalGraph,window: int = 20,entry: float = 1.0) -> Node:
+    """Equal-weight long the symbols trading more than entry std below their SMA"""
+    return graph.equal_weight(graph.zscore(graph.close,window) < -entry)
+
+
+def rsi_reversal(graph: SignalGraph,period: int = 14,oversold: float = 30.0) -> Node:
+    """Equal-weight long the oversold symbols that are still above their 200-bar SMA"""
+    uptrend = graph.close > graph.sma(graph.close,200)
+    return graph.equal_weight((graph.rsi(graph.close,period) < oversold) & uptrend)
+
+
+def macd_trend(graph: SignalGraph,fast: int = 12,slow: int = 26,signal: int = 9) -> Node:
+    """Equal-weight long the symbols whose MACD is above its signal line"""
+    macd = graph.macd(graph.close,fast,slow)
+    return graph.equal_weight(macd > graph.ema(macd,signal))
+
+
+STRATEGIES = {
+    'moving_average_crossover': moving_average_crossover,
+    'momentum': momentum,
+    'mean_reversion': mean_reversion,
+    'rsi_reversal': rsi_reversal,
+    'macd_trend': macd_trend,
+}
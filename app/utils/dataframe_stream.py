@@ -0,0 +1,108 @@
+import io
+import zlib
+import numpy as np
+from typing import TYPE_CHECKING,Dict,Iterable,Iterator
+from app.utils.json_encoding import dumps
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def _index_column(df: "pd.DataFrame") -> str:
+    """Name the index gets as a column, as reset_index() would name it"""
+    return df.index.name or 'index'
+
+
+def _iso_timestamps(index) -> list:
+    # Imported here so importing this module does not load pandas
+    import pandas as pd
+
+    if isinstance(index,pd.DatetimeIndex):
+        return [ts.isoformat() for ts in index]
+    return index.tolist()
+
+
+def _open_envelope(envelope: Dict,key: str) -> bytes:
+    """'{...envelope,"key":' with the closing brace left off"""
+    return dumps(envelope)[:-1] + (b',' if envelope else b'') + dumps(key) + b':'
+
+
+def iter_records_json(df: "pd.DataFrame",envelope: Dict,chunk_rows: int = 5000) -> Iterator[bytes]:
+    """
+    Stream {**envelope, "data": [{column: value, ...}, ...]}
+    Row dicts are only built for one chunk at a time
+    """
+    index_column = _index_column(df)
+    columns = [index_column] + [str(column) for column in df.columns]
+
+    yield _open_envelope(envelope,'data') + b'['
+    for start in range(0,len(df),chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        values = [_iso_timestamps(chunk.index)] + [chunk[c].tolist() for c in chunk.columns]
+        rows = [dict(zip(columns,row)) for row in zip(*values)]
+        yield (b',' if start else b'') + dumps(rows)[1:-1]
+    yield b']}'
+
+
+def iter_columnar_json(df: "pd.DataFrame",envelope: Dict,chunk_rows: int = 50000) -> Iterator[bytes]:
+    """
+    Stream {**envelope, "columns": {column: [values...]}}
+    Each column is written in slices straight from its NumPy array
+    """
+    index_column = _index_column(df)
+
+    yield _open_envelope(envelope,'columns') + b'{'
+    arrays = [(index_column,None)] + [(str(column),df[column].to_numpy()) for column in df.columns]
+    for position,(name,values) in enumerate(arrays):
+        yield (b',' if position else b'') + dumps(name) + b':['
+        for start in range(0,len(df),chunk_rows):
+            if values is None:
+                part = _iso_timestamps(df.index[start:start + chunk_rows])
+            else:
+                part = values[start:start + chunk_rows]
+                if part.dtype == object:
+                    part = part.tolist()
+                else:
+                    part = np.ascontiguousarray(part)
+            yield (b',' if start else b'') + dumps(part)[1:-1]
+        yield b']'
+    yield b'}}'
+
+
+def iter_csv(df: "pd.DataFrame",chunk_rows: int = 50000) -> Iterator[bytes]:
+    """Stream CSV with a header row, alone for an empty frame"""
+    for start in range(0,max(len(df),1),chunk_rows):
+        buffer = io.StringIO()
+        df.iloc[start:start + chunk_rows].to_csv(buffer,header=(start == 0),index_label=_index_column(df))
+        yield buffer.getvalue().encode()
+
+
+def iter_arrow_ipc(df: "pd.DataFrame",chunk_rows: int = 65536) -> Iterator[bytes]:
+    """
+    Stream an Apache Arrow IPC stream, one record batch per chunk
+    Requires pyarrow
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df.reset_index(),preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink,table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=chunk_rows):
+            writer.write_batch(batch)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    # End-of-stream marker written on close
+    yield sink.getvalue()
+
+
+def gzip_chunks(chunks: Iterable[bytes],level: int = 6) -> Iterator[bytes]:
+    """Gzip-compress a stream of byte chunks"""
+    compressor = zlib.compressobj(level,zlib.DEFLATED,31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
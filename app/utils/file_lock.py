@@ -0,0 +1,55 @@
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO,Dict,Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: the lock only holds within one process
+    fcntl = None
+
+_local_locks: Dict[str,threading.Lock] = {}
+_local_guard = threading.Lock()
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive lock shared by every process opening the same lock file
+    Uses flock, which also serializes threads of one process since each
+    holder opens its own file. Without fcntl (Windows) it falls back to a
+    per-path lock that only serializes threads of this process.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True,exist_ok=True)
+    if fcntl is None:
+        with _local_guard:
+            lock = _local_locks.setdefault(str(path.resolve()),threading.Lock())
+        with lock:
+            yield
+        return
+
+    with open(path,'a') as handle:
+        fcntl.flock(handle.fileno(),fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(),fcntl.LOCK_UN)
+
+
+def try_lock_file(path) -> Optional[IO]:
+    """
+    Take the lock without waiting and hold it until the returned file is closed
+    None when another process (or another holder in this one) has it.
+    Without fcntl (Windows) it always succeeds.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True,exist_ok=True)
+    handle = open(path,'a')
+    if fcntl is not None:
+        try:
+            fcntl.flock(handle.fileno(),fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+    return handle
@@ -0,0 +1,39 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _default(value: Any):
+    """Encode values the JSON encoders do not handle natively"""
+    if hasattr(value,'to_dict'):
+        return value.to_dict()
+    if hasattr(value,'isoformat'):
+        return value.isoformat()
+    if hasattr(value,'tolist'):
+        return value.tolist()
+    if hasattr(value,'item'):
+        return value.item()
+    return str(value)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize to compact JSON bytes
+    Uses orjson (with native numpy array support) when installed
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(obj,default=_default,separators=(',',':')).encode()
+
+
+def dumps_str(obj: Any) -> str:
+    """Serialize to a compact JSON string"""
+    return dumps(obj).decode()
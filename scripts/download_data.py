@@ -1,140 +1,312 @@
 #!/usr/bin/env python3
 """
-Script to download historical market data for all instruments in the watchlist
+Bulk historical data ingestion for the local OHLCV store
+
+Keeps a manifest of the last stored bar per symbol/interval and only fetches
+the bars after it, runs symbols with bounded concurrency under a request rate
+budget, and checkpoints progress so an interrupted run resumes where it
+stopped.
+
+Examples:
+    python scripts/download_data.py                        # watchlist, 1y daily
+    python scripts/download_data.py --symbols-file universe.txt --concurrency 16
+    python scripts/download_data.py --interval 1wk --days 1825 --csv
 """
 
+import argparse
 import asyncio
+import json
+import os
 import sys
+import time
+import uuid
 from pathlib import Path
 from datetime import datetime,timedelta
-import pandas as pd
+from typing import Dict,List,Optional
 
 # Add parent directory to path
 sys.path.insert(0,str(Path(__file__).parent.parent))
 
 from app.core.config import config_manager
 from app.data.providers.data_aggregator import DataAggregator
+from app.data.providers.rate_limiter import Priority,priority_scope
+from app.data.storage.ohlcv_store import OHLCVStore
+
+
+class RatePacer:
+    """Spaces request starts so they never exceed a requests/second budget"""
+
+    def __init__(self,rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """Wait for the next free request slot"""
+        if self.interval == 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now,self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class JsonState:
+    """Small JSON document persisted atomically (manifest and checkpoint)"""
 
+    def __init__(self,path: Path):
+        self.path = path
+        self.data = self._load()
 
-async def download_historical_data(
-        symbols: list,
-        days: int = 365,
-        interval: str = "1d"
-):
-    """
-    Download historical data for given symbols
+    def _load(self) -> Dict:
+        if self.path.exists():
+            with open(self.path,'r') as f:
+                return json.load(f)
+        return {}
 
-    Args:
-        symbols: List of ticker symbols
-        days: Number of days of historical data
-        interval: Data interval (1d, 1wk, 1mo)
-    """
-    data_aggregator = DataAggregator()
+    def save(self):
+        self.path.parent.mkdir(parents=True,exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp,'w') as f:
+            json.dump(self.data,f,indent=1)
+        os.replace(tmp,self.path)
 
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
+    def delete(self):
+        if self.path.exists():
+            self.path.unlink()
 
-    output_dir = Path("data/raw")
-    output_dir.mkdir(parents=True,exist_ok=True)
 
-    print(f"📥 Downloading historical data for {len(symbols)} symbols")
-    print(f"📅 Period: {start_date.date()} to {end_date.date()}")
-    print(f"⏱️  Interval: {interval}")
-    print("-" * 60)
+class BulkDownloader:
+    """Incremental, resumable, concurrent downloader into the OHLCV store"""
 
-    success_count = 0
-    failed_symbols = []
+    def __init__(
+            self,
+            store: OHLCVStore,
+            interval: str = "1d",
+            days: int = 365,
+            concurrency: int = 4,
+            rate: float = 2.0,
+            checkpoint_every: int = 25,
+            export_csv: bool = False
+    ):
+        self.store = store
+        self.interval = interval
+        self.days = days
+        self.concurrency = concurrency
+        self.pacer = RatePacer(rate)
+        self.checkpoint_every = checkpoint_every
+        self.export_csv = export_csv
 
-    for i,symbol in enumerate(symbols,1):
+        self.data_aggregator = DataAggregator()
+        # The downloader always writes through the store, even if serving
+        # historical requests from it is disabled in config.yaml
+        self.data_aggregator.store = store
+
+        self.manifest = JsonState(store.root / "download_manifest.json")
+        self.checkpoint = JsonState(store.root / f"download_checkpoint_{interval}.json")
+
+        self.rows = 0
+        self.done = 0
+        self.failed: List[str] = []
+        self._since_checkpoint = 0
+        self._started = time.monotonic()
+
+    async def run(self,symbols: List[str],resume: bool = True):
+        """Download deltas for all symbols"""
+        completed = set()
+        # A finished run (even one with failures) is not resumed, or its
+        # completed symbols would never be updated again
+        if (resume and self.checkpoint.data.get('interval') == self.interval
+                and not self.checkpoint.data.get('finished')):
+            completed = set(self.checkpoint.data.get('completed',[]))
+            print(f"↩️  Resuming run {self.checkpoint.data.get('run_id')}: "
+                  f"{len(completed)} symbols already done")
+        else:
+            self.checkpoint.data = {
+                'run_id': uuid.uuid4().hex[:8],
+                'interval': self.interval,
+                'started_at': datetime.now().isoformat(),
+                'completed': [],
+            }
+
+        todo = [symbol for symbol in symbols if symbol not in completed]
+        print(f"📥 {len(todo)} symbols to update ({self.interval}), "
+              f"concurrency {self.concurrency}")
+        print("-" * 60)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for symbol in todo:
+            queue.put_nowait(symbol)
+
+        self._started = time.monotonic()
+        workers = [
+            asyncio.create_task(self._worker(queue,len(todo)))
+            for _ in range(max(1,min(self.concurrency,len(todo))))
+        ]
         try:
-            print(f"[{i}/{len(symbols)}] Downloading {symbol}...",end=" ")
-
-            df = await data_aggregator.get_historical(
-                symbol,
-                start_date,
-                end_date,
-                interval
-            )
-
-            if not df.empty:
-                # Save to CSV
-                filename = output_dir / f"{symbol}_{interval}_historical.csv"
-                df.to_csv(filename)
-
-                print(f"✅ Saved {len(df)} rows to {filename}")
-                success_count += 1
+            await asyncio.gather(*workers)
+            self.checkpoint.data['finished'] = True
+        finally:
+            for worker in workers:
+                worker.cancel()
+            self._save_progress()
+
+        self._report(final=True)
+        if not self.failed:
+            # Clean finish, the next run starts fresh from the manifest
+            self.checkpoint.delete()
+        else:
+            print(f"⚠️  {len(self.failed)} symbols failed; the next run retries them with the rest")
+
+    async def _worker(self,queue: asyncio.Queue,total: int):
+        while True:
+            try:
+                symbol = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            rows = await self._download_symbol(symbol)
+            if rows is None:
+                self.failed.append(symbol)
             else:
-                print(f"❌ No data received")
-                failed_symbols.append(symbol)
+                self.rows += rows
+                self.checkpoint.data['completed'].append(symbol)
+            self.done += 1
+
+            self._since_checkpoint += 1
+            if self._since_checkpoint >= self.checkpoint_every:
+                self._save_progress()
+                self._report(total=total)
+
+    async def _download_symbol(self,symbol: str) -> Optional[int]:
+        """Fetch bars after the last stored one, returns new row count"""
+        entry = self.manifest.data.get(symbol,{}).get(self.interval)
+        end_date = datetime.now().astimezone()
+        if entry and entry.get('last_bar'):
+            start_date = datetime.fromisoformat(entry['last_bar'])
+        else:
+            start_date = end_date - timedelta(days=self.days)
 
+        await self.pacer.wait()
+        try:
+            # Backfill yields provider budget to watchlist and trading fetches
+            with priority_scope(Priority.BACKFILL):
+                df = await self.data_aggregator.get_historical(
+                    symbol,
+                    start_date,
+                    end_date,
+                    self.interval
+                )
         except Exception as e:
-            print(f"❌ Error: {e}")
-            failed_symbols.append(symbol)
+            print(f"❌ {symbol}: {e}")
+            return None
+
+        if df.empty:
+            if entry:
+                # Up to date, nothing new since the last stored bar
+                return 0
+            print(f"❌ {symbol}: no data received")
+            return None
+
+        last_bar = df.index[-1]
+        previous = entry.get('last_bar') if entry else None
+        if previous is None:
+            new_rows = len(df)
+        else:
+            new_rows = int((df.index > datetime.fromisoformat(previous)).sum())
 
-        # Small delay to avoid rate limiting
-        await asyncio.sleep(0.5)
+        self.manifest.data.setdefault(symbol,{})[self.interval] = {
+            'last_bar': last_bar.isoformat(),
+            'rows': (entry or {}).get('rows',0) + new_rows,
+            'updated_at': datetime.now().isoformat(),
+        }
 
-    print("-" * 60)
-    print(f"✅ Successfully downloaded: {success_count}/{len(symbols)}")
+        if self.export_csv:
+            await asyncio.to_thread(self._export_csv,symbol)
+        return new_rows
 
-    if failed_symbols:
-        print(f"❌ Failed symbols: {', '.join(failed_symbols)}")
+    def _export_csv(self,symbol: str):
+        """Write the full stored history to data/raw for external tools"""
+        output_dir = Path("data/raw")
+        output_dir.mkdir(parents=True,exist_ok=True)
+        df = self.store.read(symbol,self.interval)
+        df.to_csv(output_dir / f"{symbol}_{self.interval}_historical.csv")
 
+    def _save_progress(self):
+        """Persist manifest first, then the checkpoint that references it"""
+        self.manifest.save()
+        self.checkpoint.data['failed'] = self.failed
+        self.checkpoint.save()
+        self._since_checkpoint = 0
 
-async def download_recent_data(symbols: list,days: int = 30):
-    """Download recent data for quick backtesting"""
-    await download_historical_data(symbols,days=days,interval="1d")
+    def _report(self,total: Optional[int] = None,final: bool = False):
+        elapsed = max(time.monotonic() - self._started,1e-9)
+        progress = f"{self.done}/{total}" if total else f"{self.done}"
+        prefix = "✅ Finished" if final else "⏱️ "
+        print(f"{prefix} {progress} symbols in {elapsed:.1f}s | "
+              f"{self.rows} rows | {self.rows / elapsed:.1f} rows/s | "
+              f"{self.done / elapsed:.2f} symbols/s")
+        if final and self.failed:
+            print(f"❌ Failed symbols: {', '.join(self.failed)}")
 
 
-async def main():
+def load_symbols(args) -> List[str]:
+    """Symbols from --symbols, --symbols-file or the configured watchlist"""
+    if args.symbols:
+        return [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    if args.symbols_file:
+        with open(args.symbols_file,'r') as f:
+            return [line.strip().upper() for line in f if line.strip() and not line.startswith('#')]
+    return config_manager.get_watchlist()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Incremental historical data downloader")
+    parser.add_argument("--symbols",help="Comma-separated symbols (default: watchlist)")
+    parser.add_argument("--symbols-file",help="File with one symbol per line")
+    parser.add_argument("--interval",default="1d",help="Data interval (1d, 1wk, 1mo, 1h, ...)")
+    parser.add_argument("--days",type=int,default=365,help="History depth for symbols not stored yet")
+    parser.add_argument("--concurrency",type=int,default=4,help="Symbols downloaded in parallel")
+    parser.add_argument("--rate",type=float,default=2.0,help="Max upstream requests per second (0 = unlimited)")
+    parser.add_argument("--checkpoint-every",type=int,default=25,help="Symbols between checkpoints")
+    parser.add_argument("--store",default=None,help="Store root (default: data.storage.path)")
+    parser.add_argument("--csv",action="store_true",help="Also export data/raw/{symbol}_{interval}_historical.csv")
+    parser.add_argument("--no-resume",action="store_true",help="Ignore an existing checkpoint")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
     """Main function"""
+    args = parse_args(argv)
+    symbols = load_symbols(args)
+
+    store_path = args.store or config_manager.get_storage_config().get('path','data/store')
+    downloader = BulkDownloader(
+        OHLCVStore(store_path),
+        interval=args.interval,
+        days=args.days,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        checkpoint_every=args.checkpoint_every,
+        export_csv=args.csv
+    )
+
     print("=" * 60)
     print("Historical Data Downloader")
     print("=" * 60)
-
-    # Get watchlist from config
-    watchlist = config_manager.get_watchlist()
-
-    print(f"\n📋 Watchlist loaded: {len(watchlist)} symbols")
-    print(f"Symbols: {', '.join(watchlist[:10])}...")
-
-    # Menu
-    print("\nSelect option:")
-    print("1. Download 1 year daily data (recommended)")
-    print("2. Download 3 months daily data")
-    print("3. Download 1 month daily data")
-    print("4. Download 1 year weekly data")
-    print("5. Download custom period")
-
-    choice = input("\nEnter choice (1-5) [1]: ").strip() or "1"
-
-    if choice == "1":
-        await download_historical_data(watchlist,days=365,interval="1d")
-    elif choice == "2":
-        await download_historical_data(watchlist,days=90,interval="1d")
-    elif choice == "3":
-        await download_historical_data(watchlist,days=30,interval="1d")
-    elif choice == "4":
-        await download_historical_data(watchlist,days=365,interval="1wk")
-    elif choice == "5":
-        days = int(input("Enter number of days: "))
-        interval = input("Enter interval (1d/1wk/1mo) [1d]: ").strip() or "1d"
-        await download_historical_data(watchlist,days=days,interval=interval)
-    else:
-        print("Invalid choice!")
-        return
-
-    print("\n✅ Download complete!")
-    print(f"📁 Data saved to: {Path('data/raw').absolute()}")
+    await downloader.run(symbols,resume=not args.no_resume)
+    print(f"📁 Store: {Path(store_path).absolute()}")
 
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("\n\n⚠️  Download interrupted by user")
+        print("\n\n⚠️  Download interrupted, progress checkpointed - rerun to resume")
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
 
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
@@ -38,4 +38,5 @@ echo "📡 Starting development server with auto-reload..."
 uvicorn app.main:app --reload --host 0.0.0.0 --port 8000 --log-level info
 
 # For production, use gunicorn with uvicorn workers:
+# (paper trading runs in one worker only; use -w 1 to paper trade, see SETUP_GUIDE.md)
 # gunicorn app.main:app -w 4 -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+DataAggregator fan-out and fallback benchmark
+
+Fetches a batch of uncached symbols through DataAggregator.get_quotes with
+fake providers (fixed latency, seeded failures, no network) and reports
+wall time against the ideal for the fan-out concurrency, the cost of
+routing primary failures to the fallback, and how concurrent requests for
+the same symbols coalesce. Exits non-zero when per-symbol fan-out takes
+more than budget times its ideal time.
+
+    python tests/benchmarks/bench_aggregator.py --symbols 500 --latency 0.02 --budget 2
+"""
+import argparse
+import asyncio
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0,str(Path(__file__).resolve().parent))
+
+from common import enter_workdir,environment,latency_summary,report
+
+WORKDIR = enter_workdir()
+
+from app.data.providers.data_aggregator import DataAggregator
+from fakes import FakeProvider,install_providers,symbols
+
+
+def aggregator(*providers) -> DataAggregator:
+    data_aggregator = DataAggregator()
+    # Every request goes upstream; the cache would hide the fan-out
+    data_aggregator.cache_enabled = False
+    install_providers(data_aggregator,providers,{'failure_threshold': 10 ** 9})
+    return data_aggregator
+
+
+async def timed_fetch(data_aggregator: DataAggregator,names,deadline: float = 60.0):
+    started = time.perf_counter()
+    quotes = await data_aggregator.get_quotes(names,deadline=deadline,use_cache=False)
+    return time.perf_counter() - started,quotes
+
+
+async def fanout(count: int,latency: float,bulk: bool) -> dict:
+    """Time to fetch count symbols from one provider"""
+    primary = FakeProvider('primary',latency=latency,bulk=bulk)
+    data_aggregator = aggregator(primary)
+    names = symbols(count)
+    elapsed,quotes = await timed_fetch(data_aggregator,names)
+
+    if bulk:
+        ideal = math.ceil(count / primary.bulk_chunk_size / data_aggregator.max_concurrency) * latency
+    else:
+        ideal = math.ceil(count / data_aggregator.max_concurrency) * latency
+    return {
+        'symbols': count,
+        'bulk': bulk,
+        'max_concurrency': data_aggregator.max_concurrency,
+        'seconds': elapsed,
+        'ideal_seconds': ideal,
+        'overhead_ratio': elapsed / ideal if ideal else None,
+        'overhead_us_per_symbol': (elapsed - ideal) / count * 1e6,
+        'symbols_per_second': count / elapsed,
+        'priced': sum(quote.price > 0 for quote in quotes),
+        'provider': primary.stats(),
+    }
+
+
+async def fallback(count: int,latency: float,failure_rate: float) -> dict:
+    """Cost of a failing primary whose symbols go to a fallback"""
+    primary = FakeProvider('primary',latency=latency,failure_rate=failure_rate,seed=1)
+    secondary = FakeProvider('fallback',latency=latency,seed=2)
+    data_aggregator = aggregator(primary,secondary)
+    names = symbols(count)
+    elapsed,quotes = await timed_fetch(data_aggregator,names)
+
+    baseline = aggregator(FakeProvider('primary',latency=latency,seed=1))
+    healthy,_ = await timed_fetch(baseline,names)
+    return {
+        'symbols': count,
+        'failure_rate': failure_rate,
+        'seconds': elapsed,
+        'healthy_seconds': healthy,
+        'fallback_cost_seconds': elapsed - healthy,
+        'priced': sum(quote.price > 0 for quote in quotes),
+        'primary': primary.stats(),
+        'fallback': secondary.stats(),
+    }
+
+
+async def coalescing(count: int,clients: int,latency: float) -> dict:
+    """Concurrent clients asking for the same symbols share upstream fetches"""
+    primary = FakeProvider('primary',latency=latency)
+    data_aggregator = aggregator(primary)
+    names = symbols(count)
+    results = await asyncio.gather(*(timed_fetch(data_aggregator,names) for _ in range(clients)))
+    return {
+        'symbols': count,
+        'clients': clients,
+        'symbol_requests': count * clients,
+        'upstream_symbol_requests': primary.symbol_requests,
+        'coalesced_requests': data_aggregator.coalesced_requests,
+        'latency': latency_summary([elapsed for elapsed,_ in results]),
+    }
+
+
+async def run(args) -> dict:
+    # Unmeasured pass so first-use costs stay out of the timings
+    await fanout(min(args.symbols,50),0.0,bulk=False)
+    await fanout(min(args.symbols,50),0.0,bulk=True)
+
+    scenarios = {
+        'fanout': await fanout(args.symbols,args.latency,bulk=False),
+        'fanout_bulk': await fanout(args.symbols,args.latency,bulk=True),
+        'fallback': await fallback(args.symbols,args.latency,args.failure_rate),
+        'coalescing': await coalescing(min(args.symbols,100),args.clients,args.latency),
+    }
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DataAggregator fan-out and fallback")
+    parser.add_argument('--symbols',type=int,default=500)
+    parser.add_argument('--latency',type=float,default=0.02,help="seconds per fake upstream call")
+    parser.add_argument('--failure-rate',type=float,default=0.2,help="share of primary requests failing")
+    parser.add_argument('--clients',type=int,default=20,help="concurrent clients in the coalescing run")
+    parser.add_argument('--budget',type=float,default=2.0,help="allowed fan-out time as a multiple of ideal")
+    parser.add_argument('--json',help="write results to this file")
+    args = parser.parse_args()
+
+    scenarios = asyncio.run(run(args))
+    result = {
+        'benchmark': 'aggregator',
+        'environment': environment(),
+        'budget': args.budget,
+        'scenarios': scenarios,
+    }
+    # Bulk fan-out is a single upstream round, too short for a stable ratio
+    result['passed'] = scenarios['fanout']['overhead_ratio'] <= args.budget
+    return report(result,args.json)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Backtesting engine benchmark
+
+Runs the built-in strategies over a synthetic panel of daily bars (geometric
+Brownian motion, seeded, no network) and times strategy weights plus the
+vectorized backtest. Exits non-zero when any run exceeds the budget.
+
+    python tests/benchmarks/bench_backtest.py --years 10 --symbols 500 --budget 5
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0,str(Path(__file__).resolve().parent))
+
+from common import ROOT,environment,report
+
+sys.path.insert(0,str(ROOT))
+
+from app.data.processors.features import PricePanel
+from app.trading.backtesting.engine import Backtester
+from app.trading.backtesting.strategies import STRATEGIES
+
+# Rebalance frequency each strategy is benchmarked with
+REBALANCE = {
+    'moving_average_crossover': 'daily',
+    'momentum': 'monthly',
+    'mean_reversion': 'daily',
+}
+
+
+def synthetic_panel(years: int,symbols: int,seed: int = 7) -> PricePanel:
+    """Daily closes for symbols over years of business days"""
+    rng = np.random.default_rng(seed)
+    bars = years * 252
+    returns = rng.normal(0.0003,0.015,(bars,symbols))
+    close = 100.0 * np.exp(np.cumsum(returns,axis=0))
+    index = pd.bdate_range('2000-01-03',periods=bars)
+    return PricePanel(index,[f"SYM{i:04d}" for i in range(symbols)],close)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized backtester")
+    parser.add_argument('--years',type=int,default=10)
+    parser.add_argument('--symbols',type=int,default=500)
+    parser.add_argument('--repeat',type=int,default=3,help="timed runs per strategy")
+    parser.add_argument('--budget',type=float,default=5.0,help="median seconds allowed per strategy")
+    parser.add_argument('--json',help="write results to this file")
+    args = parser.parse_args()
+
+    panel = synthetic_panel(args.years,args.symbols)
+    backtester = Backtester(initial_capital=100000,commission=0.001,slippage=0.001)
+
+    strategies = {}
+    for name,strategy in STRATEGIES.items():
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = backtester.run_strategy(panel,strategy,rebalance=REBALANCE.get(name,'daily'))
+            timings.append(time.perf_counter() - started)
+        median = statistics.median(timings)
+        strategies[name] = {
+            'median_seconds': median,
+            'max_seconds': max(timings),
+            'cells_per_second': len(panel) * len(panel.symbols) / median,
+            'trades': result.stats()['trades'],
+        }
+
+    result = {
+        'benchmark': 'backtest',
+        'environment': environment(),
+        'bars': len(panel),
+        'symbols': len(panel.symbols),
+        'budget': args.budget,
+        'strategies': strategies,
+    }
+    result['passed'] = all(s['median_seconds'] <= args.budget for s in strategies.values())
+
+    return report(result,args.json)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
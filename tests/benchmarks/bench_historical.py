@@ -0,0 +1,103 @@
+"""
+/api/v1/historical serialization benchmark
+
+Runs the application in-process with a fake provider serving seeded bars
+(no network) and requests a large range of intraday bars in every output
+format. The first request fetches the range and writes the local store;
+the timed requests read it back and serialize it, so the numbers are the
+cost of the store read plus the encoder. Exits non-zero when the median
+records response takes longer than the budget.
+
+    python tests/benchmarks/bench_historical.py --days 365 --interval 5m --repeat 5 --budget 10
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0,str(Path(__file__).resolve().parent))
+
+from common import enter_workdir,environment,report
+
+WORKDIR = enter_workdir()
+
+import httpx
+import app.main as application
+from fakes import FakeProvider,install_providers
+
+FORMATS = {
+    'records': "format=records",
+    'columns': "format=columns",
+    'csv': "format=csv",
+    'arrow': "format=arrow",
+    'records_gzip': "format=records&compression=gzip",
+}
+
+
+async def timed_get(client: httpx.AsyncClient,path: str):
+    started = time.perf_counter()
+    response = await client.get(path)
+    elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    return elapsed,response
+
+
+async def run(args) -> dict:
+    provider = FakeProvider('primary',latency=0.0,seed=1)
+    install_providers(application.data_aggregator,[provider])
+    application.snapshot_service.symbols = []
+
+    app = application.app
+    base = f"/api/v1/historical/{args.symbol}?days={args.days}&interval={args.interval}"
+    scenarios = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport,base_url="http://bench",timeout=300) as client:
+            elapsed,response = await timed_get(client,f"{base}&format=columns")
+            rows = response.json()['count']
+            scenarios['first_fetch'] = {'seconds': elapsed,'rows': rows}
+
+            for name,query in FORMATS.items():
+                timings = []
+                for _ in range(args.repeat):
+                    elapsed,response = await timed_get(client,f"{base}&{query}")
+                    timings.append(elapsed)
+                median = statistics.median(timings)
+                scenarios[name] = {
+                    'median_seconds': median,
+                    'max_seconds': max(timings),
+                    'bytes': response.num_bytes_downloaded,
+                    'rows_per_second': rows / median,
+                    'megabytes_per_second': response.num_bytes_downloaded / median / 1e6,
+                }
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/v1/historical serialization")
+    parser.add_argument('--symbol',default="BENCH")
+    parser.add_argument('--days',type=int,default=365)
+    parser.add_argument('--interval',default="5m")
+    parser.add_argument('--repeat',type=int,default=5,help="timed requests per format")
+    parser.add_argument('--budget',type=float,default=10.0,help="median records seconds allowed")
+    parser.add_argument('--json',help="write results to this file")
+    args = parser.parse_args()
+
+    scenarios = asyncio.run(run(args))
+    result = {
+        'benchmark': 'historical',
+        'environment': environment(),
+        'days': args.days,
+        'interval': args.interval,
+        'rows': scenarios['first_fetch']['rows'],
+        'budget': args.budget,
+        'scenarios': scenarios,
+    }
+    result['passed'] = scenarios['records']['median_seconds'] <= args.budget
+    return report(result,args.json)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
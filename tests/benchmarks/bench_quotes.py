@@ -0,0 +1,132 @@
+"""
+/api/v1/quotes throughput and latency benchmark
+
+Runs the application in-process (ASGI transport, no sockets, no network)
+with fake providers behind the DataAggregator, then has concurrent clients
+request quotes: the watchlist answered from the snapshot (records and
+columns layouts), a fixed ad-hoc symbol set answered from the quote cache,
+and unseen symbols that go upstream through the fake providers. Reports
+requests per second and p50/p99 latency per scenario; exits non-zero when
+the watchlist p99 exceeds the budget. Without sockets, requests overlap
+only where the application awaits, so latency is the application's own
+cost plus any wait on upstream.
+
+    python tests/benchmarks/bench_quotes.py --clients 32 --requests 2000 --watchlist 500 --budget 100
+"""
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0,str(Path(__file__).resolve().parent))
+
+from common import enter_workdir,environment,latency_summary,report
+
+WORKDIR = enter_workdir()
+
+import httpx
+import app.main as application
+from fakes import FakeProvider,install_providers,symbols
+
+
+async def load(client: httpx.AsyncClient,path_for,clients: int,requests: int) -> dict:
+    """Issue requests from concurrent clients; path_for(i) gives the i-th request's path"""
+    latencies = []
+    errors = 0
+    received = 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors,received
+        for i in counter:
+            if i >= requests:
+                return
+            started = time.perf_counter()
+            response = await client.get(path_for(i))
+            latencies.append(time.perf_counter() - started)
+            received += len(response.content)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'clients': clients,
+        'seconds': elapsed,
+        'requests_per_second': requests / elapsed,
+        'errors': errors,
+        'bytes_per_response': received / requests,
+        'latency': latency_summary(latencies),
+    }
+
+
+async def run(args) -> dict:
+    primary = FakeProvider('primary',latency=args.latency,jitter=args.latency,failure_rate=0.01,bulk=True,seed=1)
+    fallback = FakeProvider('fallback',latency=args.latency * 2,seed=2)
+    install_providers(application.data_aggregator,[primary,fallback])
+    snapshot_service = application.snapshot_service
+    snapshot_service.symbols = symbols(args.watchlist)
+
+    app = application.app
+    scenarios = {}
+    async with app.router.lifespan_context(app):
+        while not snapshot_service.ready:
+            await asyncio.sleep(0.01)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport,base_url="http://bench",timeout=60) as client:
+            adhoc = ",".join(symbols(args.adhoc,prefix="ADH"))
+            await client.get("/api/v1/quotes")
+            await client.get(f"/api/v1/quotes?symbols={adhoc}")
+
+            scenarios['watchlist'] = await load(
+                client,lambda i: "/api/v1/quotes",args.clients,args.requests
+            )
+            scenarios['watchlist_columns'] = await load(
+                client,lambda i: "/api/v1/quotes?layout=columns",args.clients,args.requests
+            )
+            scenarios['adhoc_cached'] = await load(
+                client,lambda i: f"/api/v1/quotes?symbols={adhoc}",args.clients,args.requests
+            )
+            # Every request asks for symbols nobody has fetched yet
+            scenarios['adhoc_upstream'] = await load(
+                client,
+                lambda i: "/api/v1/quotes?symbols=" + ",".join(f"U{i:06d}{j}" for j in range(args.adhoc)),
+                args.clients,
+                max(args.requests // 10,args.clients)
+            )
+
+    scenarios['upstream'] = {'primary': primary.stats(),'fallback': fallback.stats()}
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/v1/quotes under concurrent clients")
+    parser.add_argument('--clients',type=int,default=32)
+    parser.add_argument('--requests',type=int,default=2000,help="requests per scenario")
+    parser.add_argument('--watchlist',type=int,default=500,help="symbols in the snapshot watchlist")
+    parser.add_argument('--adhoc',type=int,default=10,help="symbols per ad-hoc request")
+    parser.add_argument('--latency',type=float,default=0.02,help="seconds per fake upstream call")
+    parser.add_argument('--budget',type=float,default=100.0,help="watchlist p99 milliseconds allowed")
+    parser.add_argument('--json',help="write results to this file")
+    args = parser.parse_args()
+
+    scenarios = asyncio.run(run(args))
+    result = {
+        'benchmark': 'quotes',
+        'environment': environment(),
+        'watchlist': args.watchlist,
+        'budget': args.budget,
+        'scenarios': scenarios,
+    }
+    watchlist = scenarios['watchlist']
+    result['passed'] = watchlist['errors'] == 0 and watchlist['latency']['p99_ms'] <= args.budget
+    return report(result,args.json)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
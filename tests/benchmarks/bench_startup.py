@@ -0,0 +1,94 @@
+"""
+Application startup benchmark
+
+Measures, in fresh interpreter processes, how long importing app.main and
+running the FastAPI startup (lifespan) take, and checks that the provider
+dependencies (yfinance, alpha_vantage, pandas) are not imported on the way.
+Exits non-zero when the median startup exceeds the budget.
+
+    python tests/benchmarks/bench_startup.py --runs 5 --budget 1.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0,str(Path(__file__).resolve().parent))
+
+from common import ROOT,environment,prepare_workdir,report
+
+# Modules that must stay out of application startup
+DEFERRED_MODULES = ('yfinance','alpha_vantage','pandas','pyarrow','torch')
+
+CHILD = """
+import asyncio,json,sys,time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+loaded = [m for m in %r if m in sys.modules]
+
+async def startup():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print('RESULT ' + json.dumps({
+    'import': imported - started,
+    'startup': ready - imported,
+    'total': ready - started,
+    'deferred_loaded': loaded,
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def run_once(workdir: str) -> dict:
+    """Start the application in a new process and return its timings"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None,[str(ROOT),env.get('PYTHONPATH')]))
+    output = subprocess.run(
+        [sys.executable,'-c',CHILD],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    line = next(l for l in reversed(output.splitlines()) if l.startswith('RESULT '))
+    return json.loads(line[len('RESULT '):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark application startup time")
+    parser.add_argument('--runs',type=int,default=5,help="fresh processes to time")
+    parser.add_argument('--budget',type=float,default=1.5,help="median total seconds allowed")
+    parser.add_argument('--json',help="write results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        prepare_workdir(workdir)
+        # One unmeasured run so bytecode caches are warm
+        run_once(workdir)
+        runs = [run_once(workdir) for _ in range(args.runs)]
+
+    result = {
+        'benchmark': 'startup',
+        'environment': environment(),
+        'runs': args.runs,
+        'budget': args.budget,
+        'import_median': statistics.median(r['import'] for r in runs),
+        'startup_median': statistics.median(r['startup'] for r in runs),
+        'total_median': statistics.median(r['total'] for r in runs),
+        'total_max': max(r['total'] for r in runs),
+        'deferred_loaded': sorted({m for r in runs for m in r['deferred_loaded']}),
+    }
+    result['passed'] = result['total_median'] <= args.budget and not result['deferred_loaded']
+
+    return report(result,args.json)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
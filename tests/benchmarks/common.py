@@ -0,0 +1,91 @@
+"""
+Shared helpers for the benchmark scripts
+
+Benchmarks run the application in a temporary working directory laid out
+like a deployment, so config is read from the repository while the store,
+audit database and rate limit state stay out of the tree.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict,List,Optional
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def prepare_workdir(path: str):
+    """Working directory laid out like a deployment (config, static, templates)"""
+    os.symlink(ROOT / 'config',Path(path) / 'config')
+    for name in ('static','templates'):
+        source = ROOT / name
+        if source.exists():
+            os.symlink(source,Path(path) / name)
+        else:
+            os.mkdir(Path(path) / name)
+
+
+def enter_workdir() -> tempfile.TemporaryDirectory:
+    """
+    Move into a fresh deployment-like directory and configure the app offline
+    Call before importing app modules; keep the returned handle alive
+    """
+    workdir = tempfile.TemporaryDirectory()
+    prepare_workdir(workdir.name)
+    os.chdir(workdir.name)
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0,str(ROOT))
+
+    from app.core.config import config_manager
+    data_config = config_manager.yaml_config.setdefault('data',{})
+    # Never reach out to a Redis that happens to be running
+    data_config['shared'] = dict(data_config.get('shared') or {},backend='memory')
+    return workdir
+
+
+def latency_summary(seconds: List[float]) -> Dict:
+    """Count and percentiles of latencies, in milliseconds"""
+    if not seconds:
+        return {'count': 0,'p50_ms': None,'p90_ms': None,'p99_ms': None,'max_ms': None}
+    latencies = np.asarray(seconds) * 1000
+    return {
+        'count': len(latencies),
+        'p50_ms': float(np.percentile(latencies,50)),
+        'p90_ms': float(np.percentile(latencies,90)),
+        'p99_ms': float(np.percentile(latencies,99)),
+        'max_ms': float(latencies.max()),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git','rev-parse','HEAD'],cwd=ROOT,capture_output=True,text=True,check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment() -> Dict:
+    """Where a result was measured, so results are compared like for like"""
+    return {
+        'commit': git_commit(),
+        'measured_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def report(result: Dict,path: Optional[str]) -> int:
+    """Print a result, write it to path if given, and return the exit code"""
+    print(json.dumps(result,indent=2))
+    if path:
+        Path(path).write_text(json.dumps(result,indent=2))
+    return 0 if result.get('passed',True) else 1
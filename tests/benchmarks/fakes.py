@@ -0,0 +1,192 @@
+"""
+Deterministic fake market data providers for the benchmarks
+
+FakeProvider answers quotes and history from seeded generators after a
+configurable delay and fails a configurable share of symbols. Whether a
+request is slow or fails depends only on (seed, symbol, request count for
+that symbol), never on task scheduling, so repeated runs see the same
+failures and the same prices. Draws hash that counter instead of keeping a
+generator, so the fake adds little to the timings it is used in.
+"""
+import asyncio
+import math
+import zlib
+from datetime import datetime
+from typing import Dict,List,Optional
+
+import numpy as np
+
+from app.data.providers.base import BaseDataProvider
+from app.data.providers.health import ProviderHealth
+from app.schemas.quote import Quote
+
+# Bar frequency of each supported interval, in pandas offsets
+FREQUENCIES = {
+    '1m': 'min','5m': '5min','15m': '15min','30m': '30min','1h': 'h',
+    '1d': 'B','1wk': 'W-FRI','1mo': 'ME',
+}
+
+MASK = (1 << 64) - 1
+
+
+def uniform(value: int) -> float:
+    """Deterministic draw in [0, 1) from an integer (splitmix64 finalizer)"""
+    value = (value + 0x9E3779B97F4A7C15) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return ((value ^ (value >> 31)) >> 11) / float(1 << 53)
+
+
+def key(*parts) -> int:
+    return zlib.crc32(":".join(map(str,parts)).encode())
+
+
+class FakeProvider(BaseDataProvider):
+    """
+    Offline provider with deterministic latency and failures
+
+    latency is the base delay of every upstream call, plus up to jitter
+    seconds drawn per request. failure_rate is the share of symbol requests
+    answered with an empty quote (the way real providers report a failed
+    symbol), which sends them to the aggregator's fallbacks.
+    """
+
+    def __init__(
+            self,
+            name: str = "fake",
+            latency: float = 0.005,
+            jitter: float = 0.0,
+            failure_rate: float = 0.0,
+            bulk: bool = False,
+            bulk_chunk_size: int = 200,
+            seed: int = 0
+    ):
+        super().__init__()
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.supports_bulk_quotes = bulk
+        self.bulk_chunk_size = bulk_chunk_size if bulk else 1
+        self.seed = seed
+        self._requests: Dict[str,int] = {}
+
+        self.calls = 0
+        self.symbol_requests = 0
+        self.failures = 0
+        self.historical_calls = 0
+
+    def _draw(self,symbol: str) -> int:
+        """Stream of this symbol's next request; draw i is uniform(stream + i)"""
+        count = self._requests.get(symbol,0)
+        self._requests[symbol] = count + 1
+        return (key(self.seed,self.name,symbol) << 32) | (count << 3)
+
+    async def _wait(self,stream: int):
+        delay = self.latency + (uniform(stream) * self.jitter if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def base_price(self,symbol: str) -> float:
+        return 10.0 + 490.0 * uniform(key(self.seed,symbol))
+
+    def _quote(self,symbol: str,stream: int) -> Quote:
+        self.symbol_requests += 1
+        if uniform(stream + 1) < self.failure_rate:
+            self.failures += 1
+            return Quote.empty(symbol)
+
+        base = self.base_price(symbol)
+        price = round(base * math.exp((uniform(stream + 2) - 0.5) * 0.02),2)
+        spread = round(price * 0.0005,2)
+        return Quote(
+            symbol,
+            price=price,
+            change=round(price - base,2),
+            change_percent=round((price / base - 1.0) * 100,3),
+            volume=1000 + int(uniform(stream + 3) * 999000),
+            bid=price - spread,
+            ask=price + spread,
+            open=base,
+            high=max(base,price),
+            low=min(base,price),
+            close=price,
+            prev_close=base
+        )
+
+    async def get_quote(self,symbol: str) -> Quote:
+        self.calls += 1
+        stream = self._draw(symbol)
+        await self._wait(stream)
+        return self._quote(symbol,stream)
+
+    async def get_quotes(self,symbols: List[str]) -> List[Quote]:
+        if not self.supports_bulk_quotes:
+            return list(await asyncio.gather(*(self.get_quote(symbol) for symbol in symbols)))
+        # One upstream call for the chunk, delayed by its first symbol's draw
+        self.calls += 1
+        streams = [self._draw(symbol) for symbol in symbols]
+        await self._wait(streams[0])
+        return [self._quote(symbol,stream) for symbol,stream in zip(symbols,streams)]
+
+    async def get_historical(
+            self,
+            symbol: str,
+            start_date: datetime,
+            end_date: datetime,
+            interval: str = "1d"
+    ):
+        """Seeded geometric Brownian motion bars over the range"""
+        import pandas as pd
+
+        self.historical_calls += 1
+        await self._wait(self._draw(f"{symbol}:{interval}"))
+
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date)
+        start = start.tz_localize('UTC') if start.tzinfo is None else start.tz_convert('UTC')
+        end = end.tz_localize('UTC') if end.tzinfo is None else end.tz_convert('UTC')
+        index = pd.date_range(start.ceil('min'),end,freq=FREQUENCIES.get(interval,'B'),name='Date')
+        if len(index) == 0:
+            return pd.DataFrame()
+
+        # Seeded by symbol and the range's first bar: repeating a request gives
+        # the same bars, ranges starting at different bars are unrelated paths
+        rng = np.random.default_rng([self.seed,key(symbol),int(index[0].timestamp())])
+        returns = rng.normal(0.0,0.01,len(index))
+        close = self.base_price(symbol) * np.exp(np.cumsum(returns))
+        open_ = np.concatenate(([close[0]],close[:-1]))
+        wick = np.abs(rng.normal(0.0,0.003,len(index))) * close
+        return pd.DataFrame({
+            'open': open_,
+            'high': np.maximum(open_,close) + wick,
+            'low': np.minimum(open_,close) - wick,
+            'close': close,
+            'volume': rng.integers(1000,1000000,len(index)),
+        },index=index)
+
+    async def is_available(self) -> bool:
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'symbol_requests': self.symbol_requests,
+            'failures': self.failures,
+            'historical_calls': self.historical_calls,
+        }
+
+
+def install_providers(data_aggregator,providers: List[BaseDataProvider],health_config: Optional[Dict] = None):
+    """Replace a DataAggregator's provider chain, skipping the configured providers"""
+    health_config = health_config or {}
+    data_aggregator.providers = list(providers)
+    data_aggregator.health = {
+        provider.name: ProviderHealth(provider.name,**health_config)
+        for provider in providers
+    }
+    data_aggregator._providers_ready = True
+
+
+def symbols(count: int,prefix: str = "SYM") -> List[str]:
+    return [f"{prefix}{i:05d}" for i in range(count)]
@@ -0,0 +1,111 @@
+"""
+Run the benchmark suite and compare results across commits
+
+Runs each benchmark script in its own process (all offline), collects
+their JSON results into one document tagged with the commit and machine,
+and optionally compares it against an earlier document, listing every
+metric that moved by more than the threshold.
+
+    python tests/benchmarks/run_all.py --output bench-$(git rev-parse --short HEAD).json
+    python tests/benchmarks/run_all.py --output new.json --compare old.json --threshold 0.1
+    python tests/benchmarks/run_all.py --quick --only quotes aggregator
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict,Iterator,Tuple
+
+sys.path.insert(0,str(Path(__file__).resolve().parent))
+
+from common import environment
+
+HERE = Path(__file__).resolve().parent
+
+# Script and (full, quick) arguments of each benchmark
+BENCHMARKS = {
+    'startup': ('bench_startup.py',[],['--runs','2']),
+    'aggregator': ('bench_aggregator.py',[],['--symbols','100']),
+    'quotes': ('bench_quotes.py',[],['--requests','200','--watchlist','100']),
+    'historical': ('bench_historical.py',[],['--days','30','--repeat','2']),
+    'backtest': ('bench_backtest.py',[],['--years','2','--symbols','100','--repeat','1']),
+}
+
+
+def run_benchmark(name: str,quick: bool) -> Dict:
+    script,full,fast = BENCHMARKS[name]
+    with tempfile.TemporaryDirectory() as scratch:
+        output = Path(scratch) / 'result.json'
+        completed = subprocess.run(
+            [sys.executable,str(HERE / script),'--json',str(output)] + (fast if quick else full),
+            capture_output=True,
+            text=True
+        )
+        if not output.exists():
+            return {'benchmark': name,'passed': False,'error': completed.stderr[-2000:]}
+        return json.loads(output.read_text())
+
+
+def metrics(result: Dict,prefix: str = "") -> Iterator[Tuple[str,float]]:
+    """Numeric leaves of a result as (dotted path, value)"""
+    for key,value in result.items():
+        if key == 'environment':
+            continue
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value,dict):
+            yield from metrics(value,path)
+        elif isinstance(value,(int,float)) and not isinstance(value,bool):
+            yield path,float(value)
+
+
+def compare(current: Dict,baseline: Dict,threshold: float) -> list:
+    """Metrics present in both documents whose relative change exceeds threshold"""
+    before = dict(metrics(baseline['results']))
+    changes = []
+    for path,value in metrics(current['results']):
+        old = before.get(path)
+        if old is None or old == value:
+            continue
+        change = (value - old) / abs(old) if old else float('inf')
+        if abs(change) > threshold:
+            changes.append({'metric': path,'before': old,'after': value,'change': change})
+    return sorted(changes,key=lambda c: -abs(c['change']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument('--only',nargs='+',choices=sorted(BENCHMARKS),help="benchmarks to run")
+    parser.add_argument('--quick',action='store_true',help="smaller sizes, for a smoke run")
+    parser.add_argument('--output',help="write the combined results to this file")
+    parser.add_argument('--compare',help="earlier combined results to compare against")
+    parser.add_argument('--threshold',type=float,default=0.1,help="relative change worth reporting")
+    args = parser.parse_args()
+
+    names = args.only or list(BENCHMARKS)
+    results = {}
+    for name in names:
+        print(f"Running {name}...",file=sys.stderr)
+        results[name] = run_benchmark(name,args.quick)
+
+    document = {
+        'environment': environment(),
+        'quick': args.quick,
+        'results': results,
+        'passed': all(result.get('passed',True) for result in results.values()),
+    }
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        document['compared_to'] = baseline.get('environment',{}).get('commit')
+        document['changes'] = compare(document,baseline,args.threshold)
+
+    text = json.dumps(document,indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    print(text)
+    return 0 if document['passed'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Audit database shared by several workers"""
+import asyncio
+import multiprocessing
+import pytest
+
+from app.data.storage.database import Database
+from app.schemas.order import Order
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('aiosqlite')
+
+WORKERS = 6
+
+
+async def started(database: Database) -> Database:
+    await database.start()
+    for _ in range(200):
+        if database.ready or database._task.done():
+            break
+        await asyncio.sleep(0.025)
+    return database
+
+
+def start_worker(url: str,barrier,results):
+    async def scenario():
+        barrier.wait()
+        database = await started(Database(url))
+        results.put(database.ready)
+        await database.stop()
+
+    asyncio.run(scenario())
+
+
+def test_workers_starting_together_all_connect(tmp_path):
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        pytest.skip("needs fork")
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(WORKERS)
+    results = context.Queue()
+    url = f"sqlite+aiosqlite:///{tmp_path / 'audit.db'}"
+    workers = [context.Process(target=start_worker,args=(url,barrier,results)) for _ in range(WORKERS)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+
+    assert [results.get(timeout=5) for _ in workers] == [True] * WORKERS
+
+
+def test_orders_of_different_workers_keep_distinct_keys(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'audit.db'}"
+
+    async def scenario():
+        first = await started(Database(url,worker_id='host:1:aaaa'))
+        second = await started(Database(url,worker_id='host:2:bbbb'))
+        try:
+            # Both workers' counters hand out id 1
+            for database,price in ((first,10.0),(second,20.0)):
+                order = Order(1,'AAA',5,'market',None)
+                order.status = 'filled'
+                order.fill_price = price
+                database.record_order(order)
+                database.record_fill(order)
+                await database.flush()
+
+            fills = await first.query('fills')
+            orders = await first.query('orders')
+        finally:
+            await first.stop()
+            await second.stop()
+        return fills,orders
+
+    fills,orders = asyncio.run(scenario())
+
+    assert sorted(row['order_key'] for row in fills) == ['host:1:aaaa/1','host:2:bbbb/1']
+    assert {row['order_key']: row['price'] for row in fills} == {'host:1:aaaa/1': 10.0,'host:2:bbbb/1': 20.0}
+    assert len({row['order_key'] for row in orders}) == 2
@@ -0,0 +1,39 @@
+"""Chronological splits keep forward-return labels out of validation"""
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+
+from app.models.training.dataset import FeatureArray,WindowDataset,chronological_split,forward_returns
+
+BARS = 100
+WINDOW = 5
+
+
+def write_array(path,horizon):
+    close = np.cumprod(np.full((BARS,2),1.01),axis=0)
+    features = {'close': close.astype(np.float32)}
+    targets = forward_returns(close,horizon=3)
+    return FeatureArray.write(str(path),features,targets,['AAA','BBB'],range(BARS),target='return_3',horizon=horizon)
+
+
+def test_gap_defaults_to_the_target_horizon(tmp_path):
+    write_array(tmp_path,horizon=3)
+    dataset = WindowDataset(str(tmp_path),WINDOW)
+
+    train,validation = chronological_split(dataset,validation_split=0.2)
+
+    cutoff = int(BARS * 0.8)
+    # A training label at bar t uses the close at t + 3, before the validation span
+    assert train.samples[:,1].max() + 3 < cutoff
+    assert validation.samples[:,1].min() == cutoff
+
+
+def test_arrays_without_a_horizon_need_an_explicit_gap(tmp_path):
+    write_array(tmp_path,horizon=None)
+    dataset = WindowDataset(str(tmp_path),WINDOW)
+
+    with pytest.raises(ValueError,match="gap"):
+        chronological_split(dataset)
+    train,_ = chronological_split(dataset,gap=3)
+    assert train.samples[:,1].max() == int(BARS * 0.8) - 4
@@ -0,0 +1,60 @@
+"""/historical bodies for ranges without bars"""
+import io
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import market_data
+
+
+class EmptyAggregator:
+    async def get_historical(self,symbol,start_date,end_date,interval):
+        return pd.DataFrame()
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(market_data.router,prefix="/api/v1")
+    app.state.data_aggregator = EmptyAggregator()
+    return TestClient(app)
+
+
+def get(client,params=None,headers=None):
+    response = client.get("/api/v1/historical/AAA",params=params,headers=headers)
+    assert response.status_code == 200
+    assert response.headers["vary"] == "Accept"
+    return response
+
+
+def test_empty_json_formats_keep_their_envelope(client):
+    records = get(client).json()
+    assert (records["count"],records["data"]) == (0,[])
+
+    columns = get(client,{"format": "columns"}).json()
+    assert columns["count"] == 0
+    assert columns["columns"] == {name: [] for name in ("Date","open","high","low","close","volume")}
+
+
+def test_empty_csv_is_header_only(client):
+    for params,headers in (({"format": "csv"},None),(None,{"accept": "text/csv"})):
+        response = get(client,params,headers)
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.text == "Date,open,high,low,close,volume\n"
+
+
+def test_empty_gzip_csv_is_compressed(client):
+    # The test client decompresses the body
+    response = get(client,{"format": "csv","compression": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == "Date,open,high,low,close,volume\n"
+
+
+def test_empty_arrow_is_schema_only(client):
+    pa = pytest.importorskip("pyarrow")
+    response = get(client,None,{"accept": market_data.ARROW_MEDIA_TYPE})
+
+    table = pa.ipc.open_stream(io.BytesIO(response.content)).read_all()
+    assert table.num_rows == 0
+    assert table.schema.names == ["Date","open","high","low","close","volume"]
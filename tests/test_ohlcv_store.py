@@ -0,0 +1,68 @@
+"""OHLCVStore upserts and concurrent writers in separate processes"""
+import multiprocessing
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data.storage.ohlcv_store import OHLCVStore
+
+WRITERS = 4
+APPENDS = 30
+
+
+def bars(timestamps,close) -> pd.DataFrame:
+    index = pd.DatetimeIndex(timestamps,tz='UTC',name='Date')
+    close = np.full(len(index),close,dtype=float)
+    return pd.DataFrame({'open': close,'high': close,'low': close,'close': close,'volume': close},index=index)
+
+
+def write_bars(root: str,writer: int,errors):
+    """Append one bar at a time; writers interleave days across two years"""
+    store = OHLCVStore(root)
+    days = pd.date_range('2023-12-01',periods=WRITERS * APPENDS,freq='D',tz='UTC')
+    for day in days[writer::WRITERS]:
+        try:
+            store.append('AAA','1d',bars([day],writer),covered_start=day,covered_end=day + pd.Timedelta(days=1))
+        except Exception as e:
+            errors.put(f"writer {writer}: {e!r}")
+
+
+def test_append_upserts_by_timestamp(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append('AAA','1d',bars(['2024-01-02','2024-01-03'],1.0))
+    store.append('AAA','1d',bars(['2024-01-03','2024-01-04'],2.0))
+
+    df = store.read('AAA','1d')
+
+    assert df['close'].tolist() == [1.0,2.0,2.0]
+    assert store.last_timestamp('AAA','1d') == pd.Timestamp('2024-01-04',tz='UTC')
+
+
+def test_appends_from_several_processes_are_all_kept(tmp_path):
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        pytest.skip("needs fork")
+    context = multiprocessing.get_context('fork')
+    errors = context.Queue()
+    writers = [context.Process(target=write_bars,args=(str(tmp_path),writer,errors)) for writer in range(WRITERS)]
+    for process in writers:
+        process.start()
+    for process in writers:
+        process.join(60)
+
+    failures = []
+    while not errors.empty():
+        failures.append(errors.get())
+    assert failures == []
+    assert [process.exitcode for process in writers] == [0] * WRITERS
+
+    store = OHLCVStore(str(tmp_path))
+    df = store.read('AAA','1d')
+    assert len(df) == WRITERS * APPENDS
+    assert df.index.is_monotonic_increasing
+    assert store.missing_ranges('AAA','1d',df.index[0],df.index[-1]) == []
+
+    # Only the current version of each year is left on disk
+    meta = store._load_meta('AAA','1d')
+    directories = sorted(path.name for path in (tmp_path / 'AAA' / '1d').iterdir() if path.is_dir())
+    assert directories == sorted(meta['partitions'].values())
+    assert sorted(meta['partitions']) == ['2023','2024']
@@ -0,0 +1,71 @@
+"""Daily budgets and their sharing across processes"""
+import asyncio
+import multiprocessing
+import pytest
+from datetime import datetime,timezone
+
+from app.data.providers.rate_limiter import DailyWindow,Priority,RateLimitExceeded,RateLimiterRegistry
+
+PROCESSES = 4
+PER_DAY = 20
+
+
+def utc(*args) -> float:
+    return datetime(*args,tzinfo=timezone.utc).timestamp()
+
+
+def test_daily_window_does_not_refill_before_the_day_boundary():
+    window = DailyWindow(25)
+    morning = utc(2024,3,4,0,5)
+    for _ in range(25):
+        window.consume(morning)
+
+    # A continuous bucket would have refilled about 24 requests by now
+    evening = utc(2024,3,4,23,55)
+    assert window.available(evening) == 0
+    assert window.wait_time(evening) == pytest.approx(300)
+    assert window.available(utc(2024,3,5,0,0)) == 25
+
+
+def test_daily_window_resets_at_the_provider_midnight():
+    window = DailyWindow(10,"America/New_York")
+    window.consume(utc(2024,3,4,12))
+    window.consume(utc(2024,3,5,3))
+    # 03:00 UTC is still the 4th in New York
+    assert window.available(utc(2024,3,5,3)) == 8
+    assert window.available(utc(2024,3,5,5)) == 10
+
+
+def spend(state_file: str,results):
+    """One process spending as much of the shared budget as it can"""
+    async def scenario():
+        limiter = RateLimiterRegistry(state_file=state_file,reserve=0).for_provider('api',{'per_day': PER_DAY})
+        granted = 0
+        for _ in range(PER_DAY):
+            try:
+                await limiter.acquire(Priority.TRADING,max_wait=5)
+                granted += 1
+            except RateLimitExceeded:
+                pass
+        results.put(granted)
+
+    asyncio.run(scenario())
+
+
+def test_processes_share_one_daily_budget(tmp_path):
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        pytest.skip("needs fork")
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    state_file = str(tmp_path / 'rate_limits.json')
+    processes = [context.Process(target=spend,args=(state_file,results)) for _ in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+
+    assert sum(results.get(timeout=5) for _ in processes) == PER_DAY
+
+    # A process started later sees the budget as spent
+    limiter = RateLimiterRegistry(state_file=state_file).for_provider('api',{'per_day': PER_DAY})
+    assert limiter.is_exhausted()
@@ -0,0 +1,226 @@
+"""Worker coordination on the in-memory backend and on fakeredis (Lua leases included)"""
+import asyncio
+import time
+import pandas as pd
+import pytest
+from datetime import datetime
+from typing import List
+
+from app.data.providers.base import BaseDataProvider
+from app.data.providers.data_aggregator import DataAggregator,ProviderHealth
+from app.data.shared import MemoryBackend,WorkerCoordinator
+from app.data.snapshot import QuoteSnapshotService
+from app.schemas.quote import Quote
+
+
+@pytest.fixture(params=['memory','redis'])
+def make_coordinator(request):
+    """Factory of coordinators sharing one backend, as workers of one deployment"""
+    if request.param == 'memory':
+        backend = MemoryBackend()
+
+        def make(lease: float = 0.3) -> WorkerCoordinator:
+            coordinator = WorkerCoordinator(backend='memory',lease=lease)
+
+            async def connect():
+                return backend
+            coordinator._connect = connect
+            return coordinator
+    else:
+        fakeredis = pytest.importorskip('fakeredis')
+        pytest.importorskip('lupa')
+        server = fakeredis.FakeServer()
+
+        def make(lease: float = 0.3) -> WorkerCoordinator:
+            return WorkerCoordinator(backend='redis',lease=lease,client=fakeredis.FakeAsyncRedis(server=server))
+    return make
+
+
+async def wait_until(condition,timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        await asyncio.sleep(0.01)
+
+
+async def start_all(coordinators: List[WorkerCoordinator]):
+    for coordinator in coordinators:
+        await coordinator.start()
+    for coordinator in coordinators:
+        await coordinator.wait_ready()
+
+
+async def stop_all(coordinators: List[WorkerCoordinator]):
+    for coordinator in coordinators:
+        await coordinator.stop()
+
+
+# Lease election
+
+def test_single_leader_and_failover(make_coordinator):
+    async def scenario():
+        workers = [make_coordinator(lease=0.3) for _ in range(3)]
+        await start_all(workers)
+        try:
+            leaders = [worker for worker in workers if worker.is_leader]
+            assert len(leaders) == 1
+
+            # The leader dies without releasing: another takes over once the lease expires
+            crashed = leaders[0]
+            crashed._task.cancel()
+            others = [worker for worker in workers if worker is not crashed]
+            await wait_until(lambda: any(worker.is_leader for worker in others),timeout=1.5)
+            assert sum(worker.is_leader for worker in others) == 1
+
+            # A clean stop releases the lease for the last worker
+            successor = next(worker for worker in others if worker.is_leader)
+            last = next(worker for worker in others if worker is not successor)
+            await successor.stop()
+            await wait_until(lambda: last.is_leader,timeout=1.0)
+        finally:
+            await stop_all(workers)
+
+    asyncio.run(scenario())
+
+
+def test_unreachable_redis_falls_back_to_memory():
+    redis = pytest.importorskip('redis.asyncio')
+
+    async def scenario():
+        coordinator = WorkerCoordinator(
+            backend='redis',
+            client=redis.Redis(host='127.0.0.1',port=1,socket_connect_timeout=0.2)
+        )
+        await coordinator.start()
+        await coordinator.wait_ready()
+        try:
+            assert coordinator.backend.name == 'memory'
+            assert coordinator.is_leader
+        finally:
+            await coordinator.stop()
+
+    asyncio.run(scenario())
+
+
+# Snapshot following
+
+class PriceAggregator:
+    """Serves quotes at settable prices"""
+
+    def __init__(self,prices):
+        self.prices = dict(prices)
+
+    async def get_quotes(self,symbols,use_cache=True):
+        return [Quote(symbol,price=self.prices[symbol],timestamp=datetime.now()) for symbol in symbols]
+
+
+def test_follower_applies_deltas_and_resyncs_on_gap(make_coordinator):
+    async def scenario():
+        workers = [make_coordinator(lease=5.0) for _ in range(2)]
+        await start_all(workers)
+        leader = next(worker for worker in workers if worker.is_leader)
+        following = next(worker for worker in workers if not worker.is_leader)
+
+        aggregator = PriceAggregator({'AAA': 10.0,'BBB': 20.0})
+        poller = QuoteSnapshotService(aggregator,['AAA','BBB'],coordinator=leader)
+        follower = QuoteSnapshotService(None,['AAA','BBB'],coordinator=following)
+        received = []
+        follower.add_listener(received.append)
+        resyncs = []
+        load_shared = follower.load_shared
+
+        async def counted_load_shared():
+            resyncs.append(follower.version)
+            return await load_shared()
+        follower.load_shared = counted_load_shared
+        follower._follow_task = asyncio.create_task(follower._follow())
+        try:
+            # Let the follower subscribe before anything is published
+            await asyncio.sleep(0.05)
+
+            # The first message resyncs from the stored snapshot
+            await poller.refresh()
+            await wait_until(lambda: follower.version == 1)
+            assert follower.quotes['AAA'].price == 10.0
+            assert isinstance(follower.quotes['AAA'].timestamp,datetime)
+            assert len(resyncs) == 1
+
+            # The next version applies the deltas only
+            aggregator.prices['AAA'] = 11.0
+            await poller.refresh()
+            await wait_until(lambda: follower.version == 2)
+            assert follower.quotes['AAA'].price == 11.0
+            assert follower.quotes['BBB'].price == 20.0
+            assert len(resyncs) == 1
+            assert received[-1]['AAA']['price'] == 11.0
+
+            # A skipped version makes the follower reload the stored snapshot
+            poller.version += 1
+            aggregator.prices['BBB'] = 21.0
+            await poller.refresh()
+            await wait_until(lambda: follower.version == 4)
+            assert len(resyncs) == 2
+            assert {symbol: quote.price for symbol,quote in follower.quotes.items()} == {'AAA': 11.0,'BBB': 21.0}
+        finally:
+            await follower.stop()
+            await stop_all(workers)
+
+    asyncio.run(scenario())
+
+
+# Quote cache shared across workers
+
+class CountingProvider(BaseDataProvider):
+    """Prices every symbol at 100, counting requested symbols"""
+
+    def __init__(self):
+        super().__init__()
+        self.requested = 0
+
+    async def get_quote(self,symbol: str) -> Quote:
+        self.requested += 1
+        return Quote(symbol,price=100.0)
+
+    async def get_quotes(self,symbols: List[str]) -> List[Quote]:
+        return [await self.get_quote(symbol) for symbol in symbols]
+
+    async def get_historical(self,symbol,start_date,end_date,interval="1d") -> pd.DataFrame:
+        return pd.DataFrame()
+
+    async def is_available(self) -> bool:
+        return True
+
+
+def aggregator_with(provider: BaseDataProvider,coordinator: WorkerCoordinator) -> DataAggregator:
+    data_aggregator = DataAggregator()
+    data_aggregator.cache_enabled = True
+    data_aggregator.coordinator = coordinator
+    data_aggregator.providers = [provider]
+    data_aggregator.health = {provider.name: ProviderHealth(provider.name)}
+    data_aggregator._providers_ready = True
+    return data_aggregator
+
+
+def test_quotes_fetched_by_one_worker_are_shared_hits_for_another(make_coordinator):
+    async def scenario():
+        workers = [make_coordinator(lease=5.0) for _ in range(2)]
+        await start_all(workers)
+        first,second = CountingProvider(),CountingProvider()
+        fetching = aggregator_with(first,workers[0])
+        reading = aggregator_with(second,workers[1])
+        symbols = ['AAA','BBB','CCC']
+        try:
+            await fetching.get_quotes(symbols)
+            assert first.requested == 3
+            # Shared writes go out once per loop iteration
+            await asyncio.sleep(0.05)
+
+            quotes = await reading.get_quotes(symbols + ['DDD'])
+            assert [quote.price for quote in quotes] == [100.0] * 4
+            assert reading.shared_hits == 3
+            assert second.requested == 1
+        finally:
+            await stop_all(workers)
+
+    asyncio.run(scenario())
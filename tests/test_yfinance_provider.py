@@ -0,0 +1,118 @@
+"""Bulk quote path of YFinanceProvider against a local stand-in for yf.download"""
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data.providers.yfinance_provider import YFinanceProvider
+
+FIELDS = ('Open','High','Low','Close','Volume')
+
+
+def bars(closes) -> pd.DataFrame:
+    """Daily bars of one symbol with the given closes (NaN for no bar)"""
+    index = pd.date_range('2024-01-02',periods=len(closes),freq='B',tz='America/New_York')
+    close = np.array(closes,dtype=float)
+    return pd.DataFrame({
+        'Open': close - 1.0,
+        'High': close + 2.0,
+        'Low': close - 2.0,
+        'Close': close,
+        'Volume': np.where(np.isnan(close),np.nan,1000.0),
+    },index=index)
+
+
+def multi_symbol(frames) -> pd.DataFrame:
+    """Frame shaped like yf.download(group_by='column'): (field, symbol) columns"""
+    return pd.concat(frames,axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+
+class FakeDownload:
+    """Serves bars for the symbols it knows, recording every call"""
+
+    def __init__(self,frames,flat_single: bool = False,error: Exception = None):
+        self.frames = frames
+        self.flat_single = flat_single
+        self.error = error
+        self.calls = []
+
+    def __call__(self,tickers,**kwargs):
+        self.calls.append(list(tickers))
+        if self.error is not None:
+            raise self.error
+        known = {symbol: self.frames[symbol] for symbol in tickers if symbol in self.frames}
+        if not known:
+            return pd.DataFrame()
+        if self.flat_single and len(tickers) == 1:
+            return known[tickers[0]]
+        return multi_symbol(known)
+
+
+def quotes_for(provider: YFinanceProvider,symbols):
+    return asyncio.run(provider.get_quotes(symbols))
+
+
+def test_quotes_from_frame_uses_last_two_valid_bars():
+    frame = multi_symbol({'AAA': bars([10,11,12]),'BBB': bars([20,21,np.nan])})
+    provider = YFinanceProvider(download=FakeDownload({}))
+
+    aaa,bbb = provider._quotes_from_frame(frame,['AAA','BBB'])
+
+    assert aaa.price == 12 and aaa.prev_close == 11
+    assert aaa.change == pytest.approx(1.0)
+    assert aaa.change_percent == pytest.approx(100 / 11)
+    assert (aaa.open,aaa.high,aaa.low,aaa.volume) == (11.0,14.0,10.0,1000)
+    assert aaa.timestamp == frame.index[2]
+    # BBB has no bar on the last row, so its last bar is the one before
+    assert bbb.price == 21 and bbb.prev_close == 20
+    assert bbb.timestamp == frame.index[1]
+
+
+def test_single_bar_uses_price_as_prev_close():
+    frame = multi_symbol({'AAA': bars([np.nan,np.nan,15])})
+    provider = YFinanceProvider(download=FakeDownload({}))
+
+    quote, = provider._quotes_from_frame(frame,['AAA'])
+
+    assert quote.price == 15 and quote.prev_close == 15 and quote.change == 0
+
+
+def test_symbols_missing_from_frame_get_empty_quotes():
+    download = FakeDownload({'AAA': bars([10,11])})
+    provider = YFinanceProvider(download=download)
+
+    quotes = quotes_for(provider,['AAA','GONE'])
+
+    assert [quote.symbol for quote in quotes] == ['AAA','GONE']
+    assert quotes[0].price == 11
+    assert quotes[1].price == 0 and quotes[1].provider == 'none'
+
+
+def test_get_quotes_downloads_in_chunks_and_keeps_order():
+    symbols = ['S1','S2','S3','S4','S5']
+    download = FakeDownload({symbol: bars([i,i + 1]) for i,symbol in enumerate(symbols,start=1)})
+    provider = YFinanceProvider(bulk_chunk_size=2,download=download)
+
+    quotes = quotes_for(provider,symbols)
+
+    assert sorted(download.calls) == [['S1','S2'],['S3','S4'],['S5']]
+    assert [quote.symbol for quote in quotes] == symbols
+    assert [quote.price for quote in quotes] == [2,3,4,5,6]
+
+
+def test_single_symbol_flat_frame():
+    download = FakeDownload({'AAA': bars([10,12])},flat_single=True)
+    provider = YFinanceProvider(download=download)
+
+    quote, = quotes_for(provider,['AAA'])
+
+    assert quote.price == 12 and quote.prev_close == 10
+
+
+def test_download_error_gives_empty_quotes():
+    download = FakeDownload({},error=RuntimeError("upstream down"))
+    provider = YFinanceProvider(download=download)
+
+    quotes = quotes_for(provider,['AAA','BBB'])
+
+    assert [quote.price for quote in quotes] == [0,0]